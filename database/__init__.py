@@ -1,26 +1,82 @@
 from database.customize import CustomAsyncSession
+from database.engine import create_engine
+from database.routing import get_request_user_id, primary_pin
+
+from fastapi import Request
+
+from modules.common import deadline
 
 from settings import Database
 
+from sqlalchemy import event, orm
 from sqlalchemy.ext.asyncio import (
-    AsyncSession, async_sessionmaker, create_async_engine)
+    AsyncEngine, AsyncSession, async_sessionmaker)
 from sqlalchemy.orm import DeclarativeBase
 
-engine = create_async_engine(
-    Database.url,
-    pool_size=Database.pool_size,
-    max_overflow=Database.max_overflow,
-    pool_recycle=Database.pool_recycle,
-    pool_pre_ping=Database.pool_pre_ping
-)
-Session = async_sessionmaker(engine)
-CustomSession = async_sessionmaker(bind=engine, class_=CustomAsyncSession)
+engine: AsyncEngine | None = None
+replica_engine: AsyncEngine | None = None
+
+Session = async_sessionmaker()
+CustomSession = async_sessionmaker(class_=CustomAsyncSession)
+ReplicaSession = async_sessionmaker()
 
 
 class Base(DeclarativeBase):
     pass
 
 
+@event.listens_for(orm.Session, 'after_begin')
+def apply_statement_timeout(session, transaction, connection) -> None:
+    """
+    Limits statements of a transaction begun within a request to the time
+    left until the request deadline. SET LOCAL lasts until the end of the
+    transaction, so it is safe with PgBouncer in transaction mode.
+    """
+    statement_timeout = deadline.get_statement_timeout()
+    if statement_timeout is not None:
+        connection.exec_driver_sql(
+            f'SET LOCAL statement_timeout = {statement_timeout}'
+        )
+
+
+def init_engines() -> AsyncEngine:
+    """
+    Creates the primary and replica engines and binds session makers to
+    them. Does nothing if the engines are already created.
+
+    Engines are created explicitly (by the application lifespan or by a
+    management command) rather than on import, so importing models does
+    not require database configuration and every forked worker opens its
+    own connections.
+    """
+    global engine, replica_engine
+    if engine is not None:
+        return engine
+
+    engine = create_engine(Database.url)
+    Session.configure(bind=engine)
+    CustomSession.configure(bind=engine)
+
+    if Database.replica_url:
+        replica_engine = create_engine(Database.replica_url)
+    ReplicaSession.configure(bind=replica_engine or engine)
+    return engine
+
+
+async def dispose_engines() -> None:
+    global engine, replica_engine
+    if replica_engine is not None:
+        await replica_engine.dispose()
+        replica_engine = None
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
+def is_primary_session(session: AsyncSession) -> bool:
+    return session.bind is engine
+
+
 async def get_session() -> AsyncSession:
     async with Session() as session:
         yield session
@@ -29,3 +85,19 @@ async def get_session() -> AsyncSession:
 async def get_custom_session() -> CustomAsyncSession:
     async with CustomSession() as session:
         yield session
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """
+    Yields a session bound to the read replica when one is configured.
+    Users who have written recently are kept on the primary so they always
+    read their own writes.
+    """
+    session_maker = ReplicaSession
+    if primary_pin.is_pinned(
+            get_request_user_id(request),
+            request.cookies.get(primary_pin.cookie)
+    ):
+        session_maker = Session
+    async with session_maker() as session:
+        yield session
@@ -0,0 +1,45 @@
+"""add email outbox table
+
+Revision ID: 3b7f1c2d9a40
+Revises: e8425735afd6
+Create Date: 2026-10-19 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7f1c2d9a40'
+down_revision: Union[str, None] = 'e8425735afd6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('link_vault_email_outbox',
+    sa.Column('id', sa.UUID(), nullable=False, comment='Unique identifier for the email'),
+    sa.Column('email', sa.String(length=64), nullable=False, comment='Email address of the receiver'),
+    sa.Column('subject', sa.String(length=256), nullable=False, comment='Subject of the email'),
+    sa.Column('template_id', sa.String(length=64), nullable=True, comment='Identifier of the email template'),
+    sa.Column('template_data', postgresql.JSONB(astext_type=sa.Text()), nullable=False, comment='Parameters to be replaced in the template'),
+    sa.Column('status', sa.Enum('pending', 'sent', 'failed', name='emailoutboxstatus'), nullable=False, comment='Sending status of the email'),
+    sa.Column('attempts', sa.Integer(), nullable=False, comment='Number of sending attempts'),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False, comment='Time after which the email may be claimed for sending'),
+    sa.Column('last_error', sa.String(length=1024), nullable=True, comment='Error of the last failed attempt'),
+    sa.Column('sent_at', sa.DateTime(), nullable=True, comment='Timestamp when the email was sent'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='Created time'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='Updated time'),
+    sa.PrimaryKeyConstraint('id'),
+    comment='Emails to be sent by the outbox dispatcher'
+    )
+    op.create_index('ix_email_outbox_pending', 'link_vault_email_outbox', ['next_attempt_at'], unique=False, postgresql_where="status = 'pending'")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_pending', table_name='link_vault_email_outbox', postgresql_where="status = 'pending'")
+    op.drop_table('link_vault_email_outbox')
+    sa.Enum(name='emailoutboxstatus').drop(op.get_bind(), checkfirst=True)
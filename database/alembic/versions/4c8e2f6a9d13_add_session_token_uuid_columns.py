@@ -0,0 +1,75 @@
+"""add session token uuid columns
+
+Revision ID: 4c8e2f6a9d13
+Revises: b7a3e9d41c2f
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e2f6a9d13'
+down_revision: Union[str, None] = 'b7a3e9d41c2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# Moves the token identifiers out of the payload copies and drops the
+# copies, in batches committed one by one so that no long lock is held
+MOVE_BATCH = sa.text(
+    "UPDATE link_vault_sessions "
+    "SET token_uuid = (auth_token_data ->> 'token_uuid')::uuid, "
+    "refresh_uuid = (refresh_token_data ->> 'refresh_uuid')::uuid, "
+    "auth_token_data = NULL, refresh_token_data = NULL "
+    "WHERE id IN ("
+    "SELECT id FROM link_vault_sessions "
+    "WHERE auth_token_data IS NOT NULL OR refresh_token_data IS NOT NULL "
+    "LIMIT :batch_size FOR UPDATE SKIP LOCKED"
+    ")"
+)
+
+
+def upgrade() -> None:
+    op.add_column('link_vault_sessions', sa.Column('token_uuid', sa.UUID(), nullable=True, comment='Identifier of the current authentication token'))
+    op.add_column('link_vault_sessions', sa.Column('refresh_uuid', sa.UUID(), nullable=True, comment='Identifier of the current refresh token'))
+    op.alter_column('link_vault_sessions', 'auth_token_data',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               comment='Payload of the authentication token, not stored anymore',
+               existing_comment='Data for the authentication token',
+               existing_nullable=True)
+    op.alter_column('link_vault_sessions', 'refresh_token_data',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               comment='Payload of the refresh token, not stored anymore',
+               existing_comment='Data for the refresh token',
+               existing_nullable=True)
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        while connection.execute(
+            MOVE_BATCH, {'batch_size': BATCH_SIZE}
+        ).rowcount:
+            pass
+        op.create_index('ix_sessions_active_token_uuid', 'link_vault_sessions', ['id', 'token_uuid'], unique=False, postgresql_where='is_active', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    # Payloads cannot be restored, sessions have to log in again
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_active_token_uuid', table_name='link_vault_sessions', postgresql_where='is_active', postgresql_concurrently=True)
+    op.alter_column('link_vault_sessions', 'refresh_token_data',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               comment='Data for the refresh token',
+               existing_comment='Payload of the refresh token, not stored anymore',
+               existing_nullable=True)
+    op.alter_column('link_vault_sessions', 'auth_token_data',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               comment='Data for the authentication token',
+               existing_comment='Payload of the authentication token, not stored anymore',
+               existing_nullable=True)
+    op.drop_column('link_vault_sessions', 'refresh_uuid')
+    op.drop_column('link_vault_sessions', 'token_uuid')
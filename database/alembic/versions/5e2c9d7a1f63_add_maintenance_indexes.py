@@ -0,0 +1,33 @@
+"""add maintenance indexes
+
+Revision ID: 5e2c9d7a1f63
+Revises: 8d41e6a0c5b2
+Create Date: 2026-10-19 18:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2c9d7a1f63'
+down_revision: Union[str, None] = '8d41e6a0c5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so that writes to big tables are not blocked. The
+    # primary key lets maintenance jobs walk the rows by (key, id)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_confirmation_codes_expired_at', 'link_vault_confirmation_codes', ['expired_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_confirmation_codes_used_created_at', 'link_vault_confirmation_codes', ['created_at', 'id'], unique=False, postgresql_where='used', postgresql_concurrently=True)
+        op.create_index('ix_sessions_finished_created_at', 'link_vault_sessions', ['created_at', 'id'], unique=False, postgresql_where='is_closed OR NOT is_active', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_finished_created_at', table_name='link_vault_sessions', postgresql_where='is_closed OR NOT is_active', postgresql_concurrently=True)
+        op.drop_index('ix_confirmation_codes_used_created_at', table_name='link_vault_confirmation_codes', postgresql_where='used', postgresql_concurrently=True)
+        op.drop_index('ix_confirmation_codes_expired_at', table_name='link_vault_confirmation_codes', postgresql_concurrently=True)
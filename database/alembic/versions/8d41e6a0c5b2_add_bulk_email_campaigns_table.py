@@ -0,0 +1,44 @@
+"""add bulk email campaigns table
+
+Revision ID: 8d41e6a0c5b2
+Revises: 3b7f1c2d9a40
+Create Date: 2026-10-19 17:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e6a0c5b2'
+down_revision: Union[str, None] = '3b7f1c2d9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('link_vault_bulk_email_campaigns',
+    sa.Column('id', sa.UUID(), nullable=False, comment='Unique identifier for the campaign'),
+    sa.Column('name', sa.String(length=128), nullable=False, comment='Unique name used to resume the campaign'),
+    sa.Column('cohort', sa.String(length=32), nullable=False, comment='Name of the selected group of users'),
+    sa.Column('template_id', sa.String(length=64), nullable=True, comment='Identifier of the email template'),
+    sa.Column('subject', sa.String(length=256), nullable=False, comment='Subject of the email'),
+    sa.Column('status', sa.Enum('in_progress', 'completed', name='bulkemailcampaignstatus'), nullable=False, comment='Sending status of the campaign'),
+    sa.Column('last_user_id', sa.UUID(), nullable=True, comment='Identifier of the last processed user (checkpoint)'),
+    sa.Column('recipients_count', sa.Integer(), nullable=False, comment='Number of processed recipients'),
+    sa.Column('provider_data', postgresql.JSONB(astext_type=sa.Text()), nullable=False, comment='Provider state, e.g. identifiers of created lists'),
+    sa.Column('completed_at', sa.DateTime(), nullable=True, comment='Timestamp when the campaign was completed'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='Created time'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='Updated time'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name'),
+    comment='Progress of bulk email sending to a cohort of users'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('link_vault_bulk_email_campaigns')
+    sa.Enum(name='bulkemailcampaignstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,46 @@
+"""add revocations
+
+Revision ID: 9d1f4b7e2a58
+Revises: 4c8e2f6a9d13
+Create Date: 2026-10-19 23:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d1f4b7e2a58'
+down_revision: Union[str, None] = '4c8e2f6a9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def replace_token_index(predicate: str) -> None:
+    # Built under a temporary name first, so token checks always have one
+    with op.get_context().autocommit_block():
+        op.create_index('ix_sessions_active_token_uuid_new', 'link_vault_sessions', ['id', 'token_uuid'], unique=False, postgresql_where=predicate, postgresql_concurrently=True)
+        op.drop_index('ix_sessions_active_token_uuid', table_name='link_vault_sessions', postgresql_concurrently=True)
+    op.execute('ALTER INDEX ix_sessions_active_token_uuid_new RENAME TO ix_sessions_active_token_uuid')
+
+
+def upgrade() -> None:
+    op.create_table('link_vault_revocations',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False, comment='Sequence number of the revocation'),
+    sa.Column('session_id', sa.UUID(), nullable=True, comment='Session whose tokens are revoked'),
+    sa.Column('user_id', sa.UUID(), nullable=True, comment='User whose tokens of all sessions are revoked'),
+    sa.Column('revoked_at', sa.DateTime(), nullable=False, comment='Tokens issued before this time are revoked'),
+    sa.Column('expires_at', sa.DateTime(), nullable=False, comment='Time when all revoked tokens have expired'),
+    sa.PrimaryKeyConstraint('id'),
+    comment='Sessions and users whose access tokens are revoked'
+    )
+    op.create_index('ix_revocations_expires_at', 'link_vault_revocations', ['expires_at', 'id'], unique=False)
+    replace_token_index('is_active AND NOT is_closed')
+
+
+def downgrade() -> None:
+    replace_token_index('is_active')
+    op.drop_index('ix_revocations_expires_at', table_name='link_vault_revocations')
+    op.drop_table('link_vault_revocations')
@@ -0,0 +1,94 @@
+"""hash confirmation codes
+
+Revision ID: b7a3e9d41c2f
+Revises: 5e2c9d7a1f63
+Create Date: 2026-10-19 19:40:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7a3e9d41c2f'
+down_revision: Union[str, None] = '5e2c9d7a1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 1000
+
+
+def hash_codes(connection) -> None:
+    """
+    Hashes plain codes in batches walked by the primary key, each
+    committed on its own, so no statement locks or rewrites the whole
+    table. Plain codes are shorter than a hex digest, so a code is hashed
+    once even if the migration is run again.
+    """
+    last_id = uuid.UUID(int=0)
+    while True:
+        last_id = connection.execute(
+            sa.text(
+                "WITH batch AS ("
+                "SELECT id FROM link_vault_confirmation_codes "
+                "WHERE length(code) < 64 "
+                "AND id > :last_id "
+                "ORDER BY id LIMIT :batch_size"
+                "), updated AS ("
+                "UPDATE link_vault_confirmation_codes AS codes "
+                "SET code = encode(sha256(convert_to(codes.code, 'UTF8')), "
+                "'hex') "
+                "FROM batch WHERE codes.id = batch.id "
+                "RETURNING codes.id"
+                ") "
+                "SELECT id FROM updated ORDER BY id DESC LIMIT 1"
+            ),
+            {'last_id': last_id, 'batch_size': BATCH_SIZE}
+        ).scalar()
+        if last_id is None:
+            break
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    # Codes already sent keep working
+    with op.get_context().autocommit_block():
+        hash_codes(connection)
+        # Equal codes cannot be told apart once unique, only the latest
+        # one of them is kept
+        connection.execute(sa.text(
+            "DELETE FROM link_vault_confirmation_codes AS codes "
+            "USING link_vault_confirmation_codes AS newer "
+            "WHERE codes.code = newer.code "
+            "AND (codes.created_at, codes.id) < (newer.created_at, newer.id)"
+        ))
+        # A failed concurrent build leaves an invalid index behind, which
+        # is dropped so that the migration can be run again
+        is_valid = connection.execute(sa.text(
+            "SELECT indisvalid FROM pg_index "
+            "WHERE indexrelid = to_regclass('ix_confirmation_codes_code')"
+        )).scalar()
+        if is_valid is False:
+            op.drop_index('ix_confirmation_codes_code', table_name='link_vault_confirmation_codes', postgresql_concurrently=True)
+        if not is_valid:
+            op.create_index('ix_confirmation_codes_code', 'link_vault_confirmation_codes', ['code'], unique=True, postgresql_concurrently=True)
+    op.alter_column('link_vault_confirmation_codes', 'code',
+               existing_type=sa.VARCHAR(length=64),
+               comment='SHA-256 hex digest of the confirmation code',
+               existing_comment='Confirmation code',
+               existing_nullable=False)
+
+
+def downgrade() -> None:
+    # Hashed codes cannot be restored, they stop matching after downgrade
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_confirmation_codes_code', table_name='link_vault_confirmation_codes', postgresql_concurrently=True)
+    op.alter_column('link_vault_confirmation_codes', 'code',
+               existing_type=sa.VARCHAR(length=64),
+               comment='Confirmation code',
+               existing_comment='SHA-256 hex digest of the confirmation code',
+               existing_nullable=False)
@@ -0,0 +1,32 @@
+"""add session last_seen_at
+
+Revision ID: b7e3a9c1f460
+Revises: 9d1f4b7e2a58
+Create Date: 2026-10-20 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3a9c1f460'
+down_revision: Union[str, None] = '9d1f4b7e2a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A non-volatile default is stored in the catalog, so existing rows are
+    # not rewritten and start their idle period now
+    op.add_column('link_vault_sessions', sa.Column('last_seen_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False, comment='Last time the session was used, tracked with a delay'))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_sessions_active_last_seen_at', 'link_vault_sessions', ['last_seen_at', 'id'], unique=False, postgresql_where='is_active AND NOT is_closed', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_active_last_seen_at', table_name='link_vault_sessions', postgresql_concurrently=True)
+    op.drop_column('link_vault_sessions', 'last_seen_at')
@@ -0,0 +1,36 @@
+"""add rate limits
+
+Revision ID: e2c6d8a4b913
+Revises: b7e3a9c1f460
+Create Date: 2026-10-20 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6d8a4b913'
+down_revision: Union[str, None] = 'b7e3a9c1f460'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('link_vault_rate_limits',
+    sa.Column('key', sa.String(length=320), nullable=False, comment='Rate limit and the limited IP address, user or email'),
+    sa.Column('window', sa.BigInteger(), nullable=False, comment='Number of the fixed time window since the epoch'),
+    sa.Column('hits', sa.Integer(), nullable=False, comment='Requests counted in the window'),
+    sa.Column('expires_at', sa.DateTime(), nullable=False, comment='Time after which the window is not used anymore'),
+    sa.PrimaryKeyConstraint('key', 'window'),
+    comment='Requests counted by rate limits of all workers',
+    prefixes=['UNLOGGED']
+    )
+    op.create_index('ix_rate_limits_expires_at', 'link_vault_rate_limits', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limits_expires_at', table_name='link_vault_rate_limits')
+    op.drop_table('link_vault_rate_limits')
@@ -0,0 +1,40 @@
+"""add idempotency keys
+
+Revision ID: f3a1c7e9b2d4
+Revises: e2c6d8a4b913
+Create Date: 2026-10-21 11:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a1c7e9b2d4'
+down_revision: Union[str, None] = 'e2c6d8a4b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('link_vault_idempotency_keys',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False, comment='Sequence number of the key'),
+    sa.Column('key', sa.String(length=64), nullable=False, comment='SHA-256 of the client, route and Idempotency-Key header'),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False, comment='SHA-256 of the request query and body'),
+    sa.Column('status_code', sa.Integer(), nullable=True, comment='Status of the stored response, null while in progress'),
+    sa.Column('content_type', sa.String(length=255), nullable=True, comment='Content type of the stored response'),
+    sa.Column('response_body', sa.LargeBinary(), nullable=True, comment='Body of the stored response'),
+    sa.Column('locked_until', sa.DateTime(), nullable=True, comment='Time after which a request in progress is taken over'),
+    sa.Column('expires_at', sa.DateTime(), nullable=False, comment='Time after which the key may be used for a new request'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key'),
+    comment='Responses of requests sent with an Idempotency-Key'
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'link_vault_idempotency_keys', ['expires_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='link_vault_idempotency_keys')
+    op.drop_table('link_vault_idempotency_keys')
@@ -0,0 +1,102 @@
+import uuid
+
+from database.pool import MonitoredQueuePool
+
+from settings import Database
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+
+class PoolingMode:
+    """
+    direct: the application connects to PostgreSQL itself and keeps its own
+        pool with tuned asyncpg statement caches.
+    pgbouncer: connections go through an external pooler in transaction
+        mode, so prepared statements must not outlive a transaction.
+    """
+    direct = 'direct'
+    pgbouncer = 'pgbouncer'
+
+
+def get_prepared_statement_name() -> str:
+    return f'__asyncpg_{uuid.uuid4()}__'
+
+
+def get_direct_connect_args() -> dict:
+    return {
+        'statement_cache_size': Database.statement_cache_size,
+        'max_cached_statement_lifetime': (
+            Database.max_cached_statement_lifetime
+        ),
+        'max_cacheable_statement_size': Database.max_cacheable_statement_size,
+        'prepared_statement_cache_size': (
+            Database.prepared_statement_cache_size
+        ),
+    }
+
+
+def get_pgbouncer_connect_args() -> dict:
+    return {
+        'statement_cache_size': 0,
+        'prepared_statement_cache_size': 0,
+        'prepared_statement_name_func': get_prepared_statement_name,
+    }
+
+
+def get_engine_options(
+        pooling_mode: str | None = None,
+        external_pool_size: int | None = None
+) -> dict:
+    """
+    Returns create_async_engine options for the pooling mode.
+
+    In pgbouncer mode the statement caches are disabled and every prepared
+    statement gets a unique name, because consecutive transactions may run
+    on different server connections. The local pool is replaced with
+    NullPool unless DB_EXTERNAL_POOL_SIZE asks for a small one.
+
+    Args:
+        pooling_mode (str | None): one of PoolingMode values, defaults to
+            settings.Database.pooling_mode
+        external_pool_size (int | None): local pool size in pgbouncer mode,
+            defaults to settings.Database.external_pool_size
+
+    Returns:
+        dict of keyword arguments for create_async_engine
+    """
+    pooling_mode = pooling_mode or Database.pooling_mode
+    if external_pool_size is None:
+        external_pool_size = Database.external_pool_size
+
+    if pooling_mode == PoolingMode.direct:
+        return dict(
+            poolclass=MonitoredQueuePool,
+            pool_size=Database.pool_size,
+            max_overflow=Database.max_overflow,
+            pool_recycle=Database.pool_recycle,
+            pool_pre_ping=Database.pool_pre_ping,
+            connect_args=get_direct_connect_args()
+        )
+
+    if pooling_mode == PoolingMode.pgbouncer:
+        options = dict(
+            pool_pre_ping=Database.pool_pre_ping,
+            connect_args=get_pgbouncer_connect_args()
+        )
+        if external_pool_size:
+            options.update(
+                poolclass=MonitoredQueuePool,
+                pool_size=external_pool_size,
+                max_overflow=0,
+                pool_recycle=Database.pool_recycle
+            )
+        else:
+            options.update(poolclass=NullPool)
+        return options
+
+    raise ValueError(f'Unknown database pooling mode: {pooling_mode}')
+
+
+def create_engine(url: str, pooling_mode: str | None = None) -> AsyncEngine:
+    return create_async_engine(url, **get_engine_options(pooling_mode))
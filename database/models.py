@@ -8,13 +8,19 @@ from database.mixins import TimestampMixin
 from settings import Database
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     DateTime,
     Enum,
     ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    LargeBinary,
     String,
     UUID,
-    UniqueConstraint
+    UniqueConstraint,
+    text
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.mutable import MutableDict
@@ -33,6 +39,17 @@ class LinkType(enum.Enum):
     video = 'video'
 
 
+class EmailOutboxStatus(enum.Enum):
+    pending = 'pending'
+    sent = 'sent'
+    failed = 'failed'
+
+
+class BulkEmailCampaignStatus(enum.Enum):
+    in_progress = 'in_progress'
+    completed = 'completed'
+
+
 class UserModel(TimestampMixin, Base):
     __table_args__ = (
         {
@@ -82,9 +99,19 @@ class UserModel(TimestampMixin, Base):
 
 class ConfirmationCodeModel(TimestampMixin, Base):
     __tablename__ = f'{Database.prefix}confirmation_codes'
-    __table_args__ = {
-        'comment': 'Represents a confirmation code in the system'
-    }
+    __table_args__ = (
+        Index('ix_confirmation_codes_code', 'code', unique=True),
+        Index('ix_confirmation_codes_expired_at', 'expired_at', 'id'),
+        Index(
+            'ix_confirmation_codes_used_created_at',
+            'created_at',
+            'id',
+            postgresql_where='used'
+        ),
+        {
+            'comment': 'Represents a confirmation code in the system'
+        }
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=True),
@@ -95,7 +122,7 @@ class ConfirmationCodeModel(TimestampMixin, Base):
     code: Mapped[str] = mapped_column(
         String(64),
         nullable=False,
-        comment="Confirmation code"
+        comment="SHA-256 hex digest of the confirmation code"
     )
     user_id: Mapped[str] = mapped_column(
         ForeignKey(f'{Database.prefix}users.id', ondelete='CASCADE'),
@@ -117,10 +144,30 @@ class ConfirmationCodeModel(TimestampMixin, Base):
 
 
 class SessionModel(TimestampMixin, Base):
-    __table_args__ = {
-        'extend_existing': True,
-        'comment': 'Represents a user session in the system'
-    }
+    __table_args__ = (
+        Index(
+            'ix_sessions_finished_created_at',
+            'created_at',
+            'id',
+            postgresql_where='is_closed OR NOT is_active'
+        ),
+        Index(
+            'ix_sessions_active_token_uuid',
+            'id',
+            'token_uuid',
+            postgresql_where='is_active AND NOT is_closed'
+        ),
+        Index(
+            'ix_sessions_active_last_seen_at',
+            'last_seen_at',
+            'id',
+            postgresql_where='is_active AND NOT is_closed'
+        ),
+        {
+            'extend_existing': True,
+            'comment': 'Represents a user session in the system'
+        }
+    )
     __tablename__ = f'{Database.prefix}sessions'
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=True),
@@ -151,13 +198,30 @@ class SessionModel(TimestampMixin, Base):
         default=False,
         comment="Indicates if the session is closed"
     )
-    auth_token_data: Mapped[dict] = mapped_column(
-        MutableDict.as_mutable(JSONB()), nullable=True,
-        comment="Data for the authentication token"
+    token_uuid: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Identifier of the current authentication token"
+    )
+    refresh_uuid: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Identifier of the current refresh token"
+    )
+    last_seen_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        server_default=text("timezone('utc', now())"),
+        comment="Last time the session was used, tracked with a delay"
+    )
+    auth_token_data: Mapped[dict | None] = mapped_column(
+        JSONB(), nullable=True,
+        comment="Payload of the authentication token, not stored anymore"
     )
-    refresh_token_data: Mapped[dict] = mapped_column(
-        MutableDict.as_mutable(JSONB()), nullable=True,
-        comment="Data for the refresh token"
+    refresh_token_data: Mapped[dict | None] = mapped_column(
+        JSONB(), nullable=True,
+        comment="Payload of the refresh token, not stored anymore"
     )
 
 
@@ -288,3 +352,257 @@ class CollectionModel(TimestampMixin, Base):
         secondary=f"{Database.prefix}link_collection_associations",
         back_populates="collections"
     )
+
+
+class EmailOutboxModel(TimestampMixin, Base):
+    __tablename__ = f'{Database.prefix}email_outbox'
+    __table_args__ = (
+        Index(
+            'ix_email_outbox_pending',
+            'next_attempt_at',
+            postgresql_where="status = 'pending'"
+        ),
+        {
+            'extend_existing': True,
+            'comment': 'Emails to be sent by the outbox dispatcher'
+        }
+    )
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        comment="Unique identifier for the email"
+    )
+    email: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        comment="Email address of the receiver"
+    )
+    subject: Mapped[str] = mapped_column(
+        String(256),
+        nullable=False,
+        comment="Subject of the email"
+    )
+    template_id: Mapped[str] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="Identifier of the email template"
+    )
+    template_data: Mapped[dict] = mapped_column(
+        JSONB(),
+        nullable=False,
+        default=dict,
+        comment="Parameters to be replaced in the template"
+    )
+    status: Mapped[EmailOutboxStatus] = mapped_column(
+        Enum(EmailOutboxStatus),
+        nullable=False,
+        default=EmailOutboxStatus.pending,
+        comment="Sending status of the email"
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer(),
+        nullable=False,
+        default=0,
+        comment="Number of sending attempts"
+    )
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        comment="Time after which the email may be claimed for sending"
+    )
+    last_error: Mapped[str] = mapped_column(
+        String(1024),
+        nullable=True,
+        comment="Error of the last failed attempt"
+    )
+    sent_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=True,
+        comment="Timestamp when the email was sent"
+    )
+
+
+class BulkEmailCampaignModel(TimestampMixin, Base):
+    __tablename__ = f'{Database.prefix}bulk_email_campaigns'
+    __table_args__ = {
+        'extend_existing': True,
+        'comment': 'Progress of bulk email sending to a cohort of users'
+    }
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        comment="Unique identifier for the campaign"
+    )
+    name: Mapped[str] = mapped_column(
+        String(128),
+        unique=True,
+        nullable=False,
+        comment="Unique name used to resume the campaign"
+    )
+    cohort: Mapped[str] = mapped_column(
+        String(32),
+        nullable=False,
+        comment="Name of the selected group of users"
+    )
+    template_id: Mapped[str] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="Identifier of the email template"
+    )
+    subject: Mapped[str] = mapped_column(
+        String(256),
+        nullable=False,
+        comment="Subject of the email"
+    )
+    status: Mapped[BulkEmailCampaignStatus] = mapped_column(
+        Enum(BulkEmailCampaignStatus),
+        nullable=False,
+        default=BulkEmailCampaignStatus.in_progress,
+        comment="Sending status of the campaign"
+    )
+    last_user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Identifier of the last processed user (checkpoint)"
+    )
+    recipients_count: Mapped[int] = mapped_column(
+        Integer(),
+        nullable=False,
+        default=0,
+        comment="Number of processed recipients"
+    )
+    provider_data: Mapped[dict] = mapped_column(
+        MutableDict.as_mutable(JSONB()),
+        nullable=False,
+        default=dict,
+        comment="Provider state, e.g. identifiers of created lists"
+    )
+    completed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=True,
+        comment="Timestamp when the campaign was completed"
+    )
+
+
+class RevocationModel(Base):
+    __tablename__ = f'{Database.prefix}revocations'
+    __table_args__ = (
+        Index('ix_revocations_expires_at', 'expires_at', 'id'),
+        {
+            'comment': 'Sessions and users whose access tokens are revoked'
+        }
+    )
+    id: Mapped[int] = mapped_column(
+        BigInteger(),
+        Identity(),
+        primary_key=True,
+        comment="Sequence number of the revocation"
+    )
+    session_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Session whose tokens are revoked"
+    )
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="User whose tokens of all sessions are revoked"
+    )
+    revoked_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=False,
+        comment="Tokens issued before this time are revoked"
+    )
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=False,
+        comment="Time when all revoked tokens have expired"
+    )
+
+
+class RateLimitModel(Base):
+    __tablename__ = f'{Database.prefix}rate_limits'
+    __table_args__ = (
+        Index('ix_rate_limits_expires_at', 'expires_at'),
+        {
+            # Counters are lost on a crash and not replicated, which only
+            # resets the limits, in exchange for writes without WAL
+            'prefixes': ['UNLOGGED'],
+            'comment': 'Requests counted by rate limits of all workers'
+        }
+    )
+    key: Mapped[str] = mapped_column(
+        String(320),
+        primary_key=True,
+        comment="Rate limit and the limited IP address, user or email"
+    )
+    window: Mapped[int] = mapped_column(
+        BigInteger(),
+        primary_key=True,
+        comment="Number of the fixed time window since the epoch"
+    )
+    hits: Mapped[int] = mapped_column(
+        Integer(),
+        nullable=False,
+        comment="Requests counted in the window"
+    )
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=False,
+        comment="Time after which the window is not used anymore"
+    )
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = f'{Database.prefix}idempotency_keys'
+    __table_args__ = (
+        Index('ix_idempotency_keys_expires_at', 'expires_at', 'id'),
+        {
+            'comment': 'Responses of requests sent with an Idempotency-Key'
+        }
+    )
+    id: Mapped[int] = mapped_column(
+        BigInteger(),
+        Identity(),
+        primary_key=True,
+        comment="Sequence number of the key"
+    )
+    key: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        unique=True,
+        comment="SHA-256 of the client, route and Idempotency-Key header"
+    )
+    fingerprint: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        comment="SHA-256 of the request query and body"
+    )
+    status_code: Mapped[int | None] = mapped_column(
+        Integer(),
+        nullable=True,
+        comment="Status of the stored response, null while in progress"
+    )
+    content_type: Mapped[str | None] = mapped_column(
+        String(255),
+        nullable=True,
+        comment="Content type of the stored response"
+    )
+    response_body: Mapped[bytes | None] = mapped_column(
+        LargeBinary(),
+        nullable=True,
+        comment="Body of the stored response"
+    )
+    locked_until: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(),
+        nullable=True,
+        comment="Time after which a request in progress is taken over"
+    )
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(),
+        nullable=False,
+        comment="Time after which the key may be used for a new request"
+    )
@@ -0,0 +1,79 @@
+import dataclasses
+import itertools
+import time
+
+from modules.common.metrics import metrics
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclasses.dataclass
+class PoolWaits:
+    """Connection checkouts of the pools over a period"""
+    count: int = 0
+    total: float = 0.0
+    timeouts: int = 0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class PoolMonitor:
+    """
+    Collects the time requests wait for a pool connection, including
+    opening a new one within max_overflow, and checkouts that have timed
+    out. Reported as `db.pool.wait` timings and `db.pool.timeouts`.
+
+    Checkouts still waiting are tracked too, as when the pool is exhausted
+    for long few of them finish to be observed.
+    """
+
+    def __init__(self):
+        self._waits = PoolWaits()
+        self._tickets = itertools.count()
+        self._waiting: dict[int, float] = {}
+
+    def start(self) -> int:
+        ticket = next(self._tickets)
+        self._waiting[ticket] = time.perf_counter()
+        return ticket
+
+    def get_longest_wait(self) -> float:
+        """Returns seconds the longest waiting checkout has waited so far"""
+        if not self._waiting:
+            return 0.0
+        return time.perf_counter() - min(self._waiting.values())
+
+    def observe(self, ticket: int, timed_out: bool = False) -> None:
+        seconds = time.perf_counter() - self._waiting.pop(ticket)
+        self._waits.count += 1
+        self._waits.total += seconds
+        metrics.observe('db.pool.wait', seconds)
+        if timed_out:
+            self._waits.timeouts += 1
+            metrics.increment('db.pool.timeouts')
+
+    def collect(self) -> PoolWaits:
+        """Returns the checkouts since the previous call"""
+        waits, self._waits = self._waits, PoolWaits()
+        return waits
+
+
+pool_monitor = PoolMonitor()
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool timing its checkouts in `pool_monitor`"""
+
+    def _do_get(self):
+        ticket = pool_monitor.start()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_monitor.observe(ticket, timed_out)
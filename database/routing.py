@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+import time
+
+from fastapi import Request
+
+from jose import JWTError, jwt
+
+from settings import AppConfig, Database, JWTConfig
+
+
+READ_ONLY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class PrimaryPin:
+    """
+    Pins users who have recently written to the primary database so their
+    reads are not routed to a replica that may lag behind.
+
+    The pin is carried by the client as a cookie holding its expiry time
+    signed along with the user id, so it holds on whichever worker serves
+    the following reads and cannot be forged or moved to another user.
+    Clients which do not keep cookies are not pinned.
+
+    Attributes:
+        pin_seconds (int): how long a user stays pinned to the primary
+            after a write
+    """
+
+    cookie = 'primary_until'
+
+    def __init__(self, secret_key: str, pin_seconds: int):
+        self.secret_key = secret_key.encode()
+        self.pin_seconds = pin_seconds
+
+    def sign(self, user_id: str, until: int) -> str:
+        return hmac.new(
+            self.secret_key, f'{user_id}:{until}'.encode(), hashlib.sha256
+        ).hexdigest()
+
+    def create(self, user_id: str) -> str:
+        """Returns the cookie value pinning the user from now on"""
+        until = int(time.time()) + self.pin_seconds
+        return f'{until}.{self.sign(user_id, until)}'
+
+    def is_pinned(self, user_id: str | None, value: str | None) -> bool:
+        if user_id is None or not value:
+            return False
+        until, _, signature = value.partition('.')
+        if not until.isdigit() or int(until) <= time.time():
+            return False
+        return hmac.compare_digest(
+            signature, self.sign(user_id, int(until))
+        )
+
+
+primary_pin = PrimaryPin(AppConfig.secret_key, Database.replica_pin_seconds)
+
+
+def get_request_user_id(request: Request) -> str | None:
+    """
+    Returns user_id from the bearer token of the request without verifying
+    its signature. Must only be used for routing decisions, never for
+    authentication.
+    """
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    try:
+        claims = jwt.get_unverified_claims(token)
+    except JWTError:
+        return None
+    user_info = claims.get(JWTConfig.user_property)
+    if not isinstance(user_info, dict):
+        return None
+    return user_info.get('user_id')
@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+
+from database.models import (
+    CollectionModel, LinkModel, SessionModel, UserModel
+)
+
+from logger import logger
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.pool import NullPool
+
+
+def get_auth_queries():
+    """Queries shaped like the authentication checks done on every request"""
+    return [
+        select(UserModel.id).where(
+            and_(
+                UserModel.id == uuid.uuid4(),
+                UserModel.email_verified.is_(True)
+            )
+        ),
+        select(SessionModel.id).where(
+            and_(
+                SessionModel.id == uuid.uuid4(),
+                SessionModel.is_active,
+                ~SessionModel.is_closed,
+                SessionModel.token_uuid == uuid.uuid4()
+            )
+        ),
+    ]
+
+
+def get_hot_queries():
+    """Authentication checks and lookups of the most used endpoints"""
+    return [
+        *get_auth_queries(),
+        select(LinkModel).where(
+            and_(
+                LinkModel.id == uuid.uuid4(),
+                LinkModel.user_id == uuid.uuid4()
+            )
+        ),
+        select(CollectionModel).where(
+            and_(
+                CollectionModel.id == uuid.uuid4(),
+                CollectionModel.user_id == uuid.uuid4()
+            )
+        ),
+    ]
+
+
+async def prime_connection(connection: AsyncConnection) -> None:
+    """Runs hot queries once so their statements get cached"""
+    for query in get_hot_queries():
+        await connection.execute(query)
+    await connection.rollback()
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int) -> int:
+    """
+    Opens up to `connections` pool connections at the same time and primes
+    statement caches on each of them.
+
+    Connections are held until all of them are opened, otherwise the pool
+    would hand the same connection to every task. Engines without a local
+    pool (pgbouncer mode with NullPool) are skipped.
+
+    Args:
+        engine (AsyncEngine): engine which pool is warmed up
+        connections (int): number of connections to open, limited by the
+            pool size
+
+    Returns:
+        number of warmed up connections
+    """
+    pool = engine.pool
+    if isinstance(pool, NullPool):
+        return 0
+    connections = min(connections, pool.size())
+    if connections <= 0:
+        return 0
+
+    barrier = asyncio.Barrier(connections)
+
+    async def warm_up_connection():
+        async with engine.connect() as connection:
+            try:
+                await prime_connection(connection)
+                await barrier.wait()
+            except BaseException:
+                await barrier.abort()
+                raise
+
+    await asyncio.gather(
+        *(warm_up_connection() for _ in range(connections))
+    )
+    logger.info(f'Warmed up {connections} connections of {engine.url!r}')
+    return connections
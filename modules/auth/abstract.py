@@ -1,4 +1,5 @@
 import http
+import uuid
 from abc import ABC
 
 from database import Session
@@ -11,10 +12,15 @@ from dotenv import load_dotenv
 from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from jose import JWTError, jwt
+from jose import JWTError
 
 from modules.auth.helpers import get_session_by_id
+from modules.auth.jwt.keys import key_ring
 from modules.auth.schemes import EmailLoginScheme
+from modules.invalidation.bus import Channel, invalidation_bus
+
+from services.revocation import RevocationService
+from services.session import SessionService
 
 from settings import JWTConfig
 
@@ -90,15 +96,13 @@ class JWTBearerAbsract(HTTPBearer):
             dict[str, str | dict[str, str]] | None
     ):
         """
-        Decode JWT by algorithm and secret key.
+        Decode JWT by the configured algorithm and key.
 
         return: dict or None
             JWT payload with user's data
         """
         try:
-            payload = jwt.decode(
-                token, JWTConfig.secret_key, algorithms=[JWTConfig.algorithm]
-            )
+            payload = key_ring.decode(token)
         except JWTError:
             payload = None
         return payload
@@ -127,7 +131,7 @@ class JWTBearerAbsract(HTTPBearer):
                     detail='Session is inactive. Refresh it'
                 )
             elif (
-                    current_session.auth_token_data.get('token_uuid')
+                    str(current_session.token_uuid)
                     != payload.get('token_uuid')
             ):
                 raise HTTPException(
@@ -171,7 +175,9 @@ class AuthAbstract(ABC):
     async def get_tokens(
             cls,
             auth_session: SessionModel,
-            old_payload: dict[str, str] | None = None
+            old_payload: dict[str, str] | None = None,
+            db_session: AsyncSession | None = None,
+            loaded: tuple = ()
     ):
         """
         Getting an authorization token and a refresh token.
@@ -181,6 +187,9 @@ class AuthAbstract(ABC):
                 to the current authorization.
             old_payload(dict or None): jwt payload
                 if the token existed earlier.
+            db_session (AsyncSession or None): database connection used to
+                load payload records which are not in `loaded`.
+            loaded (tuple): already loaded records of the payload fields.
 
         Returns:
             tuple(str, str), the authorization token and the refresh token.
@@ -188,7 +197,9 @@ class AuthAbstract(ABC):
 
         token_gen = cls.JWT(
             auth_session,
-            old_payload=old_payload
+            old_payload=old_payload,
+            db_session=db_session,
+            loaded=loaded
         )
 
         await token_gen.generate_payload()
@@ -235,27 +246,30 @@ class AuthAbstract(ABC):
                     detail='Session not found by ID'
                 )
         else:
+            # The identifier is assigned here rather than on insert, so the
+            # session is inserted once, together with its tokens
             auth_session = cls.session_model(
+                id=uuid.uuid4(),
                 user_id=user_id,
                 ip=ip
             )
-            db_session.add(auth_session)
-            await db_session.commit()
-            await db_session.refresh(auth_session)
 
         (
             auth_token,
             refresh_token,
             auth_payload,
             refresh_payload,
-        ) = await cls.get_tokens(auth_session=auth_session)
+        ) = await cls.get_tokens(
+            auth_session=auth_session,
+            db_session=db_session,
+            loaded=(user,)
+        )
 
-        auth_session.auth_token_data = auth_payload
-        auth_session.refresh_token_data = refresh_payload
+        auth_session.token_uuid = auth_payload['token_uuid']
+        auth_session.refresh_uuid = refresh_payload['refresh_uuid']
 
         db_session.add(auth_session)
         await db_session.commit()
-        await db_session.refresh(auth_session)
 
         return {
             'auth_payload': auth_payload,
@@ -272,56 +286,65 @@ class AuthAbstract(ABC):
     ):
         """Refresh tokens by user refresh_token.
 
+        New tokens carry the claims of the presented refresh token. The
+        refresh token is checked and replaced by one compare-and-swap
+        statement, so it can be used once only. The session is read only
+        to explain a failed refresh.
+
         Returns: tuple(str, str)
             auth_token, refresh_token - new tokens for authorization
         """
+        session_id = jwt_payload[JWTConfig.user_property].get('session_id')
+        try:
+            refresh_uuid = uuid.UUID(jwt_payload.get('refresh_uuid'))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=http.HTTPStatus.UNAUTHORIZED,
+                detail='Invalid refresh token'
+            )
+        old_payload = {
+            key: value for key, value in jwt_payload.items()
+            if key != 'refresh_uuid'
+        }
+        (
+            auth_token,
+            refresh_token,
+            auth_payload,
+            refresh_payload,
+        ) = await cls.get_tokens(auth_session=None, old_payload=old_payload)
+
+        if await SessionService.rotate_tokens(
+            session_id=session_id,
+            refresh_uuid=refresh_uuid,
+            new_token_uuid=auth_payload['token_uuid'],
+            new_refresh_uuid=refresh_payload['refresh_uuid'],
+            db_session=db_session
+        ):
+            return auth_token, refresh_token
 
         current_session = await get_session_by_id(
-            session_id=jwt_payload[JWTConfig.user_property].get('session_id'),
+            session_id=session_id,
             db_session=db_session
         )
-
-        if current_session:
-            if current_session.is_active:
-                if (
-                        current_session.refresh_token_data.get('refresh_uuid')
-                        != jwt_payload.get('refresh_uuid')
-                ):
-                    raise HTTPException(
-                        status_code=http.HTTPStatus.UNAUTHORIZED,
-                        detail='Invalid refresh token '
-                    )
-
-                (
-                    auth_token,
-                    refresh_token,
-                    auth_payload,
-                    refresh_payload,
-                ) = await cls.get_tokens(
-                    auth_session=current_session.id,
-                    old_payload=current_session.auth_token_data
-                )
-
-                current_session.auth_token_data = auth_payload
-                current_session.refresh_token_data = refresh_payload
-
-                db_session.add(current_session)
-                await db_session.commit()
-                await db_session.refresh(current_session)
-
-                return auth_token, refresh_token
-
-            msg = 'Session not active'
+        if not current_session:
+            raise HTTPException(
+                status_code=http.HTTPStatus.BAD_REQUEST,
+                detail='Session does not exist'
+            )
+        if not current_session.is_active:
             raise HTTPException(
                 status_code=http.HTTPStatus.UNAUTHORIZED,
-                detail=msg
+                detail='Session not active'
             )
-        else:
-            msg = 'Session does not exist'
+        if current_session.is_closed:
             raise HTTPException(
-                status_code=http.HTTPStatus.BAD_REQUEST,
-                detail=msg
+                status_code=http.HTTPStatus.UNAUTHORIZED,
+                detail='Session was closed'
             )
+        raise HTTPException(
+            status_code=http.HTTPStatus.UNAUTHORIZED,
+            detail='Invalid refresh token'
+        )
 
     @classmethod
     async def logout_user(
@@ -345,7 +368,9 @@ class AuthAbstract(ABC):
         current_session.is_active = False
 
         db_session.add(current_session)
+        RevocationService.revoke(db_session, session_id=session_id)
         await db_session.commit()
+        invalidation_bus.publish(Channel.SESSIONS, session_id)
         await db_session.refresh(current_session)
 
     @staticmethod
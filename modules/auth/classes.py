@@ -1,6 +1,8 @@
 import http
 
-from database import get_session
+from database import (
+    Session, get_read_session, get_session, is_primary_session
+)
 from database.models import (
     SessionModel, UserModel,
 )
@@ -19,12 +21,16 @@ from modules.auth.abstract import (
     AuthAbstract,
 )
 from modules.auth.jwt import JWTUser
+from modules.auth.jwt.keys import key_ring
 from modules.auth.schemes import EmailLoginScheme, UserInfo, UserJwtPayload
 from modules.auth.validators import validate_user
+from modules.invalidation.bus import Channel, invalidation_bus
+from modules.invalidation.cache import LocalCache
 
 from pydantic import ValidationError
 
-from services.session import SessionService
+from services.revocation import revocation_filter
+from services.session import SessionService, session_activity
 from services.user import UserService
 
 from settings import JWTConfig
@@ -35,6 +41,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 load_dotenv()
 
+# Token identifiers of verified sessions by session id, tagged by user id
+session_cache = LocalCache('sessions', invalidation_bus).attach(
+    Channel.SESSIONS, Channel.USERS
+)
+
 
 class AuthUser(AuthAbstract):
     JWT = JWTUser
@@ -104,8 +115,35 @@ class JWTBearer(HTTPBearer):
 
         payload = self.get_payload(token)
 
+        if not self.is_trusted(payload):
+            if not await self.verify_user_session(payload, db_session):
+                raise HTTPException(
+                    status_code=http.HTTPStatus.BAD_REQUEST,
+                    detail='Token verification error'
+                )
+
+        session_activity.touch(payload.user_info.session_id)
+        return payload.user_info
+
+    async def verify_user_session(
+            self,
+            payload: UserJwtPayload,
+            db_session: AsyncSession
+    ) -> bool:
+        """
+        Checks that the user is verified, the session is active and not
+        closed and the token is its current auth token. With
+        AUTH_SESSION_CACHE successful checks are cached, but only ones read
+        from the primary, as a lagging replica may return a session that
+        has been invalidated already.
+        """
+        session_id = str(payload.user_info.session_id)
+        if JWTConfig.session_cache:
+            if session_cache.get(session_id) == payload.token_uuid:
+                return True
+            generation = session_cache.generation
         query = (
-            select(UserModel)
+            select(UserModel.id)
             .where(
                 and_(
                     UserModel.id == payload.user_info.user_id,
@@ -114,41 +152,63 @@ class JWTBearer(HTTPBearer):
             )
         )
         result = await db_session.execute(query)
-        db_user = result.scalars().one_or_none()
-
-        if not db_user:
-            raise HTTPException(
-                status_code=http.HTTPStatus.BAD_REQUEST,
-                detail='Token verification error'
-            )
+        if result.scalar_one_or_none() is None:
+            return False
 
+        # An index-only scan of ix_sessions_active_token_uuid, as the flags
+        # are compared like in its predicate
         query = (
-            select(SessionModel)
+            select(SessionModel.id)
             .where(
                 and_(
                     SessionModel.id == payload.user_info.session_id,
-                    SessionModel.is_active.is_(True)
+                    SessionModel.is_active,
+                    ~SessionModel.is_closed,
+                    SessionModel.token_uuid == payload.token_uuid
                 )
             )
         )
         result = await db_session.execute(query)
-        db_session = result.scalars().one_or_none()
+        if result.scalar_one_or_none() is None:
+            return False
+        if JWTConfig.session_cache and is_primary_session(db_session):
+            session_cache.put(
+                session_id,
+                payload.token_uuid,
+                generation,
+                tags=(str(payload.user_info.user_id),)
+            )
+        return True
 
-        if not db_session:
+    @staticmethod
+    def is_trusted(payload: UserJwtPayload) -> bool:
+        """
+        Checks a short-lived token in the stateless mode without the
+        database. Its signature and expiration are already verified, so
+        only revocation is checked, against the in-memory filter. Tokens
+        without expiration or a stale filter are checked in the database.
+        """
+        if not (
+                JWTConfig.stateless
+                and payload.exp
+                and payload.iat
+                and revocation_filter.is_fresh()
+        ):
+            return False
+        if revocation_filter.is_revoked(
+                payload.user_info.session_id,
+                payload.user_info.user_id,
+                payload.iat
+        ):
             raise HTTPException(
-                status_code=http.HTTPStatus.BAD_REQUEST,
-                detail='Token verification error'
+                status_code=http.HTTPStatus.UNAUTHORIZED,
+                detail='Token is revoked'
             )
-
-        return payload.user_info
+        return True
 
     def validate_token_via_secret(self, token: str) -> None:
         try:
-            jwt.decode(
-                token=token,
-                key=JWTConfig.secret_key,
-                algorithms=[JWTConfig.algorithm]
-            )
+            key_ring.decode(token)
         except JWTError as e:
             logger.exception(f'Token verification error: {e}')
             raise HTTPException(
@@ -158,11 +218,7 @@ class JWTBearer(HTTPBearer):
 
     def get_payload(self, token: str) -> UserJwtPayload:
         try:
-            payload_dict = jwt.decode(
-                token=token,
-                key='',
-                options={'verify_signature': False}
-            )
+            payload_dict = jwt.get_unverified_claims(token)
         except (ValidationError, JWTError):
             raise HTTPException(
                 status_code=http.HTTPStatus.INTERNAL_SERVER_ERROR,
@@ -172,5 +228,55 @@ class JWTBearer(HTTPBearer):
         return UserJwtPayload(
             user_info=UserInfo(**user_info),
             token_uuid=payload_dict.get('token_uuid'),
-            scope=payload_dict.get('scope')
+            scope=payload_dict.get('scope'),
+            iat=payload_dict.get('iat'),
+            exp=payload_dict.get('exp')
+        )
+
+
+class ReplicaJWTBearer(JWTBearer):
+    """
+    JWTBearer for read-only endpoints. Session checks run on the read
+    replica only while the revocation filter, read from the primary, tells
+    that the session has not been revoked since the token was issued, as
+    the replica may still show a closed session as active. Otherwise, and
+    for sessions that have not been replicated yet (e.g. right after login
+    or token refresh), they run on the primary.
+    """
+
+    async def __call__(
+            self,
+            request: Request,
+            db_session: AsyncSession = Depends(get_read_session),
+    ) -> UserInfo | None:
+        return await super().__call__(request, db_session)
+
+    @staticmethod
+    def is_unrevoked(payload: UserJwtPayload) -> bool:
+        """Whether the token is known not to be revoked on the primary"""
+        return bool(
+            payload.exp
+            and payload.iat
+            and revocation_filter.is_fresh()
+            and not revocation_filter.is_revoked(
+                payload.user_info.session_id,
+                payload.user_info.user_id,
+                payload.iat
+            )
         )
+
+    async def verify_user_session(
+            self,
+            payload: UserJwtPayload,
+            db_session: AsyncSession
+    ) -> bool:
+        if is_primary_session(db_session):
+            return await super().verify_user_session(payload, db_session)
+        if self.is_unrevoked(payload) and await super().verify_user_session(
+                payload, db_session
+        ):
+            return True
+        async with Session() as primary_session:
+            return await super().verify_user_session(
+                payload, primary_session
+            )
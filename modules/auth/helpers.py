@@ -1,12 +1,14 @@
 from database.models import SessionModel
 
-from jose import JWTError, jwt
+from jose import JWTError
+
+from modules.auth.jwt.keys import key_ring
 
 from passlib.context import CryptContext
 
 from services.session import SessionService
 
-from settings import AppConfig, JWTConfig
+from settings import AppConfig
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -21,9 +23,7 @@ async def get_password_hash(password: str) -> str:
 
 async def get_data_from_token(token: str) -> dict[str, str]:
     try:
-        decoded_payload = jwt.decode(
-            token, JWTConfig.secret_key, algorithms=[JWTConfig.algorithm]
-        )
+        decoded_payload = key_ring.decode(token)
         return decoded_payload
     except JWTError:
         raise JWTError
@@ -1,25 +1,16 @@
-import http
+import time
 import uuid
 from abc import ABC
 
-from database import Session
-
-from fastapi import HTTPException
-
-from jose import jwt
-
 from modules.auth.jwt.classes import (
     JWTArgsEditableField,
-    JWTArgsField,
     JWTModelEditableField,
-    JWTModelField,
 )
+from modules.auth.jwt.keys import key_ring
+from modules.auth.jwt.resolver import PayloadResolver
 
 from settings import JWTConfig
 
-from sqlalchemy import select
-from sqlalchemy.exc import DatabaseError
-
 
 JWT_PAYLOAD = {}
 
@@ -31,6 +22,10 @@ class JWT(ABC):
         session (Session): the current session object
         payload (dict): payload from the previous token, if the data has not
             changed
+        db_session (AsyncSession): database session of the caller, used to
+            load records of the payload fields
+        loaded (tuple): already loaded records of the payload fields, e.g.
+            the user logging in
     """
 
     jwt_payload_structure: dict = JWT_PAYLOAD
@@ -41,6 +36,8 @@ class JWT(ABC):
     def __init__(self, auth_session, **kwargs):
         self.session = auth_session
         self.payload = kwargs.get('old_payload')
+        self.db_session = kwargs.get('db_session')
+        self.loaded = kwargs.get('loaded', ())
 
     async def generate_payload(self) -> None:
         """Generate the filled JWT payload.
@@ -52,45 +49,25 @@ class JWT(ABC):
         if self.payload:
             payload = self.payload
         else:
+            resolver = PayloadResolver(self.db_session, self.loaded)
+            values = await resolver.resolve(
+                self.jwt_payload_structure, self.session
+            )
             payload = dict()
-            payload[user_property] = {}
-            attrs = self.jwt_payload_structure.items()
-            for attr, val in attrs:
-                if isinstance(val, (JWTModelField, JWTArgsField)):
-                    await val.set_value(self.session)
-                payload[user_property][attr] = str(val.value)
-        await self.revive_session(payload[user_property].get('session_id'))
+            payload[user_property] = {
+                attr: str(value) for attr, value in values.items()
+            }
         payload['scope'] = self.scope
         self.payload = payload
 
-    async def revive_session(self, payload_session_id) -> None:
-        """Set expired session in not expired state.
-
-        Args:
-            payload_session_id (str): id of the session to revive.
+    @staticmethod
+    def encode(payload: dict) -> str:
+        """Encode the payload by the configured algorithm and key.
 
         Returns:
-            None:
+            str: a token.
         """
-        try:
-            async with Session() as session:
-                user_session = await session.execute(
-                    select(self.SessionModel).where(
-                        self.SessionModel.id == payload_session_id
-                    )
-                )
-                user_session = user_session.scalars().first()
-                user_session.is_expired = False
-                session.add(user_session)
-                await session.commit()
-                await session.refresh(user_session)
-
-        except DatabaseError:
-            session.rollback()
-            raise HTTPException(
-                status_code=http.HTTPStatus.BAD_REQUEST,
-                detail='The session has expired and cannot be revived'
-            )
+        return key_ring.encode(payload)
 
     async def generate_auth_token(self) -> tuple[str, dict[str, str]]:
         """Generate an auth token.
@@ -100,10 +77,14 @@ class JWT(ABC):
         """
         to_encode = self.payload.copy()
         to_encode.update({'token_uuid': str(uuid.uuid4())})
-        encoded_jwt = jwt.encode(
-            to_encode, JWTConfig.secret_key, algorithm=JWTConfig.algorithm
-        )
-        return encoded_jwt, to_encode
+        if JWTConfig.stateless:
+            # Short-lived, so that it may be trusted without the session
+            issued_at = round(time.time(), 3)
+            to_encode.update({
+                'iat': issued_at,
+                'exp': int(issued_at) + JWTConfig.stateless_token_minutes * 60
+            })
+        return self.encode(to_encode), to_encode
 
     async def generate_refresh_token(self) -> tuple[str, dict[str, str]]:
         """Generate a refresh token.
@@ -113,10 +94,7 @@ class JWT(ABC):
         """
         to_encode = self.payload.copy()
         to_encode.update({'refresh_uuid': str(uuid.uuid4())})
-        encoded_jwt = jwt.encode(
-            to_encode, JWTConfig.secret_key, algorithm=JWTConfig.algorithm
-        )
-        return encoded_jwt, to_encode
+        return self.encode(to_encode), to_encode
 
     @classmethod
     def get_jwt_editable_models(cls) -> dict[object, list[list[str]]]:
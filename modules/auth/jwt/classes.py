@@ -1,25 +1,22 @@
 """
 A JWT class fields for the dynamically filling the JWT payload.
 """
-from abc import ABC, abstractmethod
+from abc import ABC
 from typing import Any
 
-from database import Session
-
 from modules.auth.jwt.dataclasses import EditableField
 from modules.auth.jwt.mixins import ConstMixin, EditableMixin
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Load, joinedload
 
 
 class JWTAbstractField(ABC):
-    """Abstract base class for JWT fields."""
+    """
+    Abstract base class for JWT fields.
 
-    @property
-    @abstractmethod
-    def value(self, *args, **kwargs):
-        """General getter of the field value."""
+    Fields are shared by all tokens of a JWT class, so they describe where
+    a value comes from and never keep the value of a particular token.
+    """
 
 
 class JWTArgsField(JWTAbstractField):
@@ -33,19 +30,10 @@ class JWTArgsField(JWTAbstractField):
     def __init__(self, session_field_name, field):
         self.session_field_name = session_field_name
         self.field = field
-        self._value = None
-
-    @property
-    def value(self) -> Any:
-        """
-        Returns the value of the field of the passed object
-        (the value of the corresponding field for JWT).
-        """
-        return self._value
 
-    async def set_value(self, obj: Any) -> None:
-        """General getter of the field value."""
-        self._value = getattr(obj, self.field)
+    def get_value(self, obj: Any) -> Any:
+        """Returns the value of the field of the passed object."""
+        return getattr(obj, self.field)
 
 
 class JWTArgsConstField(ConstMixin, JWTArgsField):
@@ -72,6 +60,9 @@ class JWTModelField(JWTAbstractField):
     """
     Parent class for a JWT field created from a model.
 
+    Its value is resolved by PayloadResolver together with the other
+    fields of the payload.
+
     Attributes:
         model (db.Model): current model;
         session_field_name (str): name of the Session field
@@ -99,79 +90,45 @@ class JWTModelField(JWTAbstractField):
         self.session_field_name = session_field_name
         self.field_in = field_in
         self.field_out = field_out
-        self._value = None
         self.multiple = multiple
         self.user_property = user_property
         self.relation_field = relation_field
 
-    @property
-    def value(self) -> Any:
+    def get_key(self, session_obj) -> Any:
         """
-        Returns the value of the field of the passed object
-        (the value of the corresponding field for JWT).
+        Returns the value of `field_in` of the records of the field, taken
+        from the related field of the auth session.
         """
-        return self._value
+        return getattr(session_obj, self.session_field_name)
 
-    async def set_value(self, session_obj) -> None:
+    def get_loader(self) -> Load | None:
         """
-        Setter of the field value.
-        Field value obtains from the specified field of the model object
-        associated with a specific session.
-
-        Args:
-            session_obj(Session): object of specific auth session.
+        Returns the loader option of the relationship holding the value, so
+        that it is loaded by the same query as the record.
         """
-        session_related_obj_id = await self.get_value(
-            session_obj, self.session_field_name
-        )
+        if not self.user_property:
+            return None
+        return joinedload(getattr(self.model, self.field_out))
 
-        field_in_value = await self.get_value(self.model, self.field_in)
+    def get_loaded_fields(self) -> tuple[str, ...]:
+        """Returns attributes a record needs loaded to give the value."""
+        return (self.field_in, self.field_out)
 
-        async with Session() as session:
-            res = await session.execute(
-                select(self.model).filter(
-                    field_in_value == session_related_obj_id
-                )
-            )
-            model_object = res
+    def get_value(self, model_objects: list) -> Any:
+        """
+        Returns the value of the field from the records found by its key.
 
+        Args:
+            model_objects (list): records of the model found by the key.
+        """
         if self.multiple:
-            self._value = [
-                await self.get_value(i, self.field_out)
-                for i in model_object.all()
-            ]
-        else:
-            model_first = model_object.scalars().first()
-            if model_first:
-                if self.user_property:
-                    async with Session() as session:
-                        relationship_model = await self.get_value(
-                            self.model, self.field_out)
-
-                        result = await session.execute(
-                            select(self.model)
-                            .filter(
-                                self.model.id == model_first.id
-                            )
-                            .options(
-                                selectinload(relationship_model))
-                        )
-
-                        user = result.scalars().first()
-                        rel_object = await self.get_value(
-                            user, self.field_out
-                        )
-                        self._value = await self.get_value(
-                            rel_object, self.relation_field
-                        )
-                else:
-                    self._value = await self.get_value(
-                        model_first, self.field_out)
-
-    @staticmethod
-    async def get_value(obj, field) -> Any:
-        """Get the value from the specified field."""
-        return getattr(obj, field)
+            return [getattr(obj, self.field_out) for obj in model_objects]
+        if not model_objects:
+            return None
+        value = getattr(model_objects[0], self.field_out)
+        if self.user_property:
+            value = getattr(value, self.relation_field)
+        return value
 
 
 class JWTModelConstField(ConstMixin, JWTModelField):
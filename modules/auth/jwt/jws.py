@@ -0,0 +1,270 @@
+"""
+Lightweight signing and verification of asymmetrically signed JWTs.
+
+Depends on `cryptography` only, so other internal services or an
+authenticating sidecar of the proxy tier can verify tokens of the
+application against its JWKS (GET /.well-known/jwks.json) and reject
+forged and expired ones without calling it.
+"""
+import base64
+import collections
+import hashlib
+import json
+import time
+from typing import Any
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature, encode_dss_signature
+)
+
+
+ALGORITHMS = ('EdDSA', 'ES256')
+ES256_NUMBER_SIZE = 32
+DEFAULT_CACHE_SIZE = 10000
+
+PrivateKey = ed25519.Ed25519PrivateKey | ec.EllipticCurvePrivateKey
+PublicKey = ed25519.Ed25519PublicKey | ec.EllipticCurvePublicKey
+
+
+class InvalidTokenError(ValueError):
+    """Raised for malformed, forged, expired or unknown-key tokens"""
+
+
+def b64_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def b64_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def encode_number(number: int) -> str:
+    return b64_encode(number.to_bytes(ES256_NUMBER_SIZE, 'big'))
+
+
+def decode_number(data: str) -> int:
+    return int.from_bytes(b64_decode(data), 'big')
+
+
+def dump_json(data: dict) -> bytes:
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def get_thumbprint(jwk: dict) -> str:
+    """Returns the RFC 7638 thumbprint of the key, used as its kid"""
+    members = ('crv', 'kty', 'x', 'y') if jwk['kty'] == 'EC' else (
+        'crv', 'kty', 'x'
+    )
+    data = json.dumps(
+        {member: jwk[member] for member in members},
+        separators=(',', ':'),
+        sort_keys=True
+    )
+    return b64_encode(hashlib.sha256(data.encode()).digest())
+
+
+def generate_jwk(algorithm: str) -> dict:
+    """Generates a private JWK of the algorithm, identified by thumbprint"""
+    if algorithm == 'EdDSA':
+        key = ed25519.Ed25519PrivateKey.generate()
+        public_bytes = key.public_key().public_bytes_raw()
+        jwk = {
+            'kty': 'OKP',
+            'crv': 'Ed25519',
+            'x': b64_encode(public_bytes),
+            'd': b64_encode(key.private_bytes_raw()),
+        }
+    elif algorithm == 'ES256':
+        key = ec.generate_private_key(ec.SECP256R1())
+        numbers = key.private_numbers()
+        jwk = {
+            'kty': 'EC',
+            'crv': 'P-256',
+            'x': encode_number(numbers.public_numbers.x),
+            'y': encode_number(numbers.public_numbers.y),
+            'd': encode_number(numbers.private_value),
+        }
+    else:
+        raise ValueError(f'Unsupported algorithm {algorithm}')
+    return {
+        **jwk,
+        'kid': get_thumbprint(jwk),
+        'alg': algorithm,
+        'use': 'sig',
+    }
+
+
+def get_public_jwk(jwk: dict) -> dict:
+    return {key: value for key, value in jwk.items() if key != 'd'}
+
+
+def load_public_key(jwk: dict) -> PublicKey:
+    if jwk['kty'] == 'OKP' and jwk['crv'] == 'Ed25519':
+        return ed25519.Ed25519PublicKey.from_public_bytes(
+            b64_decode(jwk['x'])
+        )
+    if jwk['kty'] == 'EC' and jwk['crv'] == 'P-256':
+        return ec.EllipticCurvePublicNumbers(
+            decode_number(jwk['x']), decode_number(jwk['y']), ec.SECP256R1()
+        ).public_key()
+    raise ValueError(f'Unsupported key {jwk.get("kid")}')
+
+
+def load_private_key(jwk: dict) -> PrivateKey:
+    if jwk['kty'] == 'OKP' and jwk['crv'] == 'Ed25519':
+        return ed25519.Ed25519PrivateKey.from_private_bytes(
+            b64_decode(jwk['d'])
+        )
+    if jwk['kty'] == 'EC' and jwk['crv'] == 'P-256':
+        return ec.derive_private_key(decode_number(jwk['d']), ec.SECP256R1())
+    raise ValueError(f'Unsupported key {jwk.get("kid")}')
+
+
+def sign(payload: dict, key: PrivateKey, kid: str, algorithm: str) -> str:
+    header = {'alg': algorithm, 'typ': 'JWT', 'kid': kid}
+    signing_input = (
+        f'{b64_encode(dump_json(header))}.{b64_encode(dump_json(payload))}'
+    ).encode()
+    if algorithm == 'EdDSA':
+        signature = key.sign(signing_input)
+    else:
+        # JWS uses raw R || S rather than the DER encoding
+        r, s = decode_dss_signature(
+            key.sign(signing_input, ec.ECDSA(hashes.SHA256()))
+        )
+        signature = (
+            r.to_bytes(ES256_NUMBER_SIZE, 'big')
+            + s.to_bytes(ES256_NUMBER_SIZE, 'big')
+        )
+    return f'{signing_input.decode()}.{b64_encode(signature)}'
+
+
+def verify_signature(
+        key: PublicKey,
+        algorithm: str,
+        signing_input: bytes,
+        signature: bytes
+) -> None:
+    try:
+        if algorithm == 'EdDSA':
+            key.verify(signature, signing_input)
+            return
+        if len(signature) != 2 * ES256_NUMBER_SIZE:
+            raise InvalidTokenError('Invalid signature')
+        der_signature = encode_dss_signature(
+            int.from_bytes(signature[:ES256_NUMBER_SIZE], 'big'),
+            int.from_bytes(signature[ES256_NUMBER_SIZE:], 'big')
+        )
+        key.verify(der_signature, signing_input, ec.ECDSA(hashes.SHA256()))
+    except InvalidSignature:
+        raise InvalidTokenError('Invalid signature')
+
+
+class JWKSVerifier:
+    """
+    Verifies tokens signed by any key of a JWKS.
+
+    Tokens whose signature has been verified are remembered per kid, up to
+    `cache_size` most recently used ones of every key, so a token
+    presented again only has its claims decoded and expiration checked.
+    Results of a key are dropped when it leaves the JWKS on `update`.
+
+    Attributes:
+        hits (int): verifications answered from the cache
+        misses (int): verifications which checked the signature
+    """
+
+    def __init__(
+            self,
+            jwks: dict,
+            cache_size: int = DEFAULT_CACHE_SIZE,
+            leeway: float = 0
+    ):
+        self.cache_size = cache_size
+        self.leeway = leeway
+        self.hits = 0
+        self.misses = 0
+        self._jwks: dict[str, dict] = {}
+        self._keys: dict[str, tuple[str, PublicKey]] = {}
+        self._verified: dict[str, collections.OrderedDict] = {}
+        self.update(jwks)
+
+    def update(self, jwks: dict) -> None:
+        """Replaces the keys, e.g. with a JWKS fetched again after rotation"""
+        public_jwks = {
+            jwk['kid']: get_public_jwk(jwk) for jwk in jwks.get('keys', [])
+            if jwk.get('alg') in ALGORITHMS and jwk.get('kid')
+        }
+        self._keys = {
+            kid: (jwk['alg'], load_public_key(jwk))
+            for kid, jwk in public_jwks.items()
+        }
+        self._verified = {
+            kid: (
+                self._verified[kid]
+                if kid in self._verified and self._jwks.get(kid) == jwk
+                else collections.OrderedDict()
+            )
+            for kid, jwk in public_jwks.items()
+        }
+        self._jwks = public_jwks
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """
+        Returns the claims of the token.
+
+        Raises:
+            InvalidTokenError: if the token is malformed, signed by an
+                unknown key or not by the key, or expired
+        """
+        try:
+            header_data, payload_data, signature_data = token.split('.')
+            header = json.loads(b64_decode(header_data))
+        except (ValueError, TypeError):
+            raise InvalidTokenError('Malformed token')
+        if not isinstance(header, dict):
+            raise InvalidTokenError('Malformed token')
+        kid = header.get('kid')
+        if kid not in self._keys:
+            raise InvalidTokenError('Unknown key')
+        algorithm, key = self._keys[kid]
+        if header.get('alg') != algorithm:
+            raise InvalidTokenError('Unexpected algorithm')
+
+        verified = self._verified[kid]
+        if token in verified:
+            verified.move_to_end(token)
+            self.hits += 1
+        else:
+            try:
+                signature = b64_decode(signature_data)
+            except ValueError:
+                raise InvalidTokenError('Malformed token')
+            verify_signature(
+                key,
+                algorithm,
+                f'{header_data}.{payload_data}'.encode(),
+                signature
+            )
+            self.misses += 1
+            verified[token] = None
+            if len(verified) > self.cache_size:
+                verified.popitem(last=False)
+
+        try:
+            claims = json.loads(b64_decode(payload_data))
+        except ValueError:
+            raise InvalidTokenError('Malformed token')
+        if not isinstance(claims, dict):
+            raise InvalidTokenError('Malformed token')
+        expiration = claims.get('exp')
+        if expiration is None:
+            return claims
+        if not isinstance(expiration, (int, float)):
+            raise InvalidTokenError('Malformed token')
+        if time.time() > expiration + self.leeway:
+            raise InvalidTokenError('Token has expired')
+        return claims
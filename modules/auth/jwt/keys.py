@@ -0,0 +1,140 @@
+import json
+
+from jose import JWTError, jwt
+
+from modules.auth.jwt import jws
+
+from settings import JWTConfig
+
+
+class KeyRing:
+    """
+    Keys signing and verifying tokens of the application.
+
+    With HS256 tokens are signed and verified with the secret key. With
+    EdDSA or ES256 they are signed by the private key `signing_kid` of the
+    JWKS file, or its last key of the algorithm, and the key id is put in
+    the token header. Any key of the file verifies tokens, so a new key can
+    be published first and switched to later, and an old one is kept until
+    its tokens expire.
+
+    The file is read on first use, so commands managing it can run without
+    it. The application checks it on startup instead (see `check`).
+    """
+
+    def __init__(
+            self,
+            algorithm: str,
+            secret_key: str,
+            keys_file: str | None,
+            signing_kid: str | None,
+            cache_size: int
+    ):
+        self.algorithm = algorithm
+        self.secret_key = secret_key
+        self.keys_file = keys_file
+        self.signing_kid = signing_kid
+        self.cache_size = cache_size
+        self._jwks: dict | None = None
+        self._signing_key: jws.PrivateKey | None = None
+        self._verifier: jws.JWKSVerifier | None = None
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.algorithm in jws.ALGORITHMS
+
+    def load(self) -> None:
+        if not self.keys_file:
+            raise RuntimeError(
+                f'JWT_KEYS_FILE is required for {self.algorithm} signing'
+            )
+        with open(self.keys_file) as file:
+            jwks = json.load(file)
+        keys = [
+            jwk for jwk in jwks.get('keys', [])
+            if jwk.get('alg') == self.algorithm
+        ]
+        if self.signing_kid:
+            keys = [jwk for jwk in keys if jwk['kid'] == self.signing_kid]
+        if not keys:
+            kid = f' {self.signing_kid}' if self.signing_kid else ''
+            raise RuntimeError(
+                f'No {self.algorithm} key{kid} in {self.keys_file}'
+            )
+        self.signing_kid = keys[-1]['kid']
+        self._signing_key = jws.load_private_key(keys[-1])
+        self._verifier = jws.JWKSVerifier(jwks, cache_size=self.cache_size)
+        self._jwks = jwks
+
+    def check(self) -> None:
+        """
+        Loads the keys of an asymmetric algorithm, so that a missing or
+        invalid JWT_KEYS_FILE stops the application on startup rather
+        than failing requests.
+
+        Raises:
+            RuntimeError: if the keys cannot be loaded
+        """
+        if not self.is_asymmetric:
+            return
+        try:
+            self.load()
+        except (OSError, KeyError, ValueError) as e:
+            raise RuntimeError(
+                f'Invalid JWT_KEYS_FILE {self.keys_file}: {e!r}'
+            ) from e
+
+    @property
+    def verifier(self) -> jws.JWKSVerifier:
+        if self._verifier is None:
+            self.load()
+        return self._verifier
+
+    def get_public_jwks(self) -> dict:
+        """Returns public keys verifying tokens, none with HS256"""
+        if not self.is_asymmetric:
+            return {'keys': []}
+        if self._jwks is None:
+            self.load()
+        return {
+            'keys': [
+                jws.get_public_jwk(jwk) for jwk in self._jwks['keys']
+                if jwk.get('alg') in jws.ALGORITHMS
+            ]
+        }
+
+    def encode(self, payload: dict) -> str:
+        if not self.is_asymmetric:
+            return jwt.encode(
+                payload, self.secret_key, algorithm=self.algorithm
+            )
+        if self._signing_key is None:
+            self.load()
+        return jws.sign(
+            payload, self._signing_key, self.signing_kid, self.algorithm
+        )
+
+    def decode(self, token: str) -> dict:
+        """
+        Returns claims of a token signed by the application.
+
+        Raises:
+            JWTError: if the token is not valid
+        """
+        if not self.is_asymmetric:
+            return jwt.decode(
+                token, self.secret_key, algorithms=[self.algorithm]
+            )
+        try:
+            return self.verifier.verify(token)
+        except jws.InvalidTokenError as e:
+            raise JWTError(str(e))
+
+
+key_ring = KeyRing(
+    algorithm=JWTConfig.algorithm,
+    secret_key=JWTConfig.secret_key,
+    keys_file=JWTConfig.keys_file,
+    signing_kid=JWTConfig.signing_kid,
+    cache_size=JWTConfig.verification_cache_size
+)
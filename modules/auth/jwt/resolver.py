@@ -0,0 +1,139 @@
+"""
+Resolver filling the JWT payload from an auth session.
+"""
+from typing import Any, Iterable
+
+from modules.auth.jwt.classes import (
+    JWTArgsField, JWTFuncField, JWTModelField
+)
+
+from sqlalchemy import inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def is_loaded(obj: Any, fields: Iterable[str]) -> bool:
+    """Whether the fields of the object are read without a query."""
+    unloaded = inspect(obj).unloaded
+    return not any(field in unloaded for field in fields)
+
+
+class PayloadResolver:
+    """
+    Resolves values of the JWT payload fields for an auth session.
+
+    Model fields are grouped by model and by the record key. A group
+    whose record is one of the `loaded` objects takes the values from it,
+    the other groups of a model are loaded by one query in the caller's
+    session, with relationships of user property fields joined. A login
+    passing its user thus builds the payload of JWT_PAYLOAD_USER without
+    any query.
+
+    Attributes:
+        db_session (AsyncSession): session of the caller, used for
+            records which are not loaded.
+        loaded (list): already loaded records of the payload models.
+    """
+
+    def __init__(
+            self,
+            db_session: AsyncSession | None = None,
+            loaded: Iterable[Any] = ()
+    ):
+        self.db_session = db_session
+        self.loaded = list(loaded)
+
+    def find_loaded(
+            self,
+            model,
+            field_in: str,
+            key: Any,
+            fields: list[JWTModelField]
+    ) -> Any | None:
+        """Returns the loaded record with the key, if it has the fields."""
+        for obj in self.loaded:
+            if not isinstance(obj, model):
+                continue
+            required = {
+                name for field in fields
+                for name in field.get_loaded_fields()
+            }
+            if not is_loaded(obj, required):
+                continue
+            if str(getattr(obj, field_in)) == str(key):
+                return obj
+        return None
+
+    async def load(
+            self,
+            model,
+            keys: list[tuple[str, Any]],
+            fields: list[JWTModelField]
+    ) -> list[Any]:
+        """Loads records of the model with any of the keys by one query."""
+        if self.db_session is None:
+            raise RuntimeError(
+                f'A database session is required to load {model.__name__}'
+            )
+        query = select(model).where(or_(*(
+            getattr(model, field_in) == key for field_in, key in keys
+        )))
+        loaders = [
+            loader for field in fields
+            if (loader := field.get_loader()) is not None
+        ]
+        if loaders:
+            query = query.options(*loaders)
+        result = await self.db_session.execute(query)
+        return list(result.unique().scalars().all())
+
+    async def resolve(self, structure: dict, session_obj) -> dict[str, Any]:
+        """
+        Returns values of the payload fields by their names.
+
+        Args:
+            structure (dict): JWT payload structure.
+            session_obj (SessionModel): object of the auth session.
+        """
+        values = {}
+        groups: dict[Any, dict[tuple[str, Any], list[str]]] = {}
+        for name, field in structure.items():
+            if isinstance(field, JWTArgsField):
+                values[name] = field.get_value(session_obj)
+            elif isinstance(field, JWTModelField):
+                key = (field.field_in, field.get_key(session_obj))
+                groups.setdefault(field.model, {}).setdefault(
+                    key, []
+                ).append(name)
+            elif isinstance(field, JWTFuncField):
+                values[name] = field.value
+
+        for model, model_groups in groups.items():
+            missing = {}
+            for (field_in, key), names in model_groups.items():
+                fields = [structure[name] for name in names]
+                obj = None
+                if not any(field.multiple for field in fields):
+                    obj = self.find_loaded(model, field_in, key, fields)
+                if obj is None:
+                    missing[(field_in, key)] = names
+                    continue
+                for name in names:
+                    values[name] = structure[name].get_value([obj])
+
+            if not missing:
+                continue
+            objects = await self.load(
+                model,
+                list(missing),
+                [structure[name] for names in missing.values()
+                 for name in names]
+            )
+            for (field_in, key), names in missing.items():
+                matched = [
+                    obj for obj in objects
+                    if str(getattr(obj, field_in)) == str(key)
+                ]
+                for name in names:
+                    values[name] = structure[name].get_value(matched)
+
+        return {name: values.get(name) for name in structure}
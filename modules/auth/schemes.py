@@ -16,3 +16,5 @@ class UserJwtPayload(BaseModel):
     user_info: UserInfo = Field()
     scope: str = Field(examples=['admin', 'client'])
     token_uuid: str = Field(examples=['92a3098a-b402-495c-8069-697abe4c3f3f'])
+    iat: float | None = Field(default=None, examples=[1760000000.123])
+    exp: int | None = Field(default=None, examples=[1760000300])
@@ -0,0 +1,43 @@
+import dataclasses
+from typing import Any, Callable
+
+
+@dataclasses.dataclass
+class BenchmarkCase:
+    name: str
+    func: Callable[[], Any]
+    iterations: int | None = None
+    warmup: int | None = None
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    median_us: float
+    p95_us: float
+    ops_per_sec: float
+    allocated_blocks_per_op: float
+    peak_memory_kb: float
+
+
+@dataclasses.dataclass
+class LoadResult:
+    name: str
+    concurrency: int
+    requests: int
+    errors: int
+    median_ms: float
+    p95_ms: float
+    ops_per_sec: float
+
+
+@dataclasses.dataclass
+class MemoryResult:
+    name: str
+    workers: int
+    master_rss_mb: float
+    worker_rss_mb: float
+    worker_uss_mb: float
+    worker_pss_mb: float
+    total_pss_mb: float
@@ -0,0 +1,281 @@
+import asyncio
+import gc
+import inspect
+import statistics
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Iterable
+
+from modules.benchmark.dataclasses import (
+    BenchmarkCase, BenchmarkResult, LoadResult, MemoryResult
+)
+
+import psutil
+
+
+ALLOCATION_SAMPLE_SIZE = 100
+
+
+async def _call(func: Callable[[], Any], is_async: bool) -> None:
+    if is_async:
+        await func()
+    else:
+        func()
+
+
+async def _measure_timings(
+        func: Callable[[], Any],
+        is_async: bool,
+        iterations: int
+) -> list[int]:
+    timings = []
+    perf_counter_ns = time.perf_counter_ns
+    if is_async:
+        for _ in range(iterations):
+            start = perf_counter_ns()
+            await func()
+            timings.append(perf_counter_ns() - start)
+    else:
+        for _ in range(iterations):
+            start = perf_counter_ns()
+            func()
+            timings.append(perf_counter_ns() - start)
+    return timings
+
+
+async def _measure_allocations(
+        func: Callable[[], Any],
+        is_async: bool,
+        iterations: int
+) -> tuple[float, float]:
+    """
+    Runs func under tracemalloc and returns the number of memory blocks
+    still allocated per call and the peak of traced memory in KiB
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            await _call(func, is_async)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, 'filename')
+    )
+    return blocks / iterations, (peak - baseline) / 1024
+
+
+async def run_case(
+        case: BenchmarkCase,
+        iterations: int,
+        warmup: int
+) -> BenchmarkResult:
+    """
+    Runs a single benchmark case: warmup calls first, then timed calls and
+    finally a shorter pass under tracemalloc to count allocations
+
+    Args:
+        case (BenchmarkCase): benchmark case to run. Its own iterations and
+            warmup values take precedence over the passed ones
+        iterations (int): number of timed calls
+        warmup (int): number of calls made before timing starts
+
+    Returns:
+        BenchmarkResult with median and p95 latency, throughput and
+        allocation statistics
+    """
+    iterations = case.iterations or iterations
+    warmup = case.warmup if case.warmup is not None else warmup
+    result = case.func()
+    is_async = inspect.isawaitable(result)
+    if is_async:
+        await result
+
+    for _ in range(warmup):
+        await _call(case.func, is_async)
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = await _measure_timings(case.func, is_async, iterations)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    blocks_per_op, peak_memory_kb = await _measure_allocations(
+        case.func,
+        is_async,
+        min(iterations, ALLOCATION_SAMPLE_SIZE)
+    )
+
+    timings.sort()
+    p95_index = min(len(timings) - 1, int(len(timings) * 0.95))
+    return BenchmarkResult(
+        name=case.name,
+        iterations=iterations,
+        median_us=statistics.median(timings) / 1000,
+        p95_us=timings[p95_index] / 1000,
+        ops_per_sec=iterations / (sum(timings) / 1e9),
+        allocated_blocks_per_op=blocks_per_op,
+        peak_memory_kb=peak_memory_kb
+    )
+
+
+async def run_cases(
+        cases: Iterable[BenchmarkCase],
+        iterations: int,
+        warmup: int
+) -> list[BenchmarkResult]:
+    return [await run_case(case, iterations, warmup) for case in cases]
+
+
+def format_results(results: list[BenchmarkResult]) -> str:
+    """Formats benchmark results as a plain text table"""
+    header = (
+        f'{"case":<40} {"iters":>7} {"median us":>11} {"p95 us":>11} '
+        f'{"ops/sec":>12} {"blocks/op":>10} {"peak KiB":>10}'
+    )
+    lines = [header, '-' * len(header)]
+    for result in results:
+        lines.append(
+            f'{result.name:<40} {result.iterations:>7} '
+            f'{result.median_us:>11.2f} {result.p95_us:>11.2f} '
+            f'{result.ops_per_sec:>12.1f} '
+            f'{result.allocated_blocks_per_op:>10.2f} '
+            f'{result.peak_memory_kb:>10.1f}'
+        )
+    return '\n'.join(lines)
+
+
+async def run_load(
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        concurrency: int,
+        duration: float,
+        warmup: int = 1
+) -> LoadResult:
+    """
+    Calls func from `concurrency` coroutines in a loop for `duration`
+    seconds and reports throughput and latency of successful calls
+
+    Args:
+        name (str): name of the measured setup
+        func (Callable): coroutine function to call
+        concurrency (int): number of concurrent callers
+        duration (float): measuring time in seconds
+        warmup (int): number of untimed calls made by every caller first
+    """
+    timings: list[int] = []
+    errors = 0
+    perf_counter_ns = time.perf_counter_ns
+
+    async def warm_up():
+        for _ in range(warmup):
+            await func()
+
+    await asyncio.gather(*(warm_up() for _ in range(concurrency)))
+
+    stop_at = time.monotonic() + duration
+
+    async def caller():
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            start = perf_counter_ns()
+            try:
+                await func()
+            except Exception:
+                errors += 1
+            else:
+                timings.append(perf_counter_ns() - start)
+
+    started = time.monotonic()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    timings.sort()
+    p95_index = max(0, min(len(timings) - 1, int(len(timings) * 0.95)))
+    return LoadResult(
+        name=name,
+        concurrency=concurrency,
+        requests=len(timings),
+        errors=errors,
+        median_ms=statistics.median(timings) / 1e6 if timings else 0.0,
+        p95_ms=timings[p95_index] / 1e6 if timings else 0.0,
+        ops_per_sec=len(timings) / elapsed
+    )
+
+
+def format_load_results(results: list[LoadResult]) -> str:
+    """Formats load test results as a plain text table"""
+    header = (
+        f'{"setup":<32} {"conc":>5} {"requests":>9} {"errors":>7} '
+        f'{"median ms":>10} {"p95 ms":>10} {"ops/sec":>10}'
+    )
+    lines = [header, '-' * len(header)]
+    for result in results:
+        lines.append(
+            f'{result.name:<32} {result.concurrency:>5} '
+            f'{result.requests:>9} {result.errors:>7} '
+            f'{result.median_ms:>10.2f} {result.p95_ms:>10.2f} '
+            f'{result.ops_per_sec:>10.1f}'
+        )
+    return '\n'.join(lines)
+
+
+def measure_workers_memory(name: str, master_pid: int) -> MemoryResult:
+    """
+    Measures memory of a pre-fork server and its worker processes.
+
+    RSS counts pages shared with the master in every worker, so USS (pages
+    unique to the worker) and PSS (shared pages divided between the sharing
+    processes) show the real cost of an extra worker.
+
+    Args:
+        name (str): name of the measured setup
+        master_pid (int): pid of the process that forks workers
+
+    Returns:
+        average per worker and total memory in MiB
+    """
+    master = psutil.Process(master_pid)
+    workers = master.children()
+    infos = [worker.memory_full_info() for worker in workers]
+    count = len(infos) or 1
+    mib = 1024 * 1024
+    master_info = master.memory_full_info()
+    return MemoryResult(
+        name=name,
+        workers=len(infos),
+        master_rss_mb=master_info.rss / mib,
+        worker_rss_mb=sum(info.rss for info in infos) / count / mib,
+        worker_uss_mb=sum(info.uss for info in infos) / count / mib,
+        worker_pss_mb=sum(info.pss for info in infos) / count / mib,
+        total_pss_mb=(
+            master_info.pss + sum(info.pss for info in infos)
+        ) / mib
+    )
+
+
+def format_memory_results(results: list[MemoryResult]) -> str:
+    """Formats memory measurements as a plain text table"""
+    header = (
+        f'{"setup":<24} {"workers":>7} {"master RSS":>11} '
+        f'{"worker RSS":>11} {"worker USS":>11} {"worker PSS":>11} '
+        f'{"total PSS":>10}'
+    )
+    lines = [header, '-' * len(header)]
+    for result in results:
+        lines.append(
+            f'{result.name:<24} {result.workers:>7} '
+            f'{result.master_rss_mb:>11.1f} {result.worker_rss_mb:>11.1f} '
+            f'{result.worker_uss_mb:>11.1f} {result.worker_pss_mb:>11.1f} '
+            f'{result.total_pss_mb:>10.1f}'
+        )
+    lines.append('(MiB, worker columns are averages)')
+    return '\n'.join(lines)
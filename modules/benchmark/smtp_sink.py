@@ -0,0 +1,36 @@
+import asyncio
+import os
+
+
+LATENCY_SECONDS = int(os.environ.get('SMTP_SINK_LATENCY_MS', 0)) / 1000
+
+
+class SinkHandler:
+    """
+    aiosmtpd handler accepting and discarding every message. Every reply
+    to EHLO, MAIL, RCPT and DATA is delayed by SMTP_SINK_LATENCY_MS to
+    model the round trip to a remote MTA.
+    """
+
+    async def handle_EHLO(self, server, session, envelope, hostname,
+                          responses):
+        await asyncio.sleep(LATENCY_SECONDS)
+        session.host_name = hostname
+        return responses
+
+    async def handle_MAIL(self, server, session, envelope, address,
+                          mail_options):
+        await asyncio.sleep(LATENCY_SECONDS)
+        envelope.mail_from = address
+        envelope.mail_options.extend(mail_options)
+        return '250 OK'
+
+    async def handle_RCPT(self, server, session, envelope, address,
+                          rcpt_options):
+        await asyncio.sleep(LATENCY_SECONDS)
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(LATENCY_SECONDS)
+        return '250 Message accepted for delivery'
@@ -0,0 +1,45 @@
+import asyncio
+import os
+import pathlib
+import uuid
+
+from settings import TemplatesConfig
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+LATENCY_SECONDS = int(os.environ.get('UNISENDER_STUB_LATENCY_MS', 0)) / 1000
+
+TEMPLATE_BODY = pathlib.Path(
+    TemplatesConfig.directory, TemplatesConfig.verification.lstrip('/')
+).read_text()
+
+
+async def get_template(request: Request) -> JSONResponse:
+    form = await request.form()
+    await asyncio.sleep(LATENCY_SECONDS)
+    return JSONResponse({
+        'result': {
+            'id': form.get('template_id'),
+            'body': TEMPLATE_BODY,
+        }
+    })
+
+
+async def send_email(request: Request) -> JSONResponse:
+    form = await request.form()
+    await asyncio.sleep(LATENCY_SECONDS)
+    if not form.get('email'):
+        return JSONResponse({'error': 'Email is required', 'code': 'invalid'})
+    return JSONResponse({
+        'result': {'email_id': str(uuid.uuid4())}
+    })
+
+
+app = Starlette(routes=[
+    Route('/getTemplate', get_template, methods=['POST']),
+    Route('/sendEmail', send_email, methods=['POST']),
+])
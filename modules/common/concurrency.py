@@ -0,0 +1,89 @@
+import enum
+import time
+
+
+class Priority(enum.Enum):
+    """
+    Priority of requests under load, with the share of the concurrency
+    limit requests of the priority may use. Lower priorities are shed
+    first, so the remaining capacity is kept for higher ones.
+    """
+    CRITICAL = 1.0
+    NORMAL = 0.8
+    LOW = 0.5
+
+    @property
+    def share(self) -> float:
+        return self.value
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit of requests processed at once, adjusted by AIMD.
+
+    Every `adjust_interval` seconds the limit is multiplied by `backoff`
+    if the average time requests waited for a database connection over
+    the interval exceeded `target_wait` or any of them timed out, as more
+    concurrent requests would only queue for connections. Otherwise, if
+    the limit was reached during the interval, it grows by one request.
+    The limit stays between `min_limit` and `max_limit`.
+
+    Attributes:
+        limit (float): current concurrency limit
+        in_flight (int): requests being processed
+    """
+
+    def __init__(
+            self,
+            initial_limit: int,
+            min_limit: int,
+            max_limit: int,
+            target_wait: float,
+            adjust_interval: float,
+            backoff: float
+    ):
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_wait = target_wait
+        self.adjust_interval = adjust_interval
+        self.backoff = backoff
+        self.in_flight = 0
+        self.adjusted_at = time.monotonic()
+        self._reached = False
+
+    def try_acquire(self, priority: Priority) -> bool:
+        """Admits a request unless its priority's share is in use"""
+        if self.in_flight >= self.limit * priority.share:
+            self._reached = True
+            return False
+        self.in_flight += 1
+        if self.in_flight >= self.limit:
+            self._reached = True
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def is_due(self) -> bool:
+        return time.monotonic() - self.adjusted_at >= self.adjust_interval
+
+    def adjust(self, average_wait: float, timeouts: int) -> int:
+        """
+        Adjusts the limit by the pool waits of the elapsed interval.
+
+        Returns:
+            -1 if the limit was decreased, 1 if increased, otherwise 0
+        """
+        self.adjusted_at = time.monotonic()
+        reached, self._reached = self._reached, False
+        if timeouts or average_wait > self.target_wait:
+            limit = max(self.min_limit, self.limit * self.backoff)
+            change = -1 if limit < self.limit else 0
+        elif reached:
+            limit = min(self.max_limit, self.limit + 1)
+            change = 1 if limit > self.limit else 0
+        else:
+            return 0
+        self.limit = limit
+        return change
@@ -0,0 +1,109 @@
+"""
+Deadline of the current request.
+
+The deadline is kept in a context variable, so everything the request
+awaits, including tasks it creates, shares one time budget: database
+transactions get it as their statement timeout and outgoing HTTP calls as
+their timeout. Code running outside requests has no deadline.
+"""
+import contextlib
+import contextvars
+import math
+import time
+from typing import Iterator
+
+from sqlalchemy.exc import DBAPIError
+
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    'deadline', default=None
+)
+
+# PostgreSQL error of a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is started after the deadline of the request"""
+
+
+def is_deadline_error(error: Exception) -> bool:
+    """
+    Tells whether the error is caused by the deadline, either directly or
+    by a statement cancelled by its statement timeout.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return True
+    return (
+        isinstance(error, DBAPIError)
+        and getattr(error.orig, 'sqlstate', None) == QUERY_CANCELED
+    )
+
+
+def set_deadline(seconds: float) -> contextvars.Token:
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token: contextvars.Token) -> None:
+    _deadline.reset(token)
+
+
+def get_remaining() -> float | None:
+    """Returns seconds left until the deadline, None without one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check() -> None:
+    """
+    Raises:
+        DeadlineExceeded: if the deadline has passed
+    """
+    remaining = get_remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded()
+
+
+def get_timeout(timeout: float | None) -> float | None:
+    """
+    Returns the timeout cut down to the time left until the deadline.
+
+    Raises:
+        DeadlineExceeded: if the deadline has passed
+    """
+    remaining = get_remaining()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded()
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def get_statement_timeout() -> int | None:
+    """
+    Returns milliseconds left until the deadline as a PostgreSQL
+    statement_timeout, None without a deadline.
+
+    Raises:
+        DeadlineExceeded: if the deadline has passed
+    """
+    timeout = get_timeout(None)
+    if timeout is None:
+        return None
+    # 0 would disable the timeout
+    return max(math.ceil(timeout * 1000), 1)
+
+
+@contextlib.contextmanager
+def suspended() -> Iterator[None]:
+    """
+    Runs the block without the deadline, e.g. bookkeeping which must
+    complete after the request has run out of time.
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,18 @@
+class UnisenderAPIError(Exception):
+    """
+    Unisender API returned an error or a response that could not be parsed
+
+    Attributes:
+        method_name (str): name of the called API method
+        retryable (bool): whether the same call may succeed if repeated
+    """
+
+    def __init__(
+            self,
+            message: str,
+            method_name: str,
+            retryable: bool = False
+    ):
+        super().__init__(f'{method_name}: {message}')
+        self.method_name = method_name
+        self.retryable = retryable
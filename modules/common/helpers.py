@@ -4,11 +4,12 @@ from typing import Any
 
 from fastapi.templating import Jinja2Templates
 
-import httpx
-
 from jinja2 import Template
 
-from logger import logger
+from modules.common.templates import (
+    EmailTemplateCache, get_unisender_template_id
+)
+from modules.common.unisender import unisender_client
 
 from settings import UnisenderConfig
 
@@ -53,10 +54,12 @@ async def general_api_call(
         method_name: str,
         array_parameters: dict[str, str | dict] | None = None,
         query_parameters: dict[str, str] | None = None,
+        timeout: float | None = None,
+        idempotent: bool = False,
         **kwargs
 ) -> dict[str] | list[dict[str]]:
     """
-    Wrapper for https.AsyncClient post method that passes parameters
+    Wrapper for the shared Unisender client that passes parameters
     through form or query parameters
 
     Args:
@@ -67,12 +70,15 @@ async def general_api_call(
         query_parameters (dict[str, str]): parameters to be passed through
             url due to problems with passing them through form data
             (e.g. list_ids)
+        timeout (float | None): timeout of every HTTP request in seconds
+        idempotent (bool): whether the call may be retried after it could
+            have reached Unisender
         kwargs (str | dict[str, str | dict[str, str]]): dictionary of
             other parameters to be passed with HTTP request
 
     Returns:
         data from 'result' property of JSON returned by Unisender API
-        If API returns error response, raises exception
+        If API returns error response, raises UnisenderAPIError
     """
     params = {}
     data = {
@@ -93,19 +99,13 @@ async def general_api_call(
 
     data.update(kwargs)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url=f'https://api.unisender.com/en/api/{method_name}',
-            params=params,
-            data=data
-        )
-        if response.is_error:
-            logger.error(f'Error while sending email: {response.text}')
-        if 'error' in response.json():
-            logger.error(
-                f'Error while sending email: {response.json().get('error')}'
-            )
-        return response.json().get('result')
+    return await unisender_client.call(
+        method_name,
+        data=data,
+        params=params,
+        timeout=timeout,
+        idempotent=idempotent
+    )
 
 
 async def get_template_body(
@@ -113,7 +113,8 @@ async def get_template_body(
 ) -> str:
     return (await general_api_call(
         method_name='getTemplate',
-        template_id=template_id
+        idempotent=True,
+        template_id=get_unisender_template_id(template_id)
     )).get('body')
 
 
@@ -126,32 +127,4 @@ def get_rendered_html(
     return template.render(params)
 
 
-async def send_email(
-        subject: str,
-        receiver_email: str,
-        params: dict[str, str],
-        template_id: str | None = None
-) -> None:
-    """
-    Sends single email
-
-    Args:
-        subject (str): subject of email message
-        receiver_email (str): email address of receiver
-        params (dict[str, str]): parameters to be replaced in template
-        template_id (str): id of template to be used in email body
-    """
-    raw_template_html = await get_template_body(template_id)
-    body = get_rendered_html(
-        raw_html=raw_template_html,
-        params=params
-    )
-    await general_api_call(
-        method_name='sendEmail',
-        email=receiver_email,
-        sender_name=UnisenderConfig.sender_name,
-        sender_email=UnisenderConfig.sender_email,
-        subject=subject,
-        body=body,
-        list_id=UnisenderConfig.default_list_id
-    )
+email_templates = EmailTemplateCache(fetch_body=get_template_body)
@@ -0,0 +1,41 @@
+import httpx
+
+from settings import HTTPConfig
+
+
+class HTTPClients:
+    """
+    Holder of the httpx clients shared by the whole process.
+
+    Clients keep pooled keep-alive connections, so they are created once by
+    the application lifespan (or lazily by a management command) instead of
+    on every call.
+    """
+
+    def __init__(self):
+        self._default: httpx.AsyncClient | None = None
+
+    @staticmethod
+    def get_limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=HTTPConfig.max_connections,
+            max_keepalive_connections=HTTPConfig.max_keepalive_connections,
+            keepalive_expiry=HTTPConfig.keepalive_expiry
+        )
+
+    @property
+    def default(self) -> httpx.AsyncClient:
+        if self._default is None or self._default.is_closed:
+            self._default = httpx.AsyncClient(limits=self.get_limits())
+        return self._default
+
+    def start(self) -> httpx.AsyncClient:
+        return self.default
+
+    async def close(self) -> None:
+        if self._default is not None:
+            await self._default.aclose()
+            self._default = None
+
+
+http_clients = HTTPClients()
@@ -0,0 +1,60 @@
+import threading
+from collections import defaultdict
+from typing import Callable
+
+
+class Metrics:
+    """
+    In-process registry of counters, timings and gauges.
+
+    Values are kept per worker process and exposed by GET /health/metrics.
+
+    Attributes:
+        counters (dict[str, int]): monotonically increasing values
+        timings (dict[str, dict[str, float]]): count, total and maximum of
+            observed durations in seconds
+        gauges (dict[str, Callable[[], float]]): functions returning the
+            current value, called on every snapshot
+    """
+
+    def __init__(self):
+        self.counters: dict[str, int] = defaultdict(int)
+        self.timings: dict[str, dict[str, float]] = {}
+        self.gauges: dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.timings.setdefault(
+                name, {'count': 0, 'total': 0.0, 'max': 0.0}
+            )
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    def gauge(self, name: str, func: Callable[[], float]) -> None:
+        self.gauges[name] = func
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {
+                name: {
+                    **timing,
+                    'avg': timing['total'] / timing['count']
+                    if timing['count'] else 0.0
+                }
+                for name, timing in self.timings.items()
+            }
+        return {
+            'counters': counters,
+            'timings': timings,
+            'gauges': {name: func() for name, func in self.gauges.items()},
+        }
+
+
+metrics = Metrics()
@@ -2,20 +2,86 @@ import asyncio
 
 from logger import logger
 
-from modules.common.helpers import send_email
+from modules.common import deadline
+from modules.email.helpers import send_email
+from modules.invalidation.bus import Channel, invalidation_bus
+
+from services.email_outbox import EmailOutboxService
 
 from settings import UnisenderConfig
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class TransactionMixin:
+    """
+    Commits the changes of a manager operation, or leaves the transaction
+    to the caller.
+
+    A manager created with `autocommit=False` flushes its changes instead,
+    so several operations run in one transaction of the caller, and
+    collects changed invalidation keys, which the caller publishes with
+    `publish_changes` after commit.
+    """
+
+    def __init__(self, autocommit: bool = True):
+        self.autocommit = autocommit
+        self.changes: set[tuple[Channel, str]] = set()
+
+    async def save(
+            self,
+            db_session: AsyncSession,
+            *changes: tuple[Channel, str]
+    ) -> None:
+        if not self.autocommit:
+            await db_session.flush()
+            self.changes.update(changes)
+            return
+        await db_session.commit()
+        for channel, key in changes:
+            invalidation_bus.publish(channel, key)
+
+    def publish_changes(self) -> None:
+        for channel, key in self.changes:
+            invalidation_bus.publish(channel, key)
+        self.changes.clear()
+
 
 class SendEmailMixin:
     @classmethod
-    async def send_email_to_user_via_unisender(
+    def enqueue_email_to_user(
+            cls,
+            message_subject: str,
+            template_data: dict,
+            template_id: str,
+            email_address: str,
+            db_session: AsyncSession
+    ) -> None:
+        """
+        Adds the email to the outbox within the current transaction. It is
+        sent by the outbox dispatcher after the transaction is committed.
+        """
+        EmailOutboxService.enqueue(
+            email=email_address,
+            subject=message_subject,
+            template_data=template_data,
+            template_id=template_id,
+            db_session=db_session
+        )
+
+    @classmethod
+    async def send_email_to_user(
             cls,
             message_subject: str,
             template_data: dict,
             template_id: str,
             email_address: str,
     ) -> None:
+        """
+        Sends the email right away through the configured transport
+        (EMAIL_TRANSPORT), bypassing the outbox.
+        """
+        timeout = deadline.get_timeout(int(UnisenderConfig.sending_timeout))
         try:
             await asyncio.wait_for(
                 send_email(
@@ -24,16 +90,16 @@ class SendEmailMixin:
                     template_data,
                     template_id
                 ),
-                timeout=int(UnisenderConfig.sending_timeout)
+                timeout=timeout
             )
             logger.info(f"Message for {email_address} sent successfully")
         except asyncio.TimeoutError:
             logger.error(
-                f"Timeout error: Sending message to Kafka took longer than "
-                f"{UnisenderConfig.sending_timeout} seconds. "
+                f"Timeout error: Sending message took longer than "
+                f"{timeout} seconds. "
                 f"Email: {email_address}"
             )
         except Exception as e:
             logger.exception(
-                f"Failed to send message to Kafka: {e}. Email: {email_address}"
+                f"Failed to send message: {e}. Email: {email_address}"
             )
@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens are added continuously at `rate` per second up to `capacity`,
+    so short bursts of up to `capacity` operations are allowed while the
+    long-term rate stays at `rate`.
+
+    Attributes:
+        rate (float): tokens added per second
+        capacity (float): maximum number of stored tokens
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def get_wait(self, tokens: float = 1) -> float:
+        """
+        Returns:
+            0 if tokens are available, otherwise seconds until enough
+            tokens are available
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            return 0
+        return (tokens - self.tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Takes tokens if available.
+
+        Returns:
+            0 if tokens were taken, otherwise seconds until enough tokens
+            are available
+        """
+        if wait := self.get_wait(tokens):
+            return wait
+        self.tokens -= tokens
+        return 0
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Waits until tokens are available and takes them"""
+        async with self._lock:
+            while wait := self.try_acquire(tokens):
+                await asyncio.sleep(wait)
+
+
+class SlidingWindowCounter:
+    """
+    Sliding window rate limiter.
+
+    Operations are counted in fixed windows of `period` seconds aligned to
+    the epoch, and the count over the last `period` seconds is estimated
+    from the current window and the part of the previous one the sliding
+    window still covers. Windows are numbered by wall clock time, so
+    counts of the same window from several processes can be summed, see
+    `others_current` and `others_previous`.
+
+    Attributes:
+        limit (int): operations allowed per sliding window
+        period (float): length of the window in seconds
+        window (int): number of the current fixed window
+        current (int): operations counted by this process in the window
+        previous (int): operations counted by this process in the
+            previous window
+        others_current (int): operations of other processes in the window
+        others_previous (int): operations of other processes in the
+            previous window
+        synced (int): operations of this process in the window already
+            added to a count shared with other processes
+    """
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.window = 0
+        self.current = self.previous = 0
+        self.others_current = self.others_previous = 0
+        self.synced = 0
+
+    def advance(self, window: int) -> None:
+        if window == self.window:
+            return
+        if window == self.window + 1:
+            self.previous = self.current
+            self.others_previous = self.others_current
+        else:
+            self.previous = self.others_previous = 0
+        self.current = self.others_current = self.synced = 0
+        self.window = window
+
+    def get_wait(self) -> float:
+        """
+        Returns:
+            0 if the limit allows an operation, otherwise seconds until it
+            is allowed
+        """
+        now = time.time()
+        window, elapsed = divmod(now, self.period)
+        self.advance(int(window))
+        previous = self.previous + self.others_previous
+        current = self.current + self.others_current
+        weight = 1 - elapsed / self.period
+        if previous * weight + current < self.limit:
+            return 0
+        if current < self.limit:
+            # The previous window slides out enough before this one ends
+            return (
+                self.period * (1 - (self.limit - current) / previous)
+                - elapsed
+            )
+        # This window has to slide out partially as well
+        return self.period - elapsed + self.period * (
+            1 - self.limit / current
+        )
+
+    def try_acquire(self) -> float:
+        """
+        Counts an operation if the limit allows it.
+
+        Returns:
+            0 if the operation was counted, otherwise seconds until it is
+            allowed
+        """
+        if wait := self.get_wait():
+            return wait
+        self.current += 1
+        return 0
@@ -0,0 +1,218 @@
+import asyncio
+import dataclasses
+import hashlib
+import time
+from typing import Awaitable, Callable
+
+from jinja2 import (
+    Environment, FileSystemLoader, Template, select_autoescape
+)
+
+from logger import logger
+
+from modules.common.metrics import metrics
+
+from settings import TemplatesConfig, UnisenderConfig
+
+
+class TemplateSource:
+    """
+    unisender: templates are fetched from Unisender by template id.
+    local: templates are rendered from templates/email/*.html.
+    """
+    unisender = 'unisender'
+    local = 'local'
+
+
+environment = Environment(
+    loader=FileSystemLoader(TemplatesConfig.directory),
+    autoescape=select_autoescape(['html'], default_for_string=False),
+    auto_reload=False
+)
+
+
+class EmailTemplate:
+    """
+    Names of email templates sent by the application, independent of the
+    template source.
+    """
+    verification = 'verification'
+    reset_password = 'reset_password'
+
+    names = (verification, reset_password)
+
+
+class UnknownEmailTemplate(ValueError):
+    """Raised for a template id the configured source cannot render"""
+
+
+# Local template file of every EmailTemplate name
+LOCAL_TEMPLATES = {
+    EmailTemplate.verification: TemplatesConfig.verification,
+    EmailTemplate.reset_password: TemplatesConfig.reset_password,
+}
+
+
+def get_unisender_template_id(template_id: str) -> str:
+    """
+    Returns Unisender template id of an EmailTemplate name, other ids
+    (e.g. of bulk campaigns) as they are.
+
+    Raises:
+        ValueError: if the Unisender id of the name is not configured
+    """
+    unisender_ids = {
+        EmailTemplate.verification: UnisenderConfig.registration_template_id,
+        EmailTemplate.reset_password: (
+            UnisenderConfig.password_reset_template_id
+        ),
+    }
+    if template_id not in unisender_ids:
+        return template_id
+    if unisender_ids[template_id] is None:
+        raise ValueError(
+            f'Unisender template id of {template_id} email is not set'
+        )
+    return unisender_ids[template_id]
+
+
+@dataclasses.dataclass
+class CachedTemplate:
+    template: Template
+    version: str
+    expires_at: float
+
+
+class EmailTemplateCache:
+    """
+    Cache of compiled email templates keyed by template id: an
+    EmailTemplate name or a Unisender template id.
+
+    Remote templates are fetched once per `ttl` seconds. A refetched body is
+    compiled again only if its version (digest) has changed, and if the
+    refetch fails the stale template is kept. Concurrent misses of the same
+    template share one fetch. Local templates are compiled once by the
+    shared Environment.
+
+    Attributes:
+        fetch_body (Callable): coroutine function returning the raw template
+            body by its id
+        ttl (int): seconds after which a remote template is revalidated
+        source (str): one of TemplateSource values
+    """
+
+    metrics_prefix = 'email_templates'
+
+    def __init__(
+            self,
+            fetch_body: Callable[[str], Awaitable[str]],
+            ttl: int = TemplatesConfig.cache_ttl,
+            source: str = TemplatesConfig.source
+    ):
+        self.fetch_body = fetch_body
+        self.ttl = ttl
+        self.source = source
+        self._templates: dict[str, CachedTemplate] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        metrics.gauge(f'{self.metrics_prefix}.hit_rate', self.get_hit_rate)
+
+    @staticmethod
+    def get_version(body: str) -> str:
+        return hashlib.sha1(body.encode()).hexdigest()
+
+    def get_hit_rate(self) -> float:
+        hits = metrics.counters[f'{self.metrics_prefix}.hits']
+        misses = metrics.counters[f'{self.metrics_prefix}.misses']
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    def clear(self) -> None:
+        self._templates.clear()
+
+    def precompile_local(self) -> None:
+        """
+        Compiles all local templates, so no request pays for it.
+
+        Raises:
+            RuntimeError: if an EmailTemplate has no local template
+            TemplateNotFound: if a local template file is missing
+        """
+        if self.source != TemplateSource.local:
+            return
+        missing = set(EmailTemplate.names) - LOCAL_TEMPLATES.keys()
+        if missing:
+            raise RuntimeError(
+                f'No local email templates for: {", ".join(sorted(missing))}'
+            )
+        for name in LOCAL_TEMPLATES.values():
+            environment.get_template(name)
+
+    def check(self, template_id: str) -> None:
+        """
+        Raises:
+            UnknownEmailTemplate: if local templates are used and the id is
+                not an EmailTemplate name
+        """
+        if (
+                self.source == TemplateSource.local
+                and template_id not in LOCAL_TEMPLATES
+        ):
+            raise UnknownEmailTemplate(
+                f'Unknown email template {template_id!r}: with '
+                f'EMAIL_TEMPLATES_SOURCE=local only '
+                f'{", ".join(EmailTemplate.names)} can be sent'
+            )
+
+    async def get(self, template_id: str) -> Template:
+        if self.source == TemplateSource.local:
+            self.check(template_id)
+            metrics.increment(f'{self.metrics_prefix}.hits')
+            return environment.get_template(LOCAL_TEMPLATES[template_id])
+
+        cached = self._templates.get(template_id)
+        if cached is not None and cached.expires_at > time.monotonic():
+            metrics.increment(f'{self.metrics_prefix}.hits')
+            return cached.template
+
+        lock = self._locks.setdefault(template_id, asyncio.Lock())
+        async with lock:
+            cached = self._templates.get(template_id)
+            if cached is not None and cached.expires_at > time.monotonic():
+                metrics.increment(f'{self.metrics_prefix}.hits')
+                return cached.template
+            metrics.increment(f'{self.metrics_prefix}.misses')
+            return await self._load(template_id, cached)
+
+    async def _load(
+            self,
+            template_id: str,
+            cached: CachedTemplate | None
+    ) -> Template:
+        expires_at = time.monotonic() + self.ttl
+        try:
+            body = await self.fetch_body(template_id)
+        except Exception as e:
+            if cached is None:
+                raise
+            logger.warning(
+                f'Failed to revalidate email template {template_id}, '
+                f'using cached version: {e!r}'
+            )
+            metrics.increment(f'{self.metrics_prefix}.stale')
+            cached.expires_at = expires_at
+            return cached.template
+
+        version = self.get_version(body)
+        if cached is not None and cached.version == version:
+            metrics.increment(f'{self.metrics_prefix}.revalidated')
+            cached.expires_at = expires_at
+            return cached.template
+
+        metrics.increment(f'{self.metrics_prefix}.compiles')
+        template = environment.from_string(body)
+        self._templates[template_id] = CachedTemplate(
+            template=template,
+            version=version,
+            expires_at=expires_at
+        )
+        return template
@@ -0,0 +1,176 @@
+import asyncio
+import random
+from typing import Any
+
+import httpx
+
+from logger import logger
+
+from modules.common import deadline
+from modules.common.exceptions import UnisenderAPIError
+from modules.common.metrics import metrics
+
+from settings import HTTPConfig, UnisenderConfig
+
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Errors raised before the request reached Unisender, so the call can be
+# repeated even for methods that are not idempotent (e.g. sendEmail)
+CONNECTION_ERRORS = (
+    httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout
+)
+
+
+class UnisenderClient:
+    """
+    Long-lived client of the Unisender API.
+
+    Keeps one pool of keep-alive connections per process, parses every
+    response once and retries failed calls with exponential backoff and
+    jitter. Calls that may have reached Unisender (read timeouts, 5xx) are
+    retried only for idempotent methods.
+
+    Attributes:
+        base_url (str): URL of the API without the method name
+        timeout (float): default timeout of a single HTTP request in seconds
+        retries (int): number of repeated attempts after a failed call
+        retry_base_delay (float): delay before the first retry in seconds,
+            doubled for every following one
+    """
+
+    def __init__(
+            self,
+            base_url: str = UnisenderConfig.api_url,
+            timeout: float = UnisenderConfig.request_timeout,
+            retries: int = UnisenderConfig.retries,
+            retry_base_delay: float = UnisenderConfig.retry_base_delay
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=UnisenderConfig.max_connections,
+                    max_keepalive_connections=(
+                        UnisenderConfig.max_keepalive_connections
+                    ),
+                    keepalive_expiry=HTTPConfig.keepalive_expiry
+                )
+            )
+        return self._client
+
+    def start(self) -> httpx.AsyncClient:
+        return self.client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_retry_delay(self, attempt: int) -> float:
+        return random.uniform(0, self.retry_base_delay * 2 ** attempt)
+
+    async def _call_once(
+            self,
+            method_name: str,
+            data: dict,
+            params: dict,
+            timeout: float | None,
+            idempotent: bool
+    ) -> Any:
+        try:
+            response = await self.client.post(
+                f'/{method_name}',
+                params=params,
+                data=data,
+                timeout=deadline.get_timeout(timeout or self.timeout)
+            )
+        except CONNECTION_ERRORS as e:
+            raise UnisenderAPIError(repr(e), method_name, retryable=True)
+        except httpx.TransportError as e:
+            raise UnisenderAPIError(
+                repr(e), method_name, retryable=idempotent
+            )
+
+        try:
+            content = response.json()
+        except ValueError:
+            content = None
+        if response.is_error or not isinstance(content, dict):
+            raise UnisenderAPIError(
+                f'HTTP {response.status_code}: {response.text[:200]}',
+                method_name,
+                retryable=(
+                    idempotent
+                    and response.status_code in RETRYABLE_STATUS_CODES
+                )
+            )
+        if 'error' in content:
+            raise UnisenderAPIError(content['error'], method_name)
+        return content.get('result')
+
+    async def call(
+            self,
+            method_name: str,
+            data: dict,
+            params: dict | None = None,
+            timeout: float | None = None,
+            idempotent: bool = False
+    ) -> Any:
+        """
+        Calls an API method and returns the 'result' property of its
+        response.
+
+        Args:
+            method_name (str): name of the API method, e.g. sendEmail
+            data (dict): form parameters including api_key
+            params (dict | None): query parameters
+            timeout (float | None): timeout of every HTTP request in
+                seconds, defaults to the client timeout. Within a request
+                it is cut to the time left until the request deadline,
+                and retries stop when it is near
+            idempotent (bool): whether the call may be repeated after it
+                could have reached Unisender
+
+        Returns:
+            data from 'result' property of JSON returned by Unisender API
+            If all attempts fail, raises UnisenderAPIError
+        """
+        attempt = 0
+        while True:
+            try:
+                result = await self._call_once(
+                    method_name, data, params or {}, timeout, idempotent
+                )
+            except UnisenderAPIError as e:
+                metrics.increment(f'unisender.{method_name}.errors')
+                if not e.retryable or attempt >= self.retries:
+                    logger.error(f'Unisender call failed: {e}')
+                    raise
+                delay = self.get_retry_delay(attempt)
+                remaining = deadline.get_remaining()
+                if remaining is not None and remaining <= delay:
+                    logger.error(
+                        f'Unisender call failed, no time left to retry: {e}'
+                    )
+                    raise
+                logger.warning(
+                    f'Unisender call failed, retrying in {delay:.2f}s: {e}'
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            metrics.increment(f'unisender.{method_name}.calls')
+            return result
+
+
+unisender_client = UnisenderClient()
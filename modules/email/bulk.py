@@ -0,0 +1,189 @@
+import dataclasses
+import uuid
+from abc import ABC, abstractmethod
+
+from database.models import BulkEmailCampaignModel
+
+from logger import logger
+
+from modules.common.helpers import (
+    email_templates, general_api_call, get_template_body
+)
+from modules.common.rate_limit import TokenBucket
+from modules.email.transport import EmailTransport, OutgoingEmail
+
+from settings import BulkEmailConfig, UnisenderConfig
+
+
+@dataclasses.dataclass
+class BulkRecipient:
+    user_id: uuid.UUID
+    email: str
+    substitutions: dict[str, str]
+
+
+class BulkEmailProvider(ABC):
+    """
+    Sends emails to many recipients with batch requests.
+
+    All methods must be safe to repeat after a restart: state they create
+    is stored in campaign.provider_data, which is saved with every
+    checkpoint, and checked before it is created again.
+
+    Attributes:
+        max_batch_size (int): maximum number of recipients in one request
+        rate_limiter (TokenBucket): limits requests to the provider
+    """
+
+    max_batch_size: int
+
+    def __init__(self, rate_limiter: TokenBucket | None = None):
+        self.rate_limiter = rate_limiter or TokenBucket(
+            rate=BulkEmailConfig.rate, capacity=BulkEmailConfig.burst
+        )
+
+    async def prepare(self, campaign: BulkEmailCampaignModel) -> None:
+        """Called once before the first batch of every run"""
+
+    @abstractmethod
+    async def send_batch(
+            self,
+            campaign: BulkEmailCampaignModel,
+            recipients: list[BulkRecipient]
+    ) -> list[BulkRecipient]:
+        """
+        Sends or schedules emails for recipients.
+
+        Returns:
+            recipients whose emails failed, to be sent again
+        """
+
+    async def finish(self, campaign: BulkEmailCampaignModel) -> None:
+        """Called once after all recipients are processed"""
+
+
+class UnisenderBulkProvider(BulkEmailProvider):
+    """
+    Bulk sending through Unisender campaigns.
+
+    Recipients are imported into a list created for the campaign with
+    importContacts (up to 500 contacts per request), and their
+    substitutions are stored as contact fields, so {{field}} placeholders
+    in the template are personalised by Unisender. Once every batch is
+    imported, an email message and a campaign are created for the list.
+    Substitution fields must exist in the Unisender account.
+    """
+
+    max_batch_size = 500
+
+    async def _call(self, method_name: str, **kwargs):
+        await self.rate_limiter.acquire()
+        return await general_api_call(method_name, **kwargs)
+
+    async def prepare(self, campaign: BulkEmailCampaignModel) -> None:
+        if 'list_id' not in campaign.provider_data:
+            result = await self._call('createList', title=campaign.name)
+            campaign.provider_data['list_id'] = result['id']
+
+    async def send_batch(
+            self,
+            campaign: BulkEmailCampaignModel,
+            recipients: list[BulkRecipient]
+    ) -> list[BulkRecipient]:
+        substitution_names = sorted({
+            name for recipient in recipients
+            for name in recipient.substitutions
+        })
+        field_names = ['email', 'email_list_ids', *substitution_names]
+        data = {}
+        for row, recipient in enumerate(recipients):
+            values = [
+                recipient.email,
+                campaign.provider_data['list_id'],
+                *(
+                    recipient.substitutions.get(name, '')
+                    for name in substitution_names
+                )
+            ]
+            data.update({
+                f'data[{row}][{column}]': value
+                for column, value in enumerate(values)
+            })
+        # Contacts are upserted by email, so a repeated batch is harmless
+        await self._call(
+            'importContacts',
+            array_parameters={'field_names': dict(enumerate(field_names))},
+            idempotent=True,
+            **data
+        )
+        return []
+
+    async def finish(self, campaign: BulkEmailCampaignModel) -> None:
+        if 'message_id' not in campaign.provider_data:
+            body = await get_template_body(campaign.template_id)
+            result = await self._call(
+                'createEmailMessage',
+                sender_name=UnisenderConfig.sender_name,
+                sender_email=UnisenderConfig.sender_email,
+                subject=campaign.subject,
+                body=body,
+                list_id=campaign.provider_data['list_id']
+            )
+            campaign.provider_data['message_id'] = result['message_id']
+        if 'campaign_id' not in campaign.provider_data:
+            result = await self._call(
+                'createCampaign',
+                message_id=campaign.provider_data['message_id']
+            )
+            campaign.provider_data['campaign_id'] = result['campaign_id']
+
+
+class TransportBulkProvider(BulkEmailProvider):
+    """
+    Bulk sending through an email transport (e.g. SMTP relay).
+
+    The template is rendered locally for every recipient with its
+    substitutions, and every batch is passed to transport.send_many, which
+    takes one token of the rate limiter. Recipients whose emails fail are
+    returned to be sent again alone, so a batch is never sent twice.
+
+    Attributes:
+        transport (EmailTransport): transport sending the emails
+    """
+
+    max_batch_size = 1000
+
+    def __init__(
+            self,
+            transport: EmailTransport,
+            rate_limiter: TokenBucket | None = None
+    ):
+        super().__init__(rate_limiter)
+        self.transport = transport
+
+    async def send_batch(
+            self,
+            campaign: BulkEmailCampaignModel,
+            recipients: list[BulkRecipient]
+    ) -> list[BulkRecipient]:
+        template = await email_templates.get(campaign.template_id)
+        emails = [
+            OutgoingEmail(
+                receiver_email=recipient.email,
+                subject=campaign.subject,
+                body=template.render(recipient.substitutions)
+            )
+            for recipient in recipients
+        ]
+        await self.rate_limiter.acquire()
+        errors = await self.transport.send_many(emails)
+        failed = [
+            recipient for recipient, error in zip(recipients, errors)
+            if error is not None
+        ]
+        if failed:
+            logger.warning(
+                f'Campaign {campaign.name}: {len(failed)} of {len(emails)} '
+                f'emails were not sent: {next(filter(None, errors))!r}'
+            )
+        return failed
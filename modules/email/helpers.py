@@ -0,0 +1,54 @@
+from modules.common.helpers import email_templates
+from modules.email.smtp import SMTPTransport
+from modules.email.transport import (
+    EmailTransport, EmailTransportName, OutgoingEmail
+)
+from modules.email.unisender import UnisenderTransport
+
+from settings import EmailConfig
+
+
+def get_email_transport(name: str = EmailConfig.transport) -> EmailTransport:
+    """Creates the email transport selected by EMAIL_TRANSPORT"""
+    if name == EmailTransportName.unisender:
+        return UnisenderTransport()
+    if name == EmailTransportName.smtp:
+        return SMTPTransport()
+    raise ValueError(f'Unknown email transport: {name}')
+
+
+email_transport = get_email_transport()
+
+
+async def render_email(
+        subject: str,
+        receiver_email: str,
+        params: dict[str, str],
+        template_id: str | None = None
+) -> OutgoingEmail:
+    template = await email_templates.get(template_id)
+    return OutgoingEmail(
+        receiver_email=receiver_email,
+        subject=subject,
+        body=template.render(params)
+    )
+
+
+async def send_email(
+        subject: str,
+        receiver_email: str,
+        params: dict[str, str],
+        template_id: str | None = None
+) -> None:
+    """
+    Sends single email through the configured transport
+
+    Args:
+        subject (str): subject of email message
+        receiver_email (str): email address of receiver
+        params (dict[str, str]): parameters to be replaced in template
+        template_id (str): id of template to be used in email body
+    """
+    await email_transport.send(await render_email(
+        subject, receiver_email, params, template_id
+    ))
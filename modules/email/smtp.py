@@ -0,0 +1,230 @@
+import asyncio
+import collections
+import dataclasses
+import time
+from contextlib import asynccontextmanager
+from email.header import Header
+from email.mime.text import MIMEText
+from email.utils import formataddr, formatdate, make_msgid
+from typing import AsyncIterator
+
+import aiosmtplib
+
+from logger import logger
+
+from modules.common.metrics import metrics
+from modules.email.transport import EmailTransport, OutgoingEmail
+
+from settings import SMTPConfig
+
+
+@dataclasses.dataclass
+class PooledConnection:
+    client: aiosmtplib.SMTP
+    messages_sent: int = 0
+    released_at: float = 0.0
+
+
+class SMTPConnectionPool:
+    """
+    Pool of persistent, authenticated SMTP connections.
+
+    A connection is returned to the pool after use and reused until it has
+    sent `max_messages` messages or stayed idle for `idle_timeout` seconds,
+    so the TCP, TLS and AUTH handshakes are paid once per many messages.
+    At most `size` connections are open at the same time.
+
+    Attributes:
+        size (int): maximum number of open connections
+        max_messages (int): messages sent over a connection before it is
+            closed, servers often limit them per session
+        idle_timeout (float): seconds after which an idle connection is
+            closed instead of reused, as servers drop idle sessions
+        options (dict): arguments of aiosmtplib.SMTP
+    """
+
+    def __init__(
+            self,
+            size: int = SMTPConfig.pool_size,
+            max_messages: int = SMTPConfig.max_messages_per_connection,
+            idle_timeout: float = SMTPConfig.idle_timeout,
+            **options
+    ):
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.options = {
+            'hostname': SMTPConfig.host,
+            'port': SMTPConfig.port,
+            'username': SMTPConfig.username,
+            'password': SMTPConfig.password,
+            'use_tls': SMTPConfig.use_tls,
+            'start_tls': SMTPConfig.start_tls,
+            'timeout': SMTPConfig.timeout,
+            **options
+        }
+        self._idle: collections.deque[PooledConnection] = collections.deque()
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> PooledConnection:
+        client = aiosmtplib.SMTP(**self.options)
+        await client.connect()
+        metrics.increment('smtp.connections')
+        return PooledConnection(client=client)
+
+    def is_reusable(self, connection: PooledConnection) -> bool:
+        return (
+            connection.client.is_connected
+            and connection.messages_sent < self.max_messages
+        )
+
+    def _get_idle(self) -> PooledConnection | None:
+        now = time.monotonic()
+        while self._idle:
+            # The most recently used connection is the least likely to be
+            # dropped by the server
+            connection = self._idle.pop()
+            if now - connection.released_at < self.idle_timeout:
+                return connection
+            connection.client.close()
+        return None
+
+    async def _retire(self, connection: PooledConnection) -> None:
+        try:
+            await connection.client.quit()
+        except aiosmtplib.SMTPException:
+            connection.client.close()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[PooledConnection]:
+        async with self._semaphore:
+            connection = self._get_idle() or await self._connect()
+            try:
+                yield connection
+            except BaseException:
+                # The session may be in the middle of a transaction
+                connection.client.close()
+                raise
+            if self.is_reusable(connection):
+                connection.released_at = time.monotonic()
+                self._idle.append(connection)
+            elif connection.client.is_connected:
+                await self._retire(connection)
+
+    async def reconnect(self, connection: PooledConnection) -> None:
+        connection.client.close()
+        new_connection = await self._connect()
+        connection.client = new_connection.client
+        connection.messages_sent = 0
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._retire(self._idle.pop())
+
+
+class SMTPTransport(EmailTransport):
+    """
+    Relays emails through an SMTP server over pooled connections.
+
+    Every connection sends messages one after another within one session,
+    without reconnecting or authenticating again. send_many spreads a batch
+    over up to pool.size connections and each of them sends its share
+    back to back.
+
+    Attributes:
+        pool (SMTPConnectionPool): pool of connections to the server
+        sender_name (str): display name of the sender
+        sender_email (str): address of the sender
+    """
+
+    def __init__(
+            self,
+            pool: SMTPConnectionPool | None = None,
+            sender_name: str | None = SMTPConfig.sender_name,
+            sender_email: str | None = SMTPConfig.sender_email
+    ):
+        self.pool = pool or SMTPConnectionPool()
+        self.sender_name = sender_name
+        self.sender_email = sender_email
+        # Formatted once, make_msgid would otherwise resolve the local FQDN
+        # for every message
+        self._from = formataddr((sender_name, sender_email), 'utf-8')
+        self._msgid_domain = (sender_email or 'localhost').rpartition('@')[2]
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    def build_message(self, email: OutgoingEmail) -> MIMEText:
+        # The legacy (compat32) message API is several times cheaper to
+        # build and serialize than email.message.EmailMessage
+        message = MIMEText(email.body, 'html', 'utf-8')
+        message['From'] = self._from
+        message['To'] = email.receiver_email
+        message['Subject'] = (
+            email.subject if email.subject.isascii()
+            else Header(email.subject, 'utf-8')
+        )
+        message['Date'] = formatdate()
+        message['Message-ID'] = make_msgid(domain=self._msgid_domain)
+        return message
+
+    async def _deliver(
+            self,
+            connection: PooledConnection,
+            message: MIMEText
+    ) -> None:
+        try:
+            await connection.client.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            if not connection.messages_sent:
+                raise
+            # The server has closed the session since the last message
+            await self.pool.reconnect(connection)
+            await connection.client.send_message(message)
+        connection.messages_sent += 1
+        metrics.increment('smtp.sent')
+
+    async def send(self, email: OutgoingEmail) -> None:
+        message = self.build_message(email)
+        try:
+            async with self.pool.connection() as connection:
+                await self._deliver(connection, message)
+        except Exception:
+            metrics.increment('smtp.errors')
+            raise
+
+    async def send_many(
+            self,
+            emails: list[OutgoingEmail]
+    ) -> list[Exception | None]:
+        results: list[Exception | None] = [None] * len(emails)
+        pending = collections.deque(enumerate(emails))
+
+        def fail(index: int, email: OutgoingEmail, error: Exception):
+            metrics.increment('smtp.errors')
+            logger.warning(
+                f'Failed to send email to {email.receiver_email}: {error!r}'
+            )
+            results[index] = error
+
+        async def send_pending():
+            while pending:
+                try:
+                    async with self.pool.connection() as connection:
+                        while pending and self.pool.is_reusable(connection):
+                            index, email = pending.popleft()
+                            try:
+                                await self._deliver(
+                                    connection, self.build_message(email)
+                                )
+                            except Exception as e:
+                                fail(index, email, e)
+                except Exception as e:
+                    # Connecting has failed, the error is reported for the
+                    # next email so the batch cannot get stuck
+                    if pending:
+                        fail(*pending.popleft(), e)
+
+        workers = min(self.pool.size, len(emails))
+        await asyncio.gather(*(send_pending() for _ in range(workers)))
+        return results
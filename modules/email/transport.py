@@ -0,0 +1,56 @@
+import asyncio
+import dataclasses
+from abc import ABC, abstractmethod
+
+
+class EmailTransportName:
+    """
+    unisender: emails are sent with the sendEmail method of Unisender API.
+    smtp: emails are relayed through an SMTP server.
+    """
+    unisender = 'unisender'
+    smtp = 'smtp'
+
+
+@dataclasses.dataclass
+class OutgoingEmail:
+    receiver_email: str
+    subject: str
+    body: str
+
+
+class EmailTransport(ABC):
+    """
+    Delivers rendered emails to a provider. Transports keep their
+    connections between calls, so they are started once per process and
+    closed on shutdown.
+    """
+
+    def start(self) -> None:
+        """Prepares connections, if the transport has any"""
+
+    async def close(self) -> None:
+        """Releases connections, if the transport has any"""
+
+    @abstractmethod
+    async def send(self, email: OutgoingEmail) -> None:
+        """Sends one email, raises on failure"""
+
+    async def send_many(
+            self,
+            emails: list[OutgoingEmail]
+    ) -> list[Exception | None]:
+        """
+        Sends several emails.
+
+        Returns:
+            None for every sent email or the exception it failed with, in
+            the order of emails
+        """
+        results = await asyncio.gather(
+            *(self.send(email) for email in emails), return_exceptions=True
+        )
+        return [
+            result if isinstance(result, Exception) else None
+            for result in results
+        ]
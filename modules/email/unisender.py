@@ -0,0 +1,26 @@
+from modules.common.helpers import general_api_call
+from modules.common.unisender import unisender_client
+from modules.email.transport import EmailTransport, OutgoingEmail
+
+from settings import UnisenderConfig
+
+
+class UnisenderTransport(EmailTransport):
+    """Sends emails one by one with sendEmail method of Unisender API"""
+
+    def start(self) -> None:
+        unisender_client.start()
+
+    async def close(self) -> None:
+        await unisender_client.close()
+
+    async def send(self, email: OutgoingEmail) -> None:
+        await general_api_call(
+            method_name='sendEmail',
+            email=email.receiver_email,
+            sender_name=UnisenderConfig.sender_name,
+            sender_email=UnisenderConfig.sender_email,
+            subject=email.subject,
+            body=email.body,
+            list_id=UnisenderConfig.default_list_id
+        )
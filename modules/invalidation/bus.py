@@ -0,0 +1,294 @@
+import asyncio
+import enum
+import uuid
+from typing import Callable
+
+import asyncpg
+
+import database
+
+from logger import logger
+
+from modules.common.metrics import metrics
+
+from settings import Database, InvalidationConfig
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+
+
+# PostgreSQL limits a notification payload to 8000 bytes
+MAX_PAYLOAD_SIZE = 7900
+RECONNECT_DELAY_SECONDS = 1
+
+
+class Channel(enum.Enum):
+    """
+    Kinds of changed state, each delivered over its own PostgreSQL
+    channel. Keys are identifiers of:
+
+    SESSIONS: sessions logged out, closed or with rotated tokens
+    USERS: users updated or deleted, covering all their sessions
+    LINKS: users whose links changed
+    COLLECTIONS: users whose collections or their links changed
+    """
+    SESSIONS = 'sessions'
+    USERS = 'users'
+    LINKS = 'links'
+    COLLECTIONS = 'collections'
+
+    @property
+    def pg_name(self) -> str:
+        return f'{Database.prefix}invalidate_{self.value}'
+
+
+# Called with the changed keys, or with None when any key may have changed
+Subscriber = Callable[[set[str] | None], None]
+
+
+def get_dsn(url: str) -> str:
+    """Converts an SQLAlchemy URL to one accepted by asyncpg"""
+    return make_url(url).set(drivername='postgresql').render_as_string(
+        hide_password=False
+    )
+
+
+def split_payloads(origin: str, keys: set[str]) -> list[str]:
+    """Joins keys into as few payloads under the size limit as possible"""
+    payloads, chunk, size = [], [], len(origin) + 1
+    for key in sorted(keys):
+        if chunk and size + len(key) + 1 > MAX_PAYLOAD_SIZE:
+            payloads.append(f'{origin}:{",".join(chunk)}')
+            chunk, size = [], len(origin) + 1
+        chunk.append(key)
+        size += len(key) + 1
+    if chunk:
+        payloads.append(f'{origin}:{",".join(chunk)}')
+    return payloads
+
+
+class InvalidationBus:
+    """
+    Tells in-process caches of every worker and replica that state they
+    hold has changed, over PostgreSQL LISTEN/NOTIFY.
+
+    Services publish changed keys after commit. Subscribers of the
+    publishing process are called right away, and the keys are sent to
+    other processes with pg_notify once per `coalesce_seconds`, so a burst
+    of changes makes a few notifications. Every process listens on one
+    dedicated connection outside the pool and delivers received keys to
+    its subscribers once per `coalesce_seconds` as well.
+
+    Processes which do not listen, e.g. the worker, call
+    `start_publishing` to send keys to other processes right away instead,
+    and `flush` waits for the sends before the process exits. Other
+    processes which have not started the bus, and every process when the
+    bus is disabled, only notify their own subscribers.
+
+    Notifications sent while the listener is disconnected are lost, so on
+    every (re)connect subscribers are told that anything may have changed,
+    and caches keep entries for a short fallback TTL until then (see
+    `is_connected`).
+
+    Attributes:
+        enabled (bool): whether keys are sent to other processes
+        origin (str): identifier of this process in payloads, used to skip
+            its own notifications
+    """
+
+    def __init__(
+            self,
+            enabled: bool,
+            database_url: str | None,
+            coalesce_seconds: float,
+            ping_interval: float,
+            max_reconnect_delay: float
+    ):
+        self.enabled = enabled
+        self.database_url = database_url
+        self.coalesce_seconds = coalesce_seconds
+        self.ping_interval = ping_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self._subscribers: dict[Channel, list[Subscriber]] = {
+            channel: [] for channel in Channel
+        }
+        self._channels = {channel.pg_name: channel for channel in Channel}
+        self._outgoing: dict[Channel, set[str]] = {}
+        self._incoming: dict[Channel, set[str]] = {}
+        self._published: asyncio.Event | None = None
+        self._received: asyncio.Event | None = None
+        self._connected = False
+        self._tasks: list[asyncio.Task] = []
+        self._sending: set[asyncio.Task] = set()
+        self._publishing = False
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether changes made by other processes are being received"""
+        return self._connected
+
+    def subscribe(self, channel: Channel, subscriber: Subscriber) -> None:
+        self._subscribers[channel].append(subscriber)
+
+    def _dispatch(self, channel: Channel, keys: set[str] | None) -> None:
+        for subscriber in self._subscribers[channel]:
+            try:
+                subscriber(keys)
+            except Exception:
+                logger.exception(
+                    f'Invalidation subscriber of {channel.value} has failed'
+                )
+
+    def publish(self, channel: Channel, *keys) -> None:
+        """
+        Publishes changed keys. Must be called after the change is
+        committed, otherwise other processes may reload the old state.
+        """
+        keys = {str(key) for key in keys if key is not None}
+        if not keys:
+            return
+        self._dispatch(channel, keys)
+        if not (self._tasks or self._publishing):
+            return
+        self._outgoing.setdefault(channel, set()).update(keys)
+        if self._tasks:
+            self._published.set()
+        else:
+            task = asyncio.get_running_loop().create_task(self._send())
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _notify(self) -> None:
+        outgoing, self._outgoing = self._outgoing, {}
+        if not outgoing or database.engine is None:
+            return
+        async with database.engine.connect() as connection:
+            for channel, keys in outgoing.items():
+                for payload in split_payloads(self.origin, keys):
+                    await connection.execute(
+                        select(func.pg_notify(channel.pg_name, payload))
+                    )
+                    metrics.increment('invalidation.published')
+            await connection.commit()
+
+    async def _send(self) -> None:
+        try:
+            await self._notify()
+        except Exception as e:
+            # Other processes expire the entries by TTL at worst
+            metrics.increment('invalidation.publish_failures')
+            logger.warning(f'Invalidation publishing failed: {e}')
+
+    def start_publishing(self) -> None:
+        """Sends published keys right away, without listening"""
+        self._publishing = self.enabled
+
+    async def flush(self) -> None:
+        """Waits for keys published after `start_publishing` to be sent"""
+        while self._sending:
+            await asyncio.gather(*self._sending)
+
+    async def _run_publisher(self) -> None:
+        while True:
+            await self._published.wait()
+            await asyncio.sleep(self.coalesce_seconds)
+            self._published.clear()
+            await self._send()
+
+    def _on_notification(self, connection, pid, pg_channel, payload) -> None:
+        origin, _, keys = payload.partition(':')
+        if origin == self.origin:
+            return
+        channel = self._channels[pg_channel]
+        self._incoming.setdefault(channel, set()).update(keys.split(','))
+        self._received.set()
+        metrics.increment('invalidation.received')
+
+    async def _run_dispatcher(self) -> None:
+        while True:
+            await self._received.wait()
+            await asyncio.sleep(self.coalesce_seconds)
+            self._received.clear()
+            incoming, self._incoming = self._incoming, {}
+            for channel, keys in incoming.items():
+                self._dispatch(channel, keys)
+
+    async def _listen(self, connection: asyncpg.Connection) -> None:
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        for pg_channel in self._channels:
+            await connection.add_listener(pg_channel, self._on_notification)
+        self._connected = True
+        logger.info('Invalidation listener is connected')
+        for channel in Channel:
+            self._dispatch(channel, None)
+        # A dropped TCP connection is noticed only when it is used
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), self.ping_interval)
+            except asyncio.TimeoutError:
+                await connection.fetchval(
+                    'SELECT 1', timeout=self.ping_interval
+                )
+
+    async def _run_listener(self) -> None:
+        delay = RECONNECT_DELAY_SECONDS
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    get_dsn(self.database_url)
+                )
+            except Exception as e:
+                metrics.increment('invalidation.connect_failures')
+                logger.warning(
+                    f'Invalidation listener could not connect, retrying in '
+                    f'{delay}s: {e}'
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            delay = RECONNECT_DELAY_SECONDS
+            try:
+                await self._listen(connection)
+            except Exception as e:
+                logger.warning(f'Invalidation listener has failed: {e}')
+            finally:
+                self._connected = False
+                connection.terminate()
+            metrics.increment('invalidation.disconnects')
+            logger.warning('Invalidation listener is disconnected')
+
+    def start(self) -> None:
+        if self._tasks or not self.enabled:
+            return
+        metrics.gauge('invalidation.connected', lambda: int(self._connected))
+        self._published = asyncio.Event()
+        self._received = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run_listener()),
+            asyncio.create_task(self._run_dispatcher()),
+            asyncio.create_task(self._run_publisher()),
+        ]
+
+    async def stop(self) -> None:
+        """Stops listening and sends keys published since the last send"""
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self._notify()
+        except Exception as e:
+            logger.warning(f'Invalidation publishing failed: {e}')
+
+
+invalidation_bus = InvalidationBus(
+    enabled=InvalidationConfig.enabled,
+    database_url=InvalidationConfig.database_url,
+    coalesce_seconds=InvalidationConfig.coalesce_seconds,
+    ping_interval=InvalidationConfig.ping_interval,
+    max_reconnect_delay=InvalidationConfig.max_reconnect_delay
+)
@@ -0,0 +1,97 @@
+import time
+from typing import Any
+
+from modules.common.metrics import metrics
+from modules.invalidation.bus import Channel, InvalidationBus
+
+from settings import InvalidationConfig
+
+
+class LocalCache:
+    """
+    Per-process cache kept consistent across workers by the invalidation
+    bus.
+
+    Entries live for `ttl` seconds while the bus is connected, and for
+    `fallback_ttl` seconds otherwise, as changes of other processes are
+    not received then. An entry is dropped when its key or one of its tags
+    is published to a channel the cache is attached to.
+
+    A value loaded from the database while an invalidation comes in may
+    already be stale, so `generation` is read before loading and passed to
+    `put`, which ignores the value if anything was invalidated since.
+
+    Hits and misses are counted in `cache.<name>.*` metrics.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            bus: InvalidationBus,
+            ttl: float = InvalidationConfig.cache_ttl,
+            fallback_ttl: float = InvalidationConfig.cache_fallback_ttl,
+            max_size: int = InvalidationConfig.cache_max_size
+    ):
+        self.name = name
+        self.bus = bus
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.max_size = max_size
+        self.generation = 0
+        # key: (value, stored at, tags)
+        self._entries: dict[str, tuple[Any, float, tuple[str, ...]]] = {}
+        self._tagged: dict[str, set[str]] = {}
+        metrics.gauge(f'cache.{name}.size', lambda: len(self._entries))
+
+    def attach(self, *channels: Channel) -> 'LocalCache':
+        for channel in channels:
+            self.bus.subscribe(channel, self.invalidate)
+        return self
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        ttl = self.ttl if self.bus.is_connected else self.fallback_ttl
+        if entry is None or time.monotonic() - entry[1] > ttl:
+            metrics.increment(f'cache.{self.name}.misses')
+            return None
+        metrics.increment(f'cache.{self.name}.hits')
+        return entry[0]
+
+    def put(
+            self,
+            key: str,
+            value: Any,
+            generation: int,
+            tags: tuple[str, ...] = ()
+    ) -> None:
+        if generation != self.generation:
+            return
+        self._remove(key)
+        while len(self._entries) >= self.max_size:
+            self._remove(next(iter(self._entries)))
+        self._entries[key] = (value, time.monotonic(), tags)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def invalidate(self, keys: set[str] | None) -> None:
+        """Drops entries with the keys or tags, or all of them for None"""
+        self.generation += 1
+        if keys is None:
+            self._entries.clear()
+            self._tagged.clear()
+            return
+        for key in keys:
+            self._remove(key)
+            for tagged_key in self._tagged.pop(key, set()):
+                self._remove(tagged_key)
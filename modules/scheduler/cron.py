@@ -0,0 +1,98 @@
+import datetime
+
+
+FIELD_RANGES = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+)
+
+# Longest time a valid schedule can go without matching (a leap day that
+# has to fall on a given weekday), used to reject impossible ones
+MAX_SEARCH_YEARS = 28
+
+
+def parse_field(value: str, low: int, high: int) -> frozenset[int]:
+    """
+    Parses one field of a cron expression: *, 5, 1-5, */15, 1-30/10 or a
+    comma-separated list of them.
+    """
+    result = set()
+    for part in value.split(','):
+        values, _, step = part.partition('/')
+        if values == '*':
+            start, end = low, high
+        elif '-' in values:
+            start, end = (int(item) for item in values.split('-', 1))
+        else:
+            start = end = int(values)
+        if start < low or end > high or start > end:
+            raise ValueError(f'Invalid cron field: {value}')
+        result.update(range(start, end + 1, int(step) if step else 1))
+    return frozenset(result)
+
+
+class CronSchedule:
+    """
+    Schedule in the five-field cron format (minute, hour, day of month,
+    month, day of week, Sunday is 0), e.g. '30 4 * * *'. As in cron, if
+    both days of month and of week are restricted, a day matching either
+    of them matches.
+
+    Attributes:
+        expression (str): the cron expression
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != len(FIELD_RANGES):
+            raise ValueError(f'Invalid cron expression: {expression}')
+        (
+            self.minutes, self.hours, self.days, self.months, weekdays
+        ) = (
+            parse_field(field, low, high)
+            for field, (_, low, high) in zip(fields, FIELD_RANGES)
+        )
+        # Both 0 and 7 stand for Sunday
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def __repr__(self) -> str:
+        return f'CronSchedule({self.expression!r})'
+
+    def matches_day(self, moment: datetime.datetime) -> bool:
+        in_days = moment.day in self.days
+        # isoweekday() is 7 for Sunday
+        in_weekdays = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def get_next(self, after: datetime.datetime) -> datetime.datetime:
+        """Returns the first matching minute later than `after`"""
+        moment = after.replace(second=0, microsecond=0) + datetime.timedelta(
+            minutes=1
+        )
+        limit = moment.replace(year=moment.year + MAX_SEARCH_YEARS, day=1)
+        # Every step skips a whole non-matching unit, so the loop is short
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0)
+                          + datetime.timedelta(days=32)).replace(day=1)
+            elif not self.matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(
+                    days=1
+                )
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + datetime.timedelta(
+                    hours=1
+                )
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f'Cron expression never matches: {self.expression}')
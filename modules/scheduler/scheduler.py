@@ -0,0 +1,163 @@
+import asyncio
+import dataclasses
+import hashlib
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+import database
+
+from logger import logger
+
+from modules.common.metrics import metrics
+from modules.scheduler.cron import CronSchedule
+from modules.time.helpers import get_utc_now
+
+from sqlalchemy import func, select
+
+
+DEFAULT_STOP_TIMEOUT = 30
+
+
+def get_lock_key(name: str) -> int:
+    """Returns a stable signed 64-bit advisory lock key for the job name"""
+    digest = hashlib.sha1(f'scheduler:{name}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+@dataclasses.dataclass
+class ScheduledJob:
+    """
+    Attributes:
+        name (str): unique name used in logs, metrics and the lock key
+        schedule (CronSchedule): when the job is run, in UTC
+        func (Callable): coroutine function doing the work
+        jitter (float): maximum random delay in seconds added to every
+            run, so replicas and jobs sharing a schedule do not start at
+            the same moment
+        single_instance (bool): whether the job may run on one replica at
+            a time only, guarded by a PostgreSQL advisory lock
+    """
+    name: str
+    schedule: CronSchedule
+    func: Callable[[], Awaitable[Any]]
+    jitter: float = 0
+    single_instance: bool = True
+
+
+class Scheduler:
+    """
+    Runs periodic jobs inside a long-lived asyncio process.
+
+    Every job has its own loop sleeping until the next cron time plus a
+    random jitter. A run is skipped if the previous one is still going on
+    in this process, or if another replica holds the job's advisory lock.
+    The lock is taken with pg_try_advisory_xact_lock in a transaction kept
+    open during the run, so it is released even if the process dies and
+    works behind pgbouncer in transaction mode.
+
+    Durations are reported as `scheduler.<job>.duration` timings, and the
+    numbers of runs, failures, overlaps (skipped in this process) and
+    locked (skipped for another replica) as counters with the same prefix.
+    """
+
+    def __init__(self, jobs: list[ScheduledJob] | None = None):
+        self.jobs: dict[str, ScheduledJob] = {}
+        self._loops: list[asyncio.Task] = []
+        self._runs: dict[str, asyncio.Task] = {}
+        for job in jobs or []:
+            self.add(job)
+
+    def add(self, job: ScheduledJob) -> None:
+        if job.name in self.jobs:
+            raise ValueError(f'Job {job.name} is already scheduled')
+        self.jobs[job.name] = job
+
+    async def _execute(self, job: ScheduledJob) -> None:
+        prefix = f'scheduler.{job.name}'
+        started = time.monotonic()
+        try:
+            await job.func()
+        except Exception:
+            metrics.increment(f'{prefix}.failures')
+            logger.exception(f'Scheduled job {job.name} has failed')
+        else:
+            metrics.increment(f'{prefix}.runs')
+        finally:
+            duration = time.monotonic() - started
+            metrics.observe(f'{prefix}.duration', duration)
+            logger.info(f'Scheduled job {job.name} took {duration:.2f}s')
+
+    async def run_job(self, job: ScheduledJob) -> bool:
+        """
+        Runs the job once unless another replica is running it.
+
+        Returns:
+            whether the job was run
+        """
+        if not job.single_instance:
+            await self._execute(job)
+            return True
+        try:
+            async with database.engine.connect() as connection:
+                async with connection.begin():
+                    locked = await connection.scalar(
+                        select(func.pg_try_advisory_xact_lock(
+                            get_lock_key(job.name)
+                        ))
+                    )
+                    if not locked:
+                        metrics.increment(f'scheduler.{job.name}.locked')
+                        logger.info(
+                            f'Scheduled job {job.name} is running on '
+                            f'another replica, skipped'
+                        )
+                        return False
+                    await self._execute(job)
+        except Exception:
+            # Errors of the job are handled by _execute, so this one comes
+            # from the connection holding the lock
+            metrics.increment(f'scheduler.{job.name}.failures')
+            logger.exception(f'Lock of scheduled job {job.name} has failed')
+            return False
+        return True
+
+    async def _loop(self, job: ScheduledJob) -> None:
+        run_at = get_utc_now()
+        while True:
+            # Counted from the previous run time as well, so a sleep that
+            # ends a bit early cannot run the job twice for the same time
+            now = get_utc_now()
+            run_at = job.schedule.get_next(max(now, run_at))
+            delay = (run_at - now).total_seconds()
+            await asyncio.sleep(delay + random.uniform(0, job.jitter))
+            running = self._runs.get(job.name)
+            if running is not None and not running.done():
+                metrics.increment(f'scheduler.{job.name}.overlaps')
+                logger.warning(
+                    f'Scheduled job {job.name} is still running, skipped'
+                )
+                continue
+            self._runs[job.name] = asyncio.create_task(self.run_job(job))
+
+    def start(self) -> None:
+        for job in self.jobs.values():
+            logger.info(
+                f'Scheduled job {job.name}: {job.schedule.expression}'
+            )
+            self._loops.append(asyncio.create_task(self._loop(job)))
+
+    async def stop(self, timeout: float = DEFAULT_STOP_TIMEOUT) -> None:
+        """Stops scheduling and waits up to `timeout` for running jobs"""
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops.clear()
+        running = [task for task in self._runs.values() if not task.done()]
+        if running:
+            logger.info(f'Waiting for {len(running)} running jobs')
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        self._runs.clear()
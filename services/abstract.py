@@ -7,6 +7,8 @@ from fastapi import HTTPException
 
 from pydantic import BaseModel
 
+from services.email_outbox import email_outbox_dispatcher
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -76,13 +78,16 @@ class AbstractRegistration(ABC):
     async def _send_confirmation_code(
             self,
             request: BaseModel,
-            confirmation_code: str
+            confirmation_code: str,
+            db_session: AsyncSession
     ):
         """
         Abstract method to send confirmation code.
 
         This method must be implemented by subclasses to provide
-        the specific logic for sending of confirmation code.
+        the specific logic for sending of confirmation code. It is called
+        inside the registration transaction, so it should only enqueue
+        the message (e.g. to the email outbox) rather than send it.
         """
 
     async def register(
@@ -119,9 +124,12 @@ class AbstractRegistration(ABC):
             user, db_session
         )
 
-        await self._send_confirmation_code(request, confirmation_code)
+        await self._send_confirmation_code(
+            request, confirmation_code, db_session
+        )
 
         await db_session.commit()
+        email_outbox_dispatcher.wake_up()
 
         return user
 
@@ -156,10 +164,11 @@ class AbstractPasswordRecovery(ABC):
             self,
             user: UserModel,
             db_session: AsyncSession
-    ) -> ConfirmationCodeModel:
+    ) -> tuple[ConfirmationCodeModel, str]:
         """
         Abstract method for confirmation code creating.
-        Returns created confirmation code
+        Returns created confirmation code and the code itself, as only
+        its hash is stored in the model
 
         This method must be implemented by subclasses to provide
         the specific logic for confirmation code creating.
@@ -169,13 +178,16 @@ class AbstractPasswordRecovery(ABC):
     async def _send_confirmation_code(
             self,
             credentials: BaseModel,
-            confirmation_code: str
+            confirmation_code: str,
+            db_session: AsyncSession
     ):
         """
         Abstract method to send confirmation code.
 
         This method must be implemented by subclasses to provide
-        the specific logic for sending of confirmation code.
+        the specific logic for sending of confirmation code. It is called
+        inside the request transaction, so it should only enqueue
+        the message (e.g. to the email outbox) rather than send it.
         """
 
     async def password_recovery_request(
@@ -200,13 +212,16 @@ class AbstractPasswordRecovery(ABC):
                 detail='Wrong credentials'
             )
 
-        confirmation_code = await self._create_confirmation_code(
+        confirmation_code, code = await self._create_confirmation_code(
             user,
             db_session
         )
 
-        await self._send_confirmation_code(credentials, confirmation_code.code)
+        await self._send_confirmation_code(
+            credentials, code, db_session
+        )
 
         await db_session.commit()
+        email_outbox_dispatcher.wake_up()
 
         return confirmation_code
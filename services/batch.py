@@ -0,0 +1,307 @@
+import asyncio
+import http
+from uuid import UUID
+
+from database import Session
+from database.models import LinkModel
+
+from fastapi import HTTPException
+
+from logger import logger
+
+from modules.common.deadline import is_deadline_error
+
+from services.collection import CollectionManager
+from services.link import LinkManager
+from services.rate_limit import rate_limits
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.schemes.batch import (
+    AddLinkOperation,
+    BatchMode,
+    BatchOperation,
+    BatchResultScheme,
+    CreateCollectionOperation,
+    CreateLinkOperation,
+    DeleteCollectionOperation,
+    DeleteLinkOperation,
+    ObjectId,
+    RemoveLinkOperation,
+    UpdateCollectionOperation,
+    UpdateLinkOperation
+)
+from src.api.schemes.collection import CollectionOutScheme
+from src.api.schemes.link import LinkOutScheme, PageDataScheme
+
+
+MAX_CONCURRENT_FETCHES = 10
+
+ResultData = LinkOutScheme | CollectionOutScheme | None
+
+
+def get_link_out(link: LinkModel) -> LinkOutScheme:
+    return LinkOutScheme(
+        id=link.id,
+        page_title=link.page_title,
+        description=link.description,
+        image_url=link.image_url,
+        link_type=link.link_type
+    )
+
+
+def get_error_result(error: SQLAlchemyError) -> BatchResultScheme:
+    """Returns the result of an operation failed in the database"""
+    if isinstance(error, IntegrityError):
+        # E.g. the same link created by a concurrent request
+        return BatchResultScheme(
+            success=False,
+            status_code=http.HTTPStatus.CONFLICT,
+            message='Conflicts with a concurrent change'
+        )
+    return BatchResultScheme(
+        success=False,
+        status_code=http.HTTPStatus.INTERNAL_SERVER_ERROR,
+        message='Internal server error'
+    )
+
+
+class BatchManager:
+    """
+    Runs operations of a batch on links and collections of a user in order,
+    in one transaction of the session, through LinkManager and
+    CollectionManager.
+
+    In atomic mode the first failed operation rolls back the batch, in
+    best-effort mode every operation runs in a savepoint, so a failed one
+    is rolled back alone and the others are committed. Operations fail on
+    HTTP and database errors, except deadline errors, which fail the
+    request. Changes are published to other workers once after commit.
+
+    Pages of created links are fetched concurrently before the operations
+    run and the transaction begins, so no transaction is open while they
+    are fetched.
+    """
+
+    def __init__(self, user_id: str, db_session: AsyncSession):
+        self.user_id = user_id
+        self.db_session = db_session
+        self.link_manager = LinkManager(autocommit=False)
+        self.collection_manager = CollectionManager(autocommit=False)
+        self._results: list[BatchResultScheme] = []
+        self._pages: dict[str, PageDataScheme | HTTPException] = {}
+
+    async def run(
+            self,
+            operations: list[BatchOperation],
+            mode: BatchMode
+    ) -> tuple[bool, list[BatchResultScheme]]:
+        """
+        Returns whether the batch is committed and the result of every
+        operation.
+        """
+        await self.fetch_pages(operations)
+        for operation in operations:
+            try:
+                if mode == BatchMode.atomic:
+                    data = await self.execute(operation)
+                else:
+                    async with self.db_session.begin_nested():
+                        data = await self.execute(operation)
+            except (HTTPException, SQLAlchemyError) as e:
+                if is_deadline_error(e):
+                    raise
+                if isinstance(e, HTTPException):
+                    result = BatchResultScheme(
+                        success=False,
+                        status_code=e.status_code,
+                        message=e.detail
+                    )
+                else:
+                    logger.warning(
+                        f'Batch operation {operation.op} failed: {e}'
+                    )
+                    result = get_error_result(e)
+                self._results.append(result)
+                if mode == BatchMode.atomic:
+                    await self.db_session.rollback()
+                    return False, self.get_rolled_back(len(operations))
+                continue
+            self._results.append(BatchResultScheme(
+                success=True, status_code=http.HTTPStatus.OK, data=data
+            ))
+
+        await self.db_session.commit()
+        self.link_manager.publish_changes()
+        self.collection_manager.publish_changes()
+        return True, self._results
+
+    def get_rolled_back(self, count: int) -> list[BatchResultScheme]:
+        """Returns results of a batch rolled back by its last operation"""
+        results = [
+            BatchResultScheme(
+                success=False,
+                status_code=http.HTTPStatus.FAILED_DEPENDENCY,
+                message='Rolled back'
+            ) for _ in self._results[:-1]
+        ]
+        results.append(self._results[-1])
+        results.extend(
+            BatchResultScheme(
+                success=False,
+                status_code=http.HTTPStatus.FAILED_DEPENDENCY,
+                message='Not executed'
+            ) for _ in range(count - len(self._results))
+        )
+        return results
+
+    async def fetch_pages(self, operations: list[BatchOperation]) -> None:
+        """
+        Fetches pages of links to be created which do not exist yet, each
+        counted against the rate limit of link creation. Existing links,
+        which fail without a fetch, are looked up by a short session of
+        their own.
+        """
+        links = list(dict.fromkeys(
+            operation.link for operation in operations
+            if isinstance(operation, CreateLinkOperation)
+        ))
+        if not links:
+            return
+        # Ends the transaction authentication has read the user session
+        # in, so that its connection is not held while pages are fetched
+        await self.db_session.commit()
+        async with Session() as db_session:
+            existing = set(await db_session.scalars(
+                select(LinkModel.link).where(LinkModel.link.in_(links))
+            ))
+        fetched = []
+        for link in links:
+            if link in existing:
+                continue
+            try:
+                rate_limits.check('link_create', user_id=self.user_id)
+            except HTTPException as e:
+                self._pages[link] = e
+                continue
+            fetched.append(link)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+        async def fetch(link: str) -> None:
+            async with semaphore:
+                try:
+                    self._pages[link] = (
+                        await self.link_manager.fetch_page_data(link)
+                    )
+                except HTTPException as e:
+                    self._pages[link] = e
+
+        await asyncio.gather(*(fetch(link) for link in fetched))
+
+    def resolve(self, object_id: ObjectId) -> UUID:
+        """Returns the id, or the id of the object of an earlier result"""
+        if isinstance(object_id, UUID):
+            return object_id
+        index = int(object_id[1:])
+        if index < len(self._results):
+            data = self._results[index].data
+            if data is not None:
+                return data.id
+        raise HTTPException(
+            status_code=http.HTTPStatus.BAD_REQUEST,
+            detail=f'Operation {object_id} has no object to refer to'
+        )
+
+    async def execute(self, operation: BatchOperation) -> ResultData:
+        return await getattr(self, operation.op)(operation)
+
+    async def create_link(self, operation: CreateLinkOperation) -> ResultData:
+        page_data = self._pages.get(operation.link)
+        if isinstance(page_data, HTTPException):
+            raise page_data
+        link = await self.link_manager.create(
+            link=operation.link,
+            user_id=self.user_id,
+            db_session=self.db_session,
+            page_data=page_data
+        )
+        return get_link_out(link)
+
+    async def update_link(self, operation: UpdateLinkOperation) -> ResultData:
+        link = await self.link_manager.update(
+            link_id=self.resolve(operation.link_id),
+            link_data=operation.data,
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return get_link_out(link)
+
+    async def delete_link(self, operation: DeleteLinkOperation) -> ResultData:
+        await self.link_manager.delete(
+            link_id=self.resolve(operation.link_id),
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return None
+
+    async def create_collection(
+            self,
+            operation: CreateCollectionOperation
+    ) -> ResultData:
+        collection = await self.collection_manager.create(
+            collection_data=operation.data,
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return CollectionOutScheme(
+            id=collection.id,
+            title=collection.title,
+            description=collection.description
+        )
+
+    async def update_collection(
+            self,
+            operation: UpdateCollectionOperation
+    ) -> ResultData:
+        collection = await self.collection_manager.update(
+            collection_id=self.resolve(operation.collection_id),
+            collection_data=operation.data,
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return CollectionOutScheme(
+            id=collection.id,
+            title=collection.title,
+            description=collection.description
+        )
+
+    async def delete_collection(
+            self,
+            operation: DeleteCollectionOperation
+    ) -> ResultData:
+        await self.collection_manager.delete(
+            collection_id=self.resolve(operation.collection_id),
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return None
+
+    async def add_link(self, operation: AddLinkOperation) -> ResultData:
+        await self.collection_manager.add_link(
+            link_id=self.resolve(operation.link_id),
+            collection_id=self.resolve(operation.collection_id),
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return None
+
+    async def remove_link(self, operation: RemoveLinkOperation) -> ResultData:
+        await self.collection_manager.remove_link(
+            link_id=self.resolve(operation.link_id),
+            collection_id=self.resolve(operation.collection_id),
+            user_id=self.user_id,
+            db_session=self.db_session
+        )
+        return None
@@ -0,0 +1,307 @@
+import asyncio
+import uuid
+
+from database import ReplicaSession, Session
+from database.models import (
+    BulkEmailCampaignModel, BulkEmailCampaignStatus, UserModel
+)
+
+from logger import logger
+
+from modules.email.bulk import BulkEmailProvider, BulkRecipient
+from modules.time.helpers import get_utc_now
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Failed send attempts by user id, kept in campaign.provider_data
+FAILED_RECIPIENTS = 'failed_recipients'
+# Recipients whose emails failed this many times are given up
+MAX_SEND_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 30
+
+COHORTS = {
+    'all': (),
+    'verified': (UserModel.email_verified.is_(True),),
+    'unverified': (UserModel.email_verified.is_(False),),
+}
+
+
+def get_cohort_criteria(cohort: str) -> tuple:
+    return (
+        UserModel.get_criteria(),
+        UserModel.email.is_not(None),
+        *COHORTS[cohort]
+    )
+
+
+class BulkEmailCampaignService:
+    @staticmethod
+    async def get_or_create(
+            name: str,
+            cohort: str,
+            subject: str,
+            template_id: str | None,
+            db_session: AsyncSession
+    ) -> BulkEmailCampaignModel:
+        """
+        Returns the campaign with given name, creating it on the first run.
+        Parameters of an existing campaign are kept, so a resumed run sends
+        the same email to the same cohort.
+        """
+        campaign = await db_session.scalar(
+            select(BulkEmailCampaignModel).where(
+                BulkEmailCampaignModel.name == name
+            )
+        )
+        if campaign is None:
+            campaign = BulkEmailCampaignModel(
+                name=name,
+                cohort=cohort,
+                subject=subject,
+                template_id=template_id,
+                provider_data={}
+            )
+            db_session.add(campaign)
+            await db_session.commit()
+        return campaign
+
+    @staticmethod
+    async def save_checkpoint(
+            campaign: BulkEmailCampaignModel,
+            last_user_id: uuid.UUID,
+            sent: int,
+            failed: list[BulkRecipient],
+            db_session: AsyncSession
+    ) -> None:
+        campaign.last_user_id = last_user_id
+        campaign.recipients_count += sent
+        BulkEmailCampaignService.record_attempts(campaign, [], failed)
+        await db_session.commit()
+
+    @staticmethod
+    def record_attempts(
+            campaign: BulkEmailCampaignModel,
+            retried: list[str],
+            failed: list[BulkRecipient]
+    ) -> None:
+        """
+        Counts failed attempts of recipients, and forgets retried ones
+        which have not failed again.
+        """
+        failures = dict(campaign.provider_data.get(FAILED_RECIPIENTS, {}))
+        failed_ids = {str(recipient.user_id) for recipient in failed}
+        for user_id in retried:
+            if user_id not in failed_ids:
+                failures.pop(user_id, None)
+        for user_id in failed_ids:
+            failures[user_id] = failures.get(user_id, 0) + 1
+        # Assigned anew, as changes inside the nested dict are not tracked
+        campaign.provider_data[FAILED_RECIPIENTS] = failures
+
+    @staticmethod
+    async def complete(
+            campaign: BulkEmailCampaignModel,
+            db_session: AsyncSession
+    ) -> None:
+        campaign.status = BulkEmailCampaignStatus.completed
+        campaign.completed_at = get_utc_now()
+        await db_session.commit()
+
+
+class BulkEmailSender:
+    """
+    Sends a campaign to every user of its cohort.
+
+    Recipients are read in primary key order in keyset pages of one
+    batch, each by its own short query, so memory usage does not depend on
+    the cohort size and no cursor or transaction is held open on the
+    replica while the rate-limited provider sends. After every batch the
+    last user id is saved, and both the next page and a restarted run
+    continue after it.
+
+    Recipients whose emails failed are saved with the checkpoint and sent
+    again once all pages are processed, every RETRY_DELAY_SECONDS, until
+    they fail MAX_SEND_ATTEMPTS times; the given up ones are kept in
+    campaign.provider_data.
+
+    Attributes:
+        provider (BulkEmailProvider): provider sending the batches
+        batch_size (int): number of recipients in one batch, limited by
+            provider.max_batch_size
+    """
+
+    def __init__(self, provider: BulkEmailProvider, batch_size: int):
+        self.provider = provider
+        self.batch_size = min(batch_size, provider.max_batch_size)
+
+    @staticmethod
+    def get_substitutions(email: str, created_at) -> dict[str, str]:
+        return {
+            'email': email,
+            'registered_at': created_at.date().isoformat(),
+        }
+
+    def get_recipients(self, rows) -> list[BulkRecipient]:
+        return [
+            BulkRecipient(
+                user_id=user_id,
+                email=email,
+                substitutions=self.get_substitutions(email, created_at)
+            )
+            for user_id, email, created_at in rows
+        ]
+
+    @staticmethod
+    def get_recipients_query(campaign: BulkEmailCampaignModel) -> Select:
+        query = select(
+            UserModel.id, UserModel.email, UserModel.created_at
+        ).where(
+            *get_cohort_criteria(campaign.cohort)
+        ).order_by(UserModel.id)
+        if campaign.last_user_id is not None:
+            query = query.where(UserModel.id > campaign.last_user_id)
+        return query
+
+    @staticmethod
+    async def count_remaining(
+            campaign: BulkEmailCampaignModel,
+            db_session: AsyncSession
+    ) -> int:
+        query = select(func.count()).where(
+            *get_cohort_criteria(campaign.cohort)
+        )
+        if campaign.last_user_id is not None:
+            query = query.where(UserModel.id > campaign.last_user_id)
+        return await db_session.scalar(query)
+
+    async def send(
+            self,
+            campaign: BulkEmailCampaignModel,
+            db_session: AsyncSession
+    ) -> int:
+        """
+        Sends the campaign to all remaining recipients.
+
+        Args:
+            campaign (BulkEmailCampaignModel): campaign to send
+            db_session (AsyncSession): session the campaign belongs to,
+                with expire_on_commit disabled. Used to save checkpoints
+
+        Returns:
+            number of recipients processed by this run
+        """
+        if campaign.status == BulkEmailCampaignStatus.completed:
+            logger.info(f'Campaign {campaign.name} is already completed')
+            return 0
+
+        await self.provider.prepare(campaign)
+        await db_session.commit()
+
+        processed = 0
+        async with ReplicaSession() as read_session:
+            remaining = await self.count_remaining(campaign, read_session)
+        logger.info(
+            f'Sending campaign {campaign.name} to about {remaining} '
+            f'recipients, {campaign.recipients_count} already processed'
+        )
+        while True:
+            async with ReplicaSession() as read_session:
+                rows = (await read_session.execute(
+                    self.get_recipients_query(campaign).limit(
+                        self.batch_size
+                    )
+                )).all()
+            if not rows:
+                break
+            recipients = self.get_recipients(rows)
+            failed = await self.provider.send_batch(campaign, recipients)
+            await BulkEmailCampaignService.save_checkpoint(
+                campaign,
+                last_user_id=recipients[-1].user_id,
+                sent=len(recipients),
+                failed=failed,
+                db_session=db_session
+            )
+            processed += len(recipients)
+            logger.info(
+                f'Campaign {campaign.name}: {processed}/{remaining} '
+                f'recipients processed'
+            )
+            if len(rows) < self.batch_size:
+                break
+
+        await self.retry_failed(campaign, db_session)
+        await self.provider.finish(campaign)
+        await BulkEmailCampaignService.complete(campaign, db_session)
+        return processed
+
+    async def retry_failed(
+            self,
+            campaign: BulkEmailCampaignModel,
+            db_session: AsyncSession
+    ) -> None:
+        """Sends again to recipients whose emails failed"""
+        while True:
+            failures = campaign.provider_data.get(FAILED_RECIPIENTS, {})
+            user_ids = [
+                user_id for user_id, attempts in failures.items()
+                if attempts < MAX_SEND_ATTEMPTS
+            ]
+            if not user_ids:
+                break
+            logger.info(
+                f'Campaign {campaign.name}: retrying {len(user_ids)} '
+                f'failed recipients in {RETRY_DELAY_SECONDS}s'
+            )
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+            for start in range(0, len(user_ids), self.batch_size):
+                retried = user_ids[start:start + self.batch_size]
+                async with ReplicaSession() as read_session:
+                    # Users which have left the cohort are not sent again
+                    rows = (await read_session.execute(
+                        select(
+                            UserModel.id, UserModel.email,
+                            UserModel.created_at
+                        ).where(
+                            *get_cohort_criteria(campaign.cohort),
+                            UserModel.id.in_(retried)
+                        )
+                    )).all()
+                failed = []
+                if rows:
+                    failed = await self.provider.send_batch(
+                        campaign, self.get_recipients(rows)
+                    )
+                BulkEmailCampaignService.record_attempts(
+                    campaign, retried, failed
+                )
+                await db_session.commit()
+
+        given_up = len(campaign.provider_data.get(FAILED_RECIPIENTS, {}))
+        if given_up:
+            logger.warning(
+                f'Campaign {campaign.name}: {given_up} recipients were not '
+                f'sent after {MAX_SEND_ATTEMPTS} attempts'
+            )
+
+
+async def send_bulk_email(
+        name: str,
+        cohort: str,
+        subject: str,
+        template_id: str | None,
+        provider: BulkEmailProvider,
+        batch_size: int
+) -> int:
+    async with Session(expire_on_commit=False) as db_session:
+        campaign = await BulkEmailCampaignService.get_or_create(
+            name=name,
+            cohort=cohort,
+            subject=subject,
+            template_id=template_id,
+            db_session=db_session
+        )
+        sender = BulkEmailSender(provider=provider, batch_size=batch_size)
+        return await sender.send(campaign, db_session)
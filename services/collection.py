@@ -10,6 +10,9 @@ from database.models import (
 
 from fastapi import HTTPException
 
+from modules.common.mixins import TransactionMixin
+from modules.invalidation.bus import Channel
+
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -17,7 +20,7 @@ from sqlalchemy.orm import selectinload
 from src.api.schemes.collection import CollectionDataScheme
 
 
-class CollectionManager:
+class CollectionManager(TransactionMixin):
     async def get(
             self,
             collection_id: UUID,
@@ -66,7 +69,7 @@ class CollectionManager:
         )
 
         db_session.add(new_collection)
-        await db_session.commit()
+        await self.save(db_session, (Channel.COLLECTIONS, user_id))
         await db_session.refresh(new_collection)
         return new_collection
 
@@ -98,7 +101,7 @@ class CollectionManager:
             if hasattr(original_collection, key):
                 setattr(original_collection, key, value)
 
-        await db_session.commit()
+        await self.save(db_session, (Channel.COLLECTIONS, user_id))
 
         await db_session.refresh(original_collection)
 
@@ -128,7 +131,7 @@ class CollectionManager:
             )
 
         await db_session.delete(db_collection)
-        await db_session.commit()
+        await self.save(db_session, (Channel.COLLECTIONS, user_id))
 
     async def add_link(
             self,
@@ -190,7 +193,7 @@ class CollectionManager:
         )
 
         db_session.add(association)
-        await db_session.commit()
+        await self.save(db_session, (Channel.COLLECTIONS, user_id))
 
     async def remove_link(
             self,
@@ -209,14 +212,14 @@ class CollectionManager:
         result = await db_session.execute(query)
         db_association = result.scalars().one_or_none()
 
-        if db_association:
+        if not db_association:
             raise HTTPException(
                 status_code=http.HTTPStatus.BAD_REQUEST,
                 detail="Association does not exists"
             )
 
         await db_session.delete(db_association)
-        await db_session.commit()
+        await self.save(db_session, (Channel.COLLECTIONS, user_id))
 
     async def get_links(
             self,
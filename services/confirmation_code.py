@@ -1,31 +1,79 @@
 import datetime
+import hashlib
 
 from database.models import (
     ConfirmationCodeModel,
     UserModel
 )
 
-from sqlalchemy import desc, select
+from modules.time.helpers import get_utc_now
+
+from sqlalchemy import desc, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager
 
 
 class ConfirmationCodeService:
     @staticmethod
-    async def get_confirmation_code_by_code(
+    def hash_code(code: str) -> str:
+        """
+        Returns the SHA-256 hex digest stored instead of the code, so the
+        codes can be looked up by a unique index but not read from the
+        database.
+        """
+        return hashlib.sha256(code.encode()).hexdigest()
+
+    @staticmethod
+    async def get_valid_confirmation_code(
             code: str,
             db_session: AsyncSession = None
     ) -> ConfirmationCodeModel | None:
+        """
+        Returns the unused and not expired confirmation code with its user
+        loaded by the same query.
+        """
         query = (
             select(ConfirmationCodeModel)
-            .filter_by(code=code)
-            .options(
-                selectinload(ConfirmationCodeModel.user)
+            .join(ConfirmationCodeModel.user)
+            .options(contains_eager(ConfirmationCodeModel.user))
+            .where(
+                ConfirmationCodeModel.code
+                == ConfirmationCodeService.hash_code(code),
+                ConfirmationCodeModel.used.is_(False),
+                ConfirmationCodeModel.expired_at > get_utc_now()
             )
         )
         result = await db_session.execute(query)
         return result.scalars().first()
 
+    @staticmethod
+    async def use_confirmation_code(
+            code: str,
+            db_session: AsyncSession = None
+    ) -> str | None:
+        """
+        Marks the confirmation code as used unless it is already used or
+        expired. The check and the update are done by one statement, so
+        concurrent requests cannot use the same code twice.
+
+        Returns:
+            identifier of the code's user or None if the code is not valid
+        """
+        query = (
+            update(ConfirmationCodeModel)
+            .where(
+                ConfirmationCodeModel.code
+                == ConfirmationCodeService.hash_code(code),
+                ConfirmationCodeModel.used.is_(False),
+                ConfirmationCodeModel.expired_at > get_utc_now()
+            )
+            .values(used=True)
+            .returning(ConfirmationCodeModel.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db_session.execute(query)
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def get_active_confirmation_code_by_user_id(
             user_id: str,
@@ -49,7 +97,7 @@ class ConfirmationCodeService:
         await db_session.refresh(user)
 
         confirmation_code = ConfirmationCodeModel(
-            code=code,
+            code=ConfirmationCodeService.hash_code(code),
             user_id=user.id,
             expired_at=expired_at
         )
@@ -0,0 +1,299 @@
+import asyncio
+import datetime
+import random
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from database import Session
+from database.models import EmailOutboxModel, EmailOutboxStatus
+
+from logger import logger
+
+from modules.email.helpers import send_email
+from modules.time.helpers import get_utc_now
+
+from settings import EmailOutboxConfig, UnisenderConfig
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DEFAULT_SENDING_TIMEOUT = 10
+DEFAULT_STOP_TIMEOUT = 30
+MAX_ERROR_LENGTH = 1024
+
+
+class EmailOutboxService:
+    @staticmethod
+    def enqueue(
+            email: str,
+            subject: str,
+            template_data: dict,
+            template_id: str | None,
+            db_session: AsyncSession
+    ) -> EmailOutboxModel:
+        """
+        Adds an email to the outbox. The email is stored by the caller's
+        transaction and sent by the dispatcher only after it is committed.
+        """
+        message = EmailOutboxModel(
+            email=email,
+            subject=subject,
+            template_id=template_id,
+            template_data=template_data
+        )
+        db_session.add(message)
+        return message
+
+    @staticmethod
+    async def claim(
+            limit: int,
+            lease_seconds: int,
+            db_session: AsyncSession
+    ) -> list[EmailOutboxModel]:
+        """
+        Claims up to `limit` pending emails which are due for sending.
+
+        Rows locked by other dispatchers are skipped. Claimed rows get their
+        next attempt moved `lease_seconds` ahead, so the lock is released on
+        commit and the rows are not claimed again while being sent. If the
+        dispatcher dies, they become due again once the lease expires.
+        """
+        now = get_utc_now()
+        due = (
+            select(EmailOutboxModel.id)
+            .where(
+                EmailOutboxModel.status == EmailOutboxStatus.pending,
+                EmailOutboxModel.next_attempt_at <= now
+            )
+            .order_by(EmailOutboxModel.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(EmailOutboxModel)
+            .where(EmailOutboxModel.id.in_(due.scalar_subquery()))
+            .values(
+                attempts=EmailOutboxModel.attempts + 1,
+                next_attempt_at=now + datetime.timedelta(
+                    seconds=lease_seconds
+                ),
+                updated_at=now
+            )
+            .returning(EmailOutboxModel)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db_session.execute(query)
+        messages = list(result.scalars().all())
+        # Detached before commit so their attributes stay loaded while the
+        # emails are sent without a session
+        for message in messages:
+            db_session.expunge(message)
+        await db_session.commit()
+        return messages
+
+    @staticmethod
+    async def mark_sent(
+            message_ids: list[UUID],
+            db_session: AsyncSession
+    ) -> None:
+        now = get_utc_now()
+        await db_session.execute(
+            update(EmailOutboxModel)
+            .where(EmailOutboxModel.id.in_(message_ids))
+            .values(
+                status=EmailOutboxStatus.sent,
+                sent_at=now,
+                updated_at=now,
+                last_error=None
+            )
+        )
+
+    @staticmethod
+    async def mark_failed(
+            message: EmailOutboxModel,
+            error: str,
+            db_session: AsyncSession
+    ) -> None:
+        """
+        Schedules the next attempt with exponential backoff and jitter, or
+        marks the email as failed once it is out of attempts.
+        """
+        now = get_utc_now()
+        values = dict(last_error=error[:MAX_ERROR_LENGTH], updated_at=now)
+        if message.attempts >= EmailOutboxConfig.max_attempts:
+            values.update(status=EmailOutboxStatus.failed)
+        else:
+            values.update(
+                next_attempt_at=now + datetime.timedelta(
+                    seconds=get_retry_delay(message.attempts)
+                )
+            )
+        await db_session.execute(
+            update(EmailOutboxModel)
+            .where(EmailOutboxModel.id == message.id)
+            .values(**values)
+        )
+
+
+def get_retry_delay(attempts: int) -> float:
+    delay = min(
+        EmailOutboxConfig.retry_max_delay,
+        EmailOutboxConfig.retry_base_delay * 2 ** (attempts - 1)
+    )
+    return random.uniform(delay / 2, delay)
+
+
+async def send_outbox_email(message: EmailOutboxModel) -> None:
+    await asyncio.wait_for(
+        send_email(
+            subject=message.subject,
+            receiver_email=message.email,
+            params=message.template_data,
+            template_id=message.template_id
+        ),
+        timeout=float(
+            UnisenderConfig.sending_timeout or DEFAULT_SENDING_TIMEOUT
+        )
+    )
+
+
+class EmailOutboxDispatcher:
+    """
+    Sends emails from the outbox in the background.
+
+    Every dispatcher claims a batch of due emails in a short transaction,
+    sends them with at most `concurrency` requests in flight and stores the
+    results in another short transaction, so no database connection or
+    row lock is held during the HTTP calls. Several dispatchers (e.g. one
+    per API worker) may run at the same time.
+
+    Attributes:
+        send (Callable): coroutine function sending one email, raises on
+            failure
+        batch_size (int): maximum number of emails claimed at once
+        concurrency (int): maximum number of emails sent at the same time
+        poll_interval (float): seconds to wait for new emails when the
+            outbox is empty
+    """
+
+    def __init__(
+            self,
+            send: Callable[[EmailOutboxModel], Awaitable[None]] = (
+                send_outbox_email
+            ),
+            batch_size: int = EmailOutboxConfig.batch_size,
+            concurrency: int = EmailOutboxConfig.concurrency,
+            poll_interval: float = EmailOutboxConfig.poll_interval
+    ):
+        self.send = send
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wake_up = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def wake_up(self) -> None:
+        """Makes the dispatcher check the outbox without waiting for poll"""
+        self._wake_up.set()
+
+    async def _send(
+            self,
+            message: EmailOutboxModel,
+            semaphore: asyncio.Semaphore
+    ) -> str | None:
+        async with semaphore:
+            try:
+                await self.send(message)
+            except Exception as e:
+                logger.warning(
+                    f'Failed to send email {message.id} to {message.email} '
+                    f'(attempt {message.attempts}): {e!r}'
+                )
+                return repr(e)
+        return None
+
+    async def dispatch_batch(self) -> int:
+        """Sends one batch of due emails and returns its size"""
+        async with Session() as db_session:
+            messages = await EmailOutboxService.claim(
+                self.batch_size,
+                EmailOutboxConfig.lease_seconds,
+                db_session
+            )
+        if not messages:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        errors = await asyncio.gather(
+            *(self._send(message, semaphore) for message in messages)
+        )
+
+        async with Session() as db_session:
+            sent_ids = [
+                message.id for message, error in zip(messages, errors)
+                if error is None
+            ]
+            if sent_ids:
+                await EmailOutboxService.mark_sent(sent_ids, db_session)
+            for message, error in zip(messages, errors):
+                if error is not None:
+                    await EmailOutboxService.mark_failed(
+                        message, error, db_session
+                    )
+            await db_session.commit()
+
+        logger.info(
+            f'Outbox batch: {len(sent_ids)} sent, '
+            f'{len(messages) - len(sent_ids)} failed'
+        )
+        return len(messages)
+
+    async def dispatch_pending(self) -> int:
+        """Sends due emails until there are none left"""
+        total = 0
+        while processed := await self.dispatch_batch():
+            total += processed
+        return total
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                processed = await self.dispatch_batch()
+            except Exception as e:
+                logger.exception(f'Email outbox dispatching failed: {e}')
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            self._wake_up.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wake_up.wait(), timeout=self.poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self, timeout: float = DEFAULT_STOP_TIMEOUT) -> None:
+        """
+        Lets the batch being sent finish and stops the dispatcher. Emails
+        still in flight after `timeout` are sent again once their lease
+        expires.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self.wake_up()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Email outbox dispatcher stopped by timeout')
+        self._task = None
+
+
+email_outbox_dispatcher = EmailOutboxDispatcher()
@@ -0,0 +1,130 @@
+import dataclasses
+import datetime
+
+from database.models import IdempotencyKeyModel
+
+from modules.time.helpers import get_utc_now
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclasses.dataclass
+class StoredResponse:
+    status_code: int
+    content_type: str | None
+    body: bytes
+
+
+class IdempotencyService:
+    """
+    Keys of requests sent with an Idempotency-Key header.
+
+    A key is claimed by the first request with a lock, and gets its
+    response when the request completes. A key whose request has not
+    completed within the lock is considered lost and may be claimed again
+    by a retry with the same fingerprint. Every method makes one statement.
+    """
+
+    @staticmethod
+    async def get(
+            db_session: AsyncSession,
+            key: str
+    ) -> IdempotencyKeyModel | None:
+        """Returns the unexpired record of the key"""
+        return await db_session.scalar(
+            select(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.expires_at > get_utc_now()
+            )
+        )
+
+    @staticmethod
+    async def claim(
+            db_session: AsyncSession,
+            key: str,
+            fingerprint: str,
+            lock_seconds: int,
+            ttl: int
+    ) -> datetime.datetime | None:
+        """
+        Claims the key for a request: inserts it, or takes over an expired
+        record or a lost request with the same fingerprint.
+
+        Returns:
+            the time the claim is locked until, identifying it for `store`
+            and `release`, or None if another request holds the key
+        """
+        now = get_utc_now()
+        locked_until = now + datetime.timedelta(seconds=lock_seconds)
+        query = insert(IdempotencyKeyModel).values(
+            key=key,
+            fingerprint=fingerprint,
+            locked_until=locked_until,
+            expires_at=now + datetime.timedelta(seconds=ttl)
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[IdempotencyKeyModel.key],
+            set_={
+                'fingerprint': query.excluded.fingerprint,
+                'status_code': None,
+                'content_type': None,
+                'response_body': None,
+                'locked_until': query.excluded.locked_until,
+                'expires_at': query.excluded.expires_at,
+            },
+            where=or_(
+                IdempotencyKeyModel.expires_at <= now,
+                and_(
+                    IdempotencyKeyModel.status_code.is_(None),
+                    IdempotencyKeyModel.locked_until < now,
+                    IdempotencyKeyModel.fingerprint
+                    == query.excluded.fingerprint
+                )
+            )
+        ).returning(IdempotencyKeyModel.id)
+        claimed = await db_session.scalar(query)
+        await db_session.commit()
+        return locked_until if claimed is not None else None
+
+    @staticmethod
+    async def store(
+            db_session: AsyncSession,
+            key: str,
+            locked_until: datetime.datetime,
+            response: StoredResponse,
+            ttl: int
+    ) -> bool:
+        """Stores the response of the claim, unless it has been taken over"""
+        result = await db_session.execute(
+            update(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.locked_until == locked_until,
+                IdempotencyKeyModel.status_code.is_(None)
+            ).values(
+                status_code=response.status_code,
+                content_type=response.content_type,
+                response_body=response.body,
+                locked_until=None,
+                expires_at=get_utc_now() + datetime.timedelta(seconds=ttl)
+            )
+        )
+        await db_session.commit()
+        return bool(result.rowcount)
+
+    @staticmethod
+    async def release(
+            db_session: AsyncSession,
+            key: str,
+            locked_until: datetime.datetime
+    ) -> None:
+        """Deletes the claim, so that a retry runs the request again"""
+        await db_session.execute(
+            delete(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.locked_until == locked_until,
+                IdempotencyKeyModel.status_code.is_(None)
+            )
+        )
+        await db_session.commit()
@@ -9,25 +9,42 @@ from fastapi import HTTPException
 
 import httpx
 
+from modules.common import deadline
+from modules.common.http import http_clients
+from modules.common.mixins import TransactionMixin
+from modules.invalidation.bus import Channel
+
+from settings import HTTPConfig
+
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.schemes.link import PageDataScheme
 
 
-class LinkManager:
+class LinkManager(TransactionMixin):
     async def fetch_page_data(self, url: str) -> PageDataScheme:
+        timeout = deadline.get_timeout(HTTPConfig.fetch_timeout)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10)
-                response.raise_for_status()
+            response = await http_clients.default.get(url, timeout=timeout)
+            response.raise_for_status()
+        except httpx.TimeoutException:
+            deadline.check()
+            raise HTTPException(
+                status_code=400,
+                detail="Failed to fetch the URL"
+            )
         except httpx.RequestError:
             raise HTTPException(
                 status_code=400,
                 detail="Failed to fetch the URL"
             )
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        return self.parse_page_data(response.text)
+
+    def parse_page_data(self, html: str) -> PageDataScheme:
+        """Extracts Open Graph or title/description metadata from html"""
+        soup = BeautifulSoup(html, "html.parser")
 
         og_title = soup.find("meta", property="og:title")
         og_description = soup.find("meta", property="og:description")
@@ -83,8 +100,13 @@ class LinkManager:
             self,
             link: str,
             user_id: str,
-            db_session: AsyncSession
+            db_session: AsyncSession,
+            page_data: PageDataScheme | None = None
     ) -> LinkModel:
+        """
+        Creates a link with the data of its page, fetched unless it is
+        passed as `page_data`.
+        """
         query = select(LinkModel).where(LinkModel.link == link)
         result = await db_session.execute(query)
         db_link = result.scalars().one_or_none()
@@ -95,7 +117,8 @@ class LinkManager:
                 detail='Link already exists'
             )
 
-        page_data = await self.fetch_page_data(link)
+        if page_data is None:
+            page_data = await self.fetch_page_data(link)
 
         new_link = LinkModel(
             page_title=page_data.page_title,
@@ -107,7 +130,7 @@ class LinkManager:
         )
 
         db_session.add(new_link)
-        await db_session.commit()
+        await self.save(db_session, (Channel.LINKS, user_id))
         await db_session.refresh(new_link)
         return new_link
 
@@ -139,7 +162,12 @@ class LinkManager:
             if hasattr(original_link, key):
                 setattr(original_link, key, value)
 
-        await db_session.commit()
+        # Links are listed in collections as well
+        await self.save(
+            db_session,
+            (Channel.LINKS, user_id),
+            (Channel.COLLECTIONS, user_id)
+        )
 
         await db_session.refresh(original_link)
 
@@ -169,4 +197,8 @@ class LinkManager:
             )
 
         await db_session.delete(db_link)
-        await db_session.commit()
+        await self.save(
+            db_session,
+            (Channel.LINKS, user_id),
+            (Channel.COLLECTIONS, user_id)
+        )
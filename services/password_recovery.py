@@ -4,11 +4,13 @@ from database.models import ConfirmationCodeModel, UserModel
 
 from modules.common.helpers import generate_random_string
 from modules.common.mixins import SendEmailMixin
+from modules.common.templates import EmailTemplate
 
 from services.abstract import AbstractPasswordRecovery
+from services.confirmation_code import ConfirmationCodeService
 from services.user import UserService
 
-from settings import TemplatesConfig, UnisenderConfig
+from settings import TemplatesConfig
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -30,13 +32,13 @@ class EmailPasswordRecovery(AbstractPasswordRecovery, SendEmailMixin):
             self,
             user: UserModel,
             db_session: AsyncSession
-    ) -> ConfirmationCodeModel | None:
+    ) -> tuple[ConfirmationCodeModel, str]:
         code_value = generate_random_string(10)
 
         await db_session.refresh(user)
 
         confirmation_code = ConfirmationCodeModel(
-            code=code_value,
+            code=ConfirmationCodeService.hash_code(code_value),
             user_id=user.id,
             expired_at=(
                 datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
@@ -45,18 +47,20 @@ class EmailPasswordRecovery(AbstractPasswordRecovery, SendEmailMixin):
         db_session.add(confirmation_code)
         await db_session.flush()
 
-        return confirmation_code
+        return confirmation_code, code_value
 
     async def _send_confirmation_code(
             self,
             credentials: EmailRecoveryScheme,
-            confirmation_code: str
+            confirmation_code: str,
+            db_session: AsyncSession
     ) -> None:
-        await SendEmailMixin.send_email_to_user_via_unisender(
+        self.enqueue_email_to_user(
             email_address=credentials.email,
             message_subject=TemplatesConfig.subject_reset_password,
             template_data={
                 'reset_link': confirmation_code,
             },
-            template_id=UnisenderConfig.password_reset_template_id
+            template_id=EmailTemplate.reset_password,
+            db_session=db_session
         )
@@ -0,0 +1,376 @@
+import asyncio
+import dataclasses
+import datetime
+import enum
+import http
+import math
+import time
+
+from database import Session
+from database.models import RateLimitModel
+
+from fastapi import HTTPException
+
+from logger import logger
+
+from modules.common.metrics import metrics
+from modules.common.rate_limit import SlidingWindowCounter, TokenBucket
+from modules.time.helpers import get_utc_now
+
+from settings import RateLimitConfig
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+PRUNE_INTERVAL_SECONDS = 60
+SYNC_BATCH_SIZE = 1000
+
+
+class Policy(enum.Enum):
+    TOKEN_BUCKET = 'token_bucket'
+    SLIDING_WINDOW = 'sliding_window'
+
+
+class KeyType(enum.Enum):
+    IP = 'ip'
+    USER = 'user'
+    EMAIL = 'email'
+
+
+@dataclasses.dataclass(frozen=True)
+class RateLimitRule:
+    """
+    Limit of a route: `limit` requests per `period` seconds for every value
+    of each of the `keys`.
+    """
+    policy: Policy
+    limit: int
+    period: float
+    keys: tuple[KeyType, ...]
+
+    @classmethod
+    def parse(cls, rule: str) -> 'RateLimitRule | None':
+        """Parses <policy>:<limit>/<seconds>:<keys>, None for an empty one"""
+        if not rule.strip():
+            return None
+        try:
+            policy, rate, keys = rule.strip().split(':')
+            limit, period = rate.split('/')
+            return cls(
+                policy=Policy(policy),
+                limit=int(limit),
+                period=float(period),
+                keys=tuple(KeyType(key.strip()) for key in keys.split(','))
+            )
+        except ValueError:
+            raise ValueError(f'Invalid rate limit rule {rule!r}')
+
+
+@dataclasses.dataclass
+class WindowHits:
+    """Hits of a key in a window not yet added to the shared count"""
+    limiter: 'RateLimiter'
+    key: str
+    window: int
+    synced: int
+    hits: int
+
+    @property
+    def shared_key(self) -> str:
+        return f'{self.limiter.name}:{self.key}'
+
+    def get_row(self) -> dict:
+        # The window is used until the next one ends
+        expires_at = datetime.datetime.fromtimestamp(
+            (self.window + 2) * self.limiter.rule.period, datetime.UTC
+        ).replace(tzinfo=None)
+        return {
+            'key': self.shared_key,
+            'window': self.window,
+            'hits': self.hits,
+            'expires_at': expires_at,
+        }
+
+
+class RateLimitService:
+    @staticmethod
+    async def add_hits(
+            db_session: AsyncSession,
+            hits: list[dict]
+    ) -> dict[tuple[str, int], int]:
+        """
+        Adds hits of this process to the shared counts of their windows by
+        one INSERT ... ON CONFLICT DO UPDATE statement.
+
+        Args:
+            hits (list[dict]): rows with key, window, hits and expires_at,
+                ordered by key and window so that concurrent statements of
+                other workers lock them in the same order
+
+        Returns:
+            the shared counts by key and window
+        """
+        query = insert(RateLimitModel).values(hits)
+        query = query.on_conflict_do_update(
+            index_elements=[RateLimitModel.key, RateLimitModel.window],
+            set_={'hits': RateLimitModel.hits + query.excluded.hits}
+        ).returning(
+            RateLimitModel.key, RateLimitModel.window, RateLimitModel.hits
+        )
+        result = await db_session.execute(query)
+        counts = {(key, window): count for key, window, count in result}
+        await db_session.commit()
+        return counts
+
+    @staticmethod
+    async def delete_expired(db_session: AsyncSession) -> int:
+        """Deletes counts of windows no limit uses anymore"""
+        result = await db_session.execute(
+            delete(RateLimitModel).where(
+                RateLimitModel.expires_at < get_utc_now()
+            )
+        )
+        await db_session.commit()
+        return result.rowcount
+
+
+class RateLimiter:
+    """
+    Limiters of one route by key, e.g. 'ip:127.0.0.1'.
+
+    At most `max_keys` keys are kept. Limiters which have fully recovered
+    are dropped periodically and when the limit of keys is reached, and
+    the oldest ones are dropped if that is not enough.
+
+    Attributes:
+        touched (set[str]): keys used since the last sync of shared counts
+    """
+
+    def __init__(self, name: str, rule: RateLimitRule, max_keys: int):
+        self.name = name
+        self.rule = rule
+        self.max_keys = max_keys
+        self.touched: set[str] = set()
+        self._limiters: dict[str, TokenBucket | SlidingWindowCounter] = {}
+
+    def __len__(self) -> int:
+        return len(self._limiters)
+
+    def get(self, key: str) -> TokenBucket | SlidingWindowCounter | None:
+        return self._limiters.get(key)
+
+    def create(self) -> TokenBucket | SlidingWindowCounter:
+        if self.rule.policy is Policy.TOKEN_BUCKET:
+            return TokenBucket(
+                rate=self.rule.limit / self.rule.period,
+                capacity=self.rule.limit
+            )
+        return SlidingWindowCounter(self.rule.limit, self.rule.period)
+
+    def get_wait(self, key: str) -> float:
+        """Returns seconds until a request is allowed, without counting it"""
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            return 0
+        return limiter.get_wait()
+
+    def try_acquire(self, key: str) -> float:
+        """
+        Returns:
+            0 if the request is allowed, otherwise seconds until it is
+        """
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            if len(self._limiters) >= self.max_keys:
+                self.prune()
+                while len(self._limiters) >= self.max_keys:
+                    del self._limiters[next(iter(self._limiters))]
+            limiter = self._limiters[key] = self.create()
+        self.touched.add(key)
+        return limiter.try_acquire()
+
+    def is_idle(self, limiter: TokenBucket | SlidingWindowCounter) -> bool:
+        if isinstance(limiter, TokenBucket):
+            return limiter.tokens + (
+                time.monotonic() - limiter.updated_at
+            ) * limiter.rate >= limiter.capacity
+        return limiter.window < time.time() // limiter.period - 1
+
+    def prune(self) -> None:
+        """Drops limiters which would allow as much as new ones"""
+        for key in [
+            key for key, limiter in self._limiters.items()
+            if key not in self.touched and self.is_idle(limiter)
+        ]:
+            del self._limiters[key]
+
+
+class RateLimits:
+    """
+    Rate limits of routes, counted in process memory.
+
+    A route checks a request by `check`, which rejects the request with 429
+    and Retry-After if any key type of the route's rule is over the limit,
+    and otherwise takes one token or counts one request for every key, so
+    a rejected request uses up none of them.
+
+    With `shared` the counts of sliding window limits are added up across
+    workers in an UNLOGGED table: every `sync_interval` seconds the hits of
+    keys used since the last sync are added to it by one statement per
+    `SYNC_BATCH_SIZE` keys, which returns the counts of all workers. A
+    limit is thus enforced across workers with a delay of up to
+    `sync_interval`. Token buckets are always per worker.
+    """
+
+    def __init__(
+            self,
+            rules: dict[str, str],
+            enabled: bool,
+            shared: bool,
+            sync_interval: float,
+            max_keys: int
+    ):
+        self.enabled = enabled
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.limiters = {
+            name: RateLimiter(name, rule, max_keys)
+            for name, spec in rules.items()
+            if (rule := RateLimitRule.parse(spec)) is not None
+        }
+        self._task: asyncio.Task | None = None
+
+    def check(
+            self,
+            route: str,
+            ip: str | None = None,
+            user_id=None,
+            email: str | None = None
+    ) -> None:
+        """
+        Raises:
+            HTTPException: 429 with Retry-After if the request is over the
+                limit of the route for any of its keys
+        """
+        limiter = self.limiters.get(route)
+        if not self.enabled or limiter is None:
+            return
+        keys = []
+        for key_type in limiter.rule.keys:
+            if key_type is KeyType.IP:
+                value = ip
+            elif key_type is KeyType.USER:
+                value = user_id
+            else:
+                value = email and email.lower()
+            if value is not None:
+                keys.append(f'{key_type.value}:{value}')
+        if wait := max(map(limiter.get_wait, keys), default=0):
+            metrics.increment(f'rate_limit.{route}.rejected')
+            raise HTTPException(
+                status_code=http.HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many requests',
+                headers={'Retry-After': str(max(1, math.ceil(wait)))}
+            )
+        for key in keys:
+            limiter.try_acquire(key)
+
+    def _collect_hits(self) -> list[WindowHits]:
+        pending = []
+        for limiter in self.limiters.values():
+            touched, limiter.touched = limiter.touched, set()
+            if limiter.rule.policy is not Policy.SLIDING_WINDOW:
+                continue
+            for key in touched:
+                counter = limiter.get(key)
+                if counter is not None:
+                    pending.append(WindowHits(
+                        limiter=limiter,
+                        key=key,
+                        window=counter.window,
+                        synced=counter.synced,
+                        hits=counter.current - counter.synced
+                    ))
+        pending.sort(key=lambda hits: (hits.shared_key, hits.window))
+        return pending
+
+    @staticmethod
+    def _apply(hits: WindowHits, total: int) -> None:
+        counter = hits.limiter.get(hits.key)
+        if counter is None:
+            return
+        own = hits.synced + hits.hits
+        if counter.window == hits.window:
+            counter.synced = own
+            counter.others_current = total - own
+        elif counter.window == hits.window + 1:
+            # Moved to the next window while the count was being read
+            counter.others_previous = total - own
+
+    async def sync(self) -> None:
+        """Adds hits of this worker to the shared counts and reads them"""
+        pending = self._collect_hits()
+        for start in range(0, len(pending), SYNC_BATCH_SIZE):
+            batch = pending[start:start + SYNC_BATCH_SIZE]
+            try:
+                async with Session() as db_session:
+                    counts = await RateLimitService.add_hits(
+                        db_session, [hits.get_row() for hits in batch]
+                    )
+            except BaseException:
+                # Hits are counted from `synced`, so the next sync adds them
+                for hits in pending[start:]:
+                    hits.limiter.touched.add(hits.key)
+                raise
+            for hits in batch:
+                total = counts.get((hits.shared_key, hits.window))
+                if total is not None:
+                    self._apply(hits, total)
+
+    async def run(self) -> None:
+        pruned_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            if self.shared:
+                try:
+                    await self.sync()
+                except Exception as e:
+                    metrics.increment('rate_limit.sync_failures')
+                    logger.warning(f'Rate limits sync failed: {e}')
+            if time.monotonic() - pruned_at >= PRUNE_INTERVAL_SECONDS:
+                for limiter in self.limiters.values():
+                    limiter.prune()
+                pruned_at = time.monotonic()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            for name, limiter in self.limiters.items():
+                metrics.gauge(f'rate_limit.{name}.keys', limiter.__len__)
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+rate_limits = RateLimits(
+    rules={
+        'login': RateLimitConfig.login,
+        'registration': RateLimitConfig.registration,
+        'resend_code': RateLimitConfig.resend_code,
+        'password_recovery': RateLimitConfig.password_recovery,
+        'link_create': RateLimitConfig.link_create,
+    },
+    enabled=RateLimitConfig.enabled,
+    shared=RateLimitConfig.shared,
+    sync_interval=RateLimitConfig.sync_interval,
+    max_keys=RateLimitConfig.max_keys
+)
@@ -7,11 +7,13 @@ from logger import logger
 from modules.auth.helpers import get_password_hash
 from modules.common.helpers import generate_random_string
 from modules.common.mixins import SendEmailMixin
+from modules.common.templates import EmailTemplate
 
 from services.abstract import AbstractRegistration
+from services.confirmation_code import ConfirmationCodeService
 from services.user import UserService
 
-from settings import TemplatesConfig, UnisenderConfig
+from settings import TemplatesConfig
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -56,7 +58,7 @@ class EmailRegistration(AbstractRegistration, SendEmailMixin):
         await db_session.refresh(user)
 
         reset_code = ConfirmationCodeModel(
-            code=confirmation_code,
+            code=ConfirmationCodeService.hash_code(confirmation_code),
             user_id=user.id,
             expired_at=datetime.datetime.utcnow() + datetime.timedelta(
                 minutes=60)
@@ -68,12 +70,14 @@ class EmailRegistration(AbstractRegistration, SendEmailMixin):
     async def _send_confirmation_code(
             self,
             request: EmailRegisterScheme,
-            confirmation_code: str
+            confirmation_code: str,
+            db_session: AsyncSession
     ) -> None:
-        logger.info('Sending confirmation code via Unisender')
-        await self.send_email_to_user_via_unisender(
+        logger.info('Enqueuing confirmation code email')
+        self.enqueue_email_to_user(
             message_subject=TemplatesConfig.subject_verification,
             template_data={'verification_link': confirmation_code},
-            template_id=UnisenderConfig.registration_template_id,
-            email_address=request.email
+            template_id=EmailTemplate.verification,
+            email_address=request.email,
+            db_session=db_session
         )
@@ -0,0 +1,201 @@
+import asyncio
+import datetime
+import time
+
+from database import Session
+from database.models import RevocationModel
+
+from logger import logger
+
+from modules.common.metrics import metrics
+from modules.time.helpers import get_utc_now
+
+from settings import JWTConfig
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Identifiers are assigned on insert but become visible on commit, so a
+# revocation may appear after one with a greater identifier was read. Recent
+# revocations are read again on every refresh to catch them
+LATE_COMMIT_WINDOW_SECONDS = 60
+
+
+def get_timestamp(moment: datetime.datetime) -> float:
+    return moment.replace(tzinfo=datetime.UTC).timestamp()
+
+
+class RevocationService:
+    @staticmethod
+    def revoke(
+            db_session: AsyncSession,
+            session_id: str | None = None,
+            user_id: str | None = None
+    ) -> RevocationModel | None:
+        """
+        Revokes access tokens of the session or of all sessions of the user
+        issued until now. The revocation is stored by the caller's
+        transaction, together with the change it is made for.
+
+        Revocations are read by the stateless mode only, so nothing is
+        stored unless it is enabled. Tokens issued without it carry no
+        expiration and are always checked against the session.
+        """
+        if not JWTConfig.stateless:
+            return None
+        now = get_utc_now()
+        revocation = RevocationModel(
+            session_id=session_id,
+            user_id=user_id,
+            revoked_at=now,
+            expires_at=now + datetime.timedelta(
+                minutes=JWTConfig.stateless_token_minutes
+            )
+        )
+        db_session.add(revocation)
+        return revocation
+
+    @staticmethod
+    async def get_active(
+            db_session: AsyncSession,
+            after_id: int | None = None,
+            revoked_since: datetime.datetime | None = None
+    ) -> list[RevocationModel]:
+        """
+        Returns revocations covering tokens which have not expired yet, all
+        of them or only the ones after `after_id` and revoked since
+        `revoked_since`.
+        """
+        query = (
+            select(RevocationModel)
+            .where(RevocationModel.expires_at > get_utc_now())
+            .order_by(RevocationModel.id)
+        )
+        if after_id is not None:
+            query = query.where(or_(
+                RevocationModel.id > after_id,
+                RevocationModel.revoked_at > revoked_since
+            ))
+        result = await db_session.execute(query)
+        return list(result.scalars().all())
+
+
+class RevocationFilter:
+    """
+    In-memory set of revoked sessions and users, which lets a worker trust
+    access tokens on signature and expiration without querying the
+    database.
+
+    The set is loaded on start and refreshed every `refresh_interval`
+    seconds with revocations after the last read one. Entries are dropped
+    once every token they cover has expired. If the set could not be
+    refreshed for `max_lag` seconds it is considered stale, and tokens are
+    checked against the database instead.
+
+    Attributes:
+        sessions (dict[str, float]): revocation timestamps by session id
+        users (dict[str, float]): revocation timestamps by user id
+        last_id (int | None): identifier of the last read revocation
+    """
+
+    def __init__(
+            self,
+            token_minutes: int,
+            refresh_interval: float,
+            max_lag: float
+    ):
+        self.token_seconds = token_minutes * 60
+        self.refresh_interval = refresh_interval
+        self.max_lag = max_lag
+        self.sessions: dict[str, float] = {}
+        self.users: dict[str, float] = {}
+        self.last_id: int | None = None
+        self._refreshed_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self.sessions) + len(self.users)
+
+    def is_fresh(self) -> bool:
+        return (
+            self._refreshed_at is not None
+            and time.monotonic() - self._refreshed_at <= self.max_lag
+        )
+
+    def is_revoked(
+            self,
+            session_id: str,
+            user_id: str,
+            issued_at: float
+    ) -> bool:
+        return issued_at <= max(
+            self.sessions.get(session_id, 0), self.users.get(user_id, 0)
+        )
+
+    def add(self, revocation: RevocationModel) -> None:
+        revoked_at = get_timestamp(revocation.revoked_at)
+        for entries, key in (
+                (self.sessions, revocation.session_id),
+                (self.users, revocation.user_id)
+        ):
+            if key is not None:
+                key = str(key)
+                entries[key] = max(entries.get(key, 0), revoked_at)
+        self.last_id = max(self.last_id or 0, revocation.id)
+
+    def prune(self) -> None:
+        """Drops revocations of tokens which have all expired"""
+        threshold = time.time() - self.token_seconds
+        for entries in (self.sessions, self.users):
+            for key in [
+                key for key, revoked_at in entries.items()
+                if revoked_at < threshold
+            ]:
+                del entries[key]
+
+    async def refresh(self) -> None:
+        revoked_since = get_utc_now() - datetime.timedelta(
+            seconds=LATE_COMMIT_WINDOW_SECONDS
+        )
+        async with Session() as db_session:
+            revocations = await RevocationService.get_active(
+                db_session,
+                after_id=self.last_id,
+                revoked_since=revoked_since
+            )
+        for revocation in revocations:
+            self.add(revocation)
+        self.prune()
+        self._refreshed_at = time.monotonic()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                metrics.increment('auth.revocations.refresh_failures')
+                logger.warning(f'Revocations refresh failed: {e}')
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            metrics.gauge('auth.revocations.size', lambda: len(self))
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+revocation_filter = RevocationFilter(
+    token_minutes=JWTConfig.stateless_token_minutes,
+    refresh_interval=JWTConfig.revocation_refresh_interval,
+    max_lag=JWTConfig.revocation_max_lag
+)
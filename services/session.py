@@ -1,9 +1,26 @@
+import asyncio
+import datetime
+import uuid
+
+from database import Session
 from database.models import SessionModel
 
 from fastapi_pagination import Params as PageParams
 from fastapi_pagination.ext.sqlalchemy import paginate
 
-from sqlalchemy import delete, select, update
+from logger import logger
+
+from modules.common.metrics import metrics
+from modules.invalidation.bus import Channel, invalidation_bus
+from modules.time.helpers import get_utc_now
+
+from services.revocation import RevocationService
+
+from settings import SessionActivityConfig
+
+from sqlalchemy import (
+    DateTime, UUID, column, delete, select, update, values
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -38,23 +55,162 @@ class SessionService:
             params: PageParams,
             db_session: AsyncSession
     ):
-        query = (select(SessionModel).filter_by(user_id=user_id))
+        query = (
+            select(SessionModel)
+            .filter_by(user_id=user_id)
+            .order_by(SessionModel.last_seen_at.desc(), SessionModel.id)
+        )
         result = await paginate(db_session, query, params=params)
         return result
 
+    @staticmethod
+    async def rotate_tokens(
+            session_id: str,
+            refresh_uuid: uuid.UUID,
+            new_token_uuid: str,
+            new_refresh_uuid: str,
+            db_session: AsyncSession
+    ) -> bool:
+        """
+        Replaces the token identifiers of the active session if its current
+        refresh token is the one presented. The check and the update are
+        done by one statement, so every refresh token can be used once
+        even by concurrent requests.
+
+        Returns:
+            False if the session is not found, not active, closed or the
+            refresh token is already used
+        """
+        query = (
+            update(SessionModel)
+            .where(
+                SessionModel.id == session_id,
+                SessionModel.refresh_uuid == refresh_uuid,
+                SessionModel.is_active,
+                ~SessionModel.is_closed
+            )
+            .values(
+                token_uuid=new_token_uuid,
+                refresh_uuid=new_refresh_uuid,
+                last_seen_at=get_utc_now()
+            )
+            .returning(SessionModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db_session.execute(query)
+        rotated = result.first() is not None
+        await db_session.commit()
+        if rotated:
+            invalidation_bus.publish(Channel.SESSIONS, session_id)
+        return rotated
+
     @staticmethod
     async def close_sessions(
             db_session: AsyncSession,
             user_id: str,
-            ip: str = None
-    ) -> int:
+            ip: str = None,
+            commit: bool = True
+    ) -> list[uuid.UUID]:
+        """
+        Closes active sessions of the user, from the given IP address only
+        if it is passed, and revokes their access tokens.
+
+        With `commit=False` they are closed in the transaction of the
+        caller, which publishes the returned ids to Channel.SESSIONS after
+        its commit.
+
+        Returns:
+            ids of the closed sessions
+        """
+        criteria = [
+            SessionModel.user_id == user_id,
+            SessionModel.is_active,
+            ~SessionModel.is_closed
+        ]
+        if ip:
+            criteria.append(SessionModel.ip == ip)
         query = (
             update(SessionModel)
+            .where(*criteria)
+            .values(is_closed=True)
+            .returning(SessionModel.id)
+        )
+        result = await db_session.execute(query)
+        session_ids = list(result.scalars().all())
+        if ip:
+            for session_id in session_ids:
+                RevocationService.revoke(db_session, session_id=session_id)
+        else:
+            RevocationService.revoke(db_session, user_id=user_id)
+        if commit:
+            await db_session.commit()
+            invalidation_bus.publish(Channel.SESSIONS, *session_ids)
+        return session_ids
+
+    @staticmethod
+    async def close_idle_sessions(
+            db_session: AsyncSession,
+            idle_since: datetime.datetime,
+            limit: int
+    ) -> list[uuid.UUID]:
+        """
+        Closes up to `limit` active sessions not used since `idle_since`
+        and revokes their access tokens. The sessions are found by a range
+        scan of ix_sessions_active_last_seen_at, and ones locked by a
+        request are skipped until the next run.
+        """
+        idle = (
+            select(SessionModel.id)
             .where(
-                SessionModel.user_id == user_id and
-                (not ip or ip and SessionModel.ip == ip) and
-                SessionModel.is_active)
+                SessionModel.is_active,
+                ~SessionModel.is_closed,
+                SessionModel.last_seen_at < idle_since
+            )
+            .order_by(SessionModel.last_seen_at, SessionModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(SessionModel)
+            .where(SessionModel.id.in_(idle.scalar_subquery()))
             .values(is_closed=True)
+            .returning(SessionModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db_session.execute(query)
+        session_ids = list(result.scalars().all())
+        for session_id in session_ids:
+            RevocationService.revoke(db_session, session_id=session_id)
+        await db_session.commit()
+        invalidation_bus.publish(Channel.SESSIONS, *session_ids)
+        return session_ids
+
+    @staticmethod
+    async def touch_sessions(
+            db_session: AsyncSession,
+            seen: list[tuple[uuid.UUID, datetime.datetime]]
+    ) -> int:
+        """
+        Moves last_seen_at of the sessions forward by one statement,
+        UPDATE ... FROM (VALUES ...). Rows should be ordered by id, so
+        concurrent updates of other workers lock them in the same order.
+
+        Returns:
+            number of updated sessions
+        """
+        seen_values = values(
+            column('id', UUID(as_uuid=True)),
+            column('seen_at', DateTime()),
+            name='seen'
+        ).data(seen)
+        query = (
+            update(SessionModel)
+            .where(
+                SessionModel.id == seen_values.c.id,
+                SessionModel.last_seen_at < seen_values.c.seen_at
+            )
+            .values(last_seen_at=seen_values.c.seen_at)
+            .execution_options(synchronize_session=False)
         )
         result = await db_session.execute(query)
         await db_session.commit()
@@ -69,3 +225,115 @@ class SessionService:
             SessionModel.user_id == user_id
         ))
         await db_session.commit()
+        invalidation_bus.publish(Channel.USERS, user_id)
+
+
+class SessionActivityTracker:
+    """
+    Per-process buffer of session activity, which keeps last_seen_at of
+    sessions without writing a row on every request.
+
+    A request using a session only records the time in memory, so
+    repeated requests of a session are coalesced into one value. Pending
+    values are written every `flush_interval` seconds, or earlier once
+    `max_pending` sessions are waiting, by UPDATE ... FROM (VALUES ...)
+    statements of up to `batch_size` rows, and on shutdown. Values which
+    could not be written are kept for the next flush.
+
+    last_seen_at is thus behind by up to `flush_interval` seconds plus the
+    time of a flush, or lost on a crash of the process, which idle
+    expiry measured in days tolerates.
+    """
+
+    def __init__(
+            self,
+            flush_interval: float,
+            max_pending: int,
+            batch_size: int
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending: dict[uuid.UUID, datetime.datetime] = {}
+        self._full: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def touch(self, session_id) -> None:
+        """Records that the session is used now, if tracking is running"""
+        if self._task is None:
+            return
+        self._pending[uuid.UUID(str(session_id))] = get_utc_now()
+        if len(self._pending) >= self.max_pending:
+            self._full.set()
+
+    def _restore(self, seen: dict[uuid.UUID, datetime.datetime]) -> None:
+        for session_id, seen_at in seen.items():
+            pending = self._pending.get(session_id)
+            if pending is None or pending < seen_at:
+                self._pending[session_id] = seen_at
+
+    async def flush(self) -> int:
+        """Writes the pending values, returns the number of sessions"""
+        seen, self._pending = self._pending, {}
+        if not seen:
+            return 0
+        rows = sorted(seen.items())
+        written = 0
+        try:
+            async with Session() as db_session:
+                while written < len(rows):
+                    batch = rows[written:written + self.batch_size]
+                    await SessionService.touch_sessions(db_session, batch)
+                    written += len(batch)
+        except BaseException:
+            # Including cancellation, so that stop() writes them
+            self._restore(dict(rows[written:]))
+            raise
+        finally:
+            metrics.increment('sessions.activity.flushed', written)
+        return written
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._full.wait(), self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                metrics.increment('sessions.activity.flush_failures')
+                logger.warning(f'Session activity flush failed: {e}')
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            metrics.gauge(
+                'sessions.activity.pending', lambda: len(self._pending)
+            )
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stops flushing periodically and writes the pending values"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f'Session activity flush failed: {e}')
+
+
+session_activity = SessionActivityTracker(
+    flush_interval=SessionActivityConfig.flush_interval,
+    max_pending=SessionActivityConfig.max_pending,
+    batch_size=SessionActivityConfig.batch_size
+)
@@ -13,7 +13,9 @@ from fastapi_pagination.ext.async_sqlalchemy import paginate
 
 from modules.auth.helpers import get_password_hash
 from modules.auth.validators import verify_password
+from modules.invalidation.bus import Channel, invalidation_bus
 
+from services.revocation import RevocationService
 from services.session import SessionService
 
 from sqlalchemy import delete, or_, select
@@ -67,6 +69,7 @@ class UserService:
         db_session.add(user)
         await db_session.commit()
         await db_session.refresh(user)
+        invalidation_bus.publish(Channel.USERS, user.id)
 
         return user
 
@@ -143,6 +146,7 @@ class UserService:
             UserModel.id == user_id
         ))
         await db_session.commit()
+        invalidation_bus.publish(Channel.USERS, user_id)
 
     @staticmethod
     async def safe_delete(
@@ -170,7 +174,9 @@ class UserService:
             user.email = f'deleted_{user.email}'
 
         db_session.add(user)
+        RevocationService.revoke(db_session, user_id=user_id)
         await db_session.commit()
+        invalidation_bus.publish(Channel.USERS, user_id)
         await db_session.refresh(user)
 
     @staticmethod
@@ -228,9 +234,12 @@ class UserService:
 
         db_user.password_hash = await get_password_hash(new_password)
 
-        await db_session.commit()
-
-        await SessionService.close_sessions(
+        # Revoked in the same transaction, so that tokens issued before the
+        # change are never trusted after it
+        session_ids = await SessionService.close_sessions(
             user_id=user_id,
-            db_session=db_session
+            db_session=db_session,
+            commit=False
         )
+        await db_session.commit()
+        invalidation_bus.publish(Channel.SESSIONS, *session_ids)
@@ -27,6 +27,85 @@ class Database:
     pool_pre_ping = os.environ.get(
         'DB_ENGINE_OPTION_POOL_PRE_PING', default=False
     )
+    pooling_mode = os.environ.get('DB_POOLING_MODE', default='direct')
+    external_pool_size = int(
+        os.environ.get(
+            'DB_EXTERNAL_POOL_SIZE', default=0
+        )
+    )
+    statement_cache_size = int(
+        os.environ.get(
+            'DB_STATEMENT_CACHE_SIZE', default=100
+        )
+    )
+    prepared_statement_cache_size = int(
+        os.environ.get(
+            'DB_PREPARED_STATEMENT_CACHE_SIZE', default=100
+        )
+    )
+    max_cached_statement_lifetime = int(
+        os.environ.get(
+            'DB_MAX_CACHED_STATEMENT_LIFETIME', default=300
+        )
+    )
+    max_cacheable_statement_size = int(
+        os.environ.get(
+            'DB_MAX_CACHEABLE_STATEMENT_SIZE', default=15360
+        )
+    )
+    replica_url = os.environ.get('DATABASE_REPLICA_URL')
+    replica_pin_seconds = int(
+        os.environ.get(
+            'DB_REPLICA_PIN_SECONDS', default=5
+        )
+    )
+    warmup_connections = int(
+        os.environ.get(
+            'DB_WARMUP_CONNECTIONS', default=5
+        )
+    )
+
+
+@dataclasses.dataclass
+class InvalidationConfig:
+    enabled = os.environ.get(
+        'INVALIDATION_ENABLED', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    # LISTEN needs a session-level connection, so behind PgBouncer in
+    # transaction mode it has to go to PostgreSQL directly
+    database_url = (
+        os.environ.get('INVALIDATION_DATABASE_URL') or Database.url
+    )
+    coalesce_seconds = float(
+        os.environ.get(
+            'INVALIDATION_COALESCE_SECONDS', default=0.05
+        )
+    )
+    ping_interval = float(
+        os.environ.get(
+            'INVALIDATION_PING_INTERVAL', default=10
+        )
+    )
+    max_reconnect_delay = float(
+        os.environ.get(
+            'INVALIDATION_MAX_RECONNECT_DELAY', default=30
+        )
+    )
+    cache_ttl = float(
+        os.environ.get(
+            'CACHE_TTL', default=60
+        )
+    )
+    cache_fallback_ttl = float(
+        os.environ.get(
+            'CACHE_FALLBACK_TTL', default=5
+        )
+    )
+    cache_max_size = int(
+        os.environ.get(
+            'CACHE_MAX_SIZE', default=10000
+        )
+    )
 
 
 @dataclasses.dataclass
@@ -35,6 +114,81 @@ class AppConfig:
     debug = os.environ.get('APP_DEBUG', default=False)
 
 
+@dataclasses.dataclass
+class ServerConfig:
+    host = os.environ.get('SERVER_HOST', default='0.0.0.0')
+    port = int(
+        os.environ.get(
+            'SERVER_PORT', default=8000
+        )
+    )
+    workers = int(
+        os.environ.get(
+            'SERVER_WORKERS', default=os.cpu_count() or 1
+        )
+    )
+    backlog = int(
+        os.environ.get(
+            'SERVER_BACKLOG', default=2048
+        )
+    )
+    keepalive = int(
+        os.environ.get(
+            'SERVER_KEEPALIVE', default=5
+        )
+    )
+    max_requests = int(
+        os.environ.get(
+            'SERVER_MAX_REQUESTS', default=10000
+        )
+    )
+    max_requests_jitter = int(
+        os.environ.get(
+            'SERVER_MAX_REQUESTS_JITTER', default=1000
+        )
+    )
+    graceful_timeout = int(
+        os.environ.get(
+            'SERVER_GRACEFUL_TIMEOUT', default=30
+        )
+    )
+    preload = os.environ.get(
+        'SERVER_PRELOAD', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    # Addresses or networks of proxies (e.g. nginx) whose X-Forwarded-For
+    # and X-Real-IP headers tell the client address
+    trusted_proxies = [
+        proxy.strip() for proxy in os.environ.get(
+            'SERVER_TRUSTED_PROXIES', default=''
+        ).split(',') if proxy.strip()
+    ]
+
+
+@dataclasses.dataclass
+class HTTPConfig:
+    max_connections = int(
+        os.environ.get(
+            'HTTP_MAX_CONNECTIONS', default=100
+        )
+    )
+    max_keepalive_connections = int(
+        os.environ.get(
+            'HTTP_MAX_KEEPALIVE_CONNECTIONS', default=20
+        )
+    )
+    keepalive_expiry = float(
+        os.environ.get(
+            'HTTP_KEEPALIVE_EXPIRY', default=30
+        )
+    )
+    # Timeout of fetching pages of created links
+    fetch_timeout = float(
+        os.environ.get(
+            'HTTP_FETCH_TIMEOUT', default=10
+        )
+    )
+
+
 @dataclasses.dataclass
 class JWTConfig:
     secret_key = os.environ.get(
@@ -43,11 +197,204 @@ class JWTConfig:
             '09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7'
         )
     )
-    algorithm = 'HS256'
+    # HS256 signs with the secret key, EdDSA and ES256 with a key of the
+    # keys file, whose public part is published as JWKS
+    algorithm = os.environ.get('JWT_ALGORITHM', default='HS256')
+    keys_file = os.environ.get('JWT_KEYS_FILE')
+    signing_kid = os.environ.get('JWT_SIGNING_KID')
+    jwks_max_age = int(
+        os.environ.get(
+            'JWT_JWKS_MAX_AGE', default=300
+        )
+    )
+    verification_cache_size = int(
+        os.environ.get(
+            'JWT_VERIFICATION_CACHE_SIZE', default=10000
+        )
+    )
     auth_token_time_expiration_minutes = 60
     refresh_token_time_expiration_minutes = 60 * 24 * 7
     user_property = 'user_info'
     scope_user = 'user'
+    stateless = os.environ.get(
+        'AUTH_STATELESS', default='false'
+    ).lower() in ('1', 'true', 'yes')
+    stateless_token_minutes = int(
+        os.environ.get(
+            'AUTH_STATELESS_TOKEN_MINUTES', default=5
+        )
+    )
+    revocation_refresh_interval = float(
+        os.environ.get(
+            'AUTH_REVOCATION_REFRESH_INTERVAL', default=2
+        )
+    )
+    revocation_max_lag = float(
+        os.environ.get(
+            'AUTH_REVOCATION_MAX_LAG', default=30
+        )
+    )
+    session_cache = os.environ.get(
+        'AUTH_SESSION_CACHE', default='false'
+    ).lower() in ('1', 'true', 'yes')
+
+
+@dataclasses.dataclass
+class SessionActivityConfig:
+    # Bounds how stale last_seen_at of a session may be
+    flush_interval = float(
+        os.environ.get(
+            'SESSION_ACTIVITY_FLUSH_INTERVAL', default=30
+        )
+    )
+    max_pending = int(
+        os.environ.get(
+            'SESSION_ACTIVITY_MAX_PENDING', default=10000
+        )
+    )
+    batch_size = int(
+        os.environ.get(
+            'SESSION_ACTIVITY_BATCH_SIZE', default=1000
+        )
+    )
+
+
+@dataclasses.dataclass
+class BatchConfig:
+    max_operations = int(
+        os.environ.get(
+            'BATCH_MAX_OPERATIONS', default=100
+        )
+    )
+
+
+@dataclasses.dataclass
+class DeadlineConfig:
+    enabled = os.environ.get(
+        'DEADLINE_ENABLED', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    # Header with the seconds a client is going to wait for the response
+    header = os.environ.get('DEADLINE_HEADER', default='X-Request-Timeout')
+    default_timeout = float(
+        os.environ.get(
+            'DEADLINE_DEFAULT', default=10
+        )
+    )
+    max_timeout = float(
+        os.environ.get(
+            'DEADLINE_MAX', default=30
+        )
+    )
+
+
+@dataclasses.dataclass
+class IdempotencyConfig:
+    enabled = os.environ.get(
+        'IDEMPOTENCY_ENABLED', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    header = os.environ.get('IDEMPOTENCY_HEADER', default='Idempotency-Key')
+    # Seconds a stored response is replayed for
+    ttl = int(
+        os.environ.get(
+            'IDEMPOTENCY_TTL', default=86400
+        )
+    )
+    # Seconds after which a request in progress is considered lost and
+    # its key may be taken over by a retry
+    lock_seconds = int(
+        os.environ.get(
+            'IDEMPOTENCY_LOCK_SECONDS', default=60
+        )
+    )
+    poll_interval = float(
+        os.environ.get(
+            'IDEMPOTENCY_POLL_INTERVAL', default=0.1
+        )
+    )
+
+
+@dataclasses.dataclass
+class OverloadConfig:
+    enabled = os.environ.get(
+        'OVERLOAD_ENABLED', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    initial_limit = int(
+        os.environ.get(
+            'OVERLOAD_INITIAL_LIMIT',
+            default=Database.pool_size + Database.max_overflow
+        )
+    )
+    min_limit = int(
+        os.environ.get(
+            'OVERLOAD_MIN_LIMIT', default=5
+        )
+    )
+    max_limit = int(
+        os.environ.get(
+            'OVERLOAD_MAX_LIMIT', default=500
+        )
+    )
+    # Average wait for a pool connection above which the limit decreases
+    target_pool_wait = float(
+        os.environ.get(
+            'OVERLOAD_TARGET_POOL_WAIT', default=0.05
+        )
+    )
+    adjust_interval = float(
+        os.environ.get(
+            'OVERLOAD_ADJUST_INTERVAL', default=1
+        )
+    )
+    backoff = float(
+        os.environ.get(
+            'OVERLOAD_BACKOFF', default=0.9
+        )
+    )
+    retry_after = int(
+        os.environ.get(
+            'OVERLOAD_RETRY_AFTER', default=1
+        )
+    )
+
+
+@dataclasses.dataclass
+class RateLimitConfig:
+    enabled = os.environ.get(
+        'RATE_LIMIT_ENABLED', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    # Counts sliding window limits of all workers in a shared table
+    shared = os.environ.get(
+        'RATE_LIMIT_SHARED', default='false'
+    ).lower() in ('1', 'true', 'yes')
+    sync_interval = float(
+        os.environ.get(
+            'RATE_LIMIT_SYNC_INTERVAL', default=1
+        )
+    )
+    max_keys = int(
+        os.environ.get(
+            'RATE_LIMIT_MAX_KEYS', default=100000
+        )
+    )
+    # Rules of routes as <policy>:<limit>/<seconds>:<keys>, where policy is
+    # token_bucket or sliding_window and keys are some of ip, user and
+    # email, each limited separately. An empty rule disables the limit
+    login = os.environ.get(
+        'RATE_LIMIT_LOGIN', default='sliding_window:10/60:ip,email'
+    )
+    registration = os.environ.get(
+        'RATE_LIMIT_REGISTRATION', default='sliding_window:5/600:ip'
+    )
+    resend_code = os.environ.get(
+        'RATE_LIMIT_RESEND_CODE', default='sliding_window:3/600:ip,email'
+    )
+    password_recovery = os.environ.get(
+        'RATE_LIMIT_PASSWORD_RECOVERY',
+        default='sliding_window:5/3600:ip,email'
+    )
+    link_create = os.environ.get(
+        'RATE_LIMIT_LINK_CREATE', default='token_bucket:30/60:user'
+    )
 
 
 @dataclasses.dataclass
@@ -56,6 +403,13 @@ class TemplatesConfig:
     subject_reset_password = 'Password recovery'
     verification = '/email/verify_email.html'
     subject_verification = 'Email verification'
+    directory = 'templates'
+    source = os.environ.get('EMAIL_TEMPLATES_SOURCE', default='unisender')
+    cache_ttl = int(
+        os.environ.get(
+            'EMAIL_TEMPLATE_CACHE_TTL', default=300
+        )
+    )
 
 
 @dataclasses.dataclass
@@ -81,3 +435,212 @@ class UnisenderConfig:
     sending_timeout = os.environ.get(
         'UNISENDER_SENDING_TIMEOUT'
     )
+    api_url = os.environ.get(
+        'UNISENDER_API_URL', default='https://api.unisender.com/en/api'
+    )
+    request_timeout = float(
+        os.environ.get(
+            'UNISENDER_REQUEST_TIMEOUT', default=5
+        )
+    )
+    retries = int(
+        os.environ.get(
+            'UNISENDER_RETRIES', default=2
+        )
+    )
+    retry_base_delay = float(
+        os.environ.get(
+            'UNISENDER_RETRY_BASE_DELAY', default=0.2
+        )
+    )
+    max_connections = int(
+        os.environ.get(
+            'UNISENDER_MAX_CONNECTIONS', default=20
+        )
+    )
+    max_keepalive_connections = int(
+        os.environ.get(
+            'UNISENDER_MAX_KEEPALIVE_CONNECTIONS', default=10
+        )
+    )
+
+
+@dataclasses.dataclass
+class MaintenanceConfig:
+    batch_size = int(
+        os.environ.get(
+            'MAINTENANCE_BATCH_SIZE', default=1000
+        )
+    )
+    batch_sleep = float(
+        os.environ.get(
+            'MAINTENANCE_BATCH_SLEEP', default=0.1
+        )
+    )
+    used_codes_retention_hours = int(
+        os.environ.get(
+            'MAINTENANCE_CODES_RETENTION_HOURS', default=24
+        )
+    )
+    sessions_retention_days = int(
+        os.environ.get(
+            'MAINTENANCE_SESSIONS_RETENTION_DAYS', default=30
+        )
+    )
+    sessions_idle_days = int(
+        os.environ.get(
+            'MAINTENANCE_SESSIONS_IDLE_DAYS', default=14
+        )
+    )
+
+
+@dataclasses.dataclass
+class SchedulerConfig:
+    jitter = float(
+        os.environ.get(
+            'SCHEDULER_JITTER', default=60
+        )
+    )
+    stop_timeout = float(
+        os.environ.get(
+            'SCHEDULER_STOP_TIMEOUT', default=30
+        )
+    )
+    expired_codes_schedule = os.environ.get(
+        'SCHEDULE_EXPIRED_CODES', default='0 4 * * *'
+    )
+    used_codes_schedule = os.environ.get(
+        'SCHEDULE_USED_CODES', default='30 4 * * *'
+    )
+    stale_sessions_schedule = os.environ.get(
+        'SCHEDULE_STALE_SESSIONS', default='30 4 * * *'
+    )
+    expired_revocations_schedule = os.environ.get(
+        'SCHEDULE_EXPIRED_REVOCATIONS', default='*/10 * * * *'
+    )
+    idle_sessions_schedule = os.environ.get(
+        'SCHEDULE_IDLE_SESSIONS', default='15 * * * *'
+    )
+    expired_rate_limits_schedule = os.environ.get(
+        'SCHEDULE_EXPIRED_RATE_LIMITS', default='*/5 * * * *'
+    )
+    expired_idempotency_keys_schedule = os.environ.get(
+        'SCHEDULE_EXPIRED_IDEMPOTENCY_KEYS', default='20 * * * *'
+    )
+
+
+@dataclasses.dataclass
+class EmailConfig:
+    transport = os.environ.get('EMAIL_TRANSPORT', default='unisender')
+
+
+@dataclasses.dataclass
+class SMTPConfig:
+    host = os.environ.get(
+        'SMTP_HOST', default='localhost'
+    )
+    port = int(
+        os.environ.get(
+            'SMTP_PORT', default=25
+        )
+    )
+    # Empty values disable authentication
+    username = os.environ.get(
+        'SMTP_USERNAME'
+    ) or None
+    password = os.environ.get(
+        'SMTP_PASSWORD'
+    ) or None
+    use_tls = os.environ.get(
+        'SMTP_USE_TLS', default='false'
+    ).lower() in ('1', 'true', 'yes')
+    start_tls = os.environ.get(
+        'SMTP_START_TLS', default='false'
+    ).lower() in ('1', 'true', 'yes')
+    sender_name = os.environ.get(
+        'SMTP_SENDER_NAME'
+    ) or UnisenderConfig.sender_name
+    sender_email = os.environ.get(
+        'SMTP_SENDER_EMAIL'
+    ) or UnisenderConfig.sender_email
+    timeout = float(
+        os.environ.get(
+            'SMTP_TIMEOUT', default=10
+        )
+    )
+    pool_size = int(
+        os.environ.get(
+            'SMTP_POOL_SIZE', default=10
+        )
+    )
+    max_messages_per_connection = int(
+        os.environ.get(
+            'SMTP_MAX_MESSAGES_PER_CONNECTION', default=100
+        )
+    )
+    idle_timeout = float(
+        os.environ.get(
+            'SMTP_IDLE_TIMEOUT', default=60
+        )
+    )
+
+
+@dataclasses.dataclass
+class BulkEmailConfig:
+    batch_size = int(
+        os.environ.get(
+            'BULK_EMAIL_BATCH_SIZE', default=500
+        )
+    )
+    rate = float(
+        os.environ.get(
+            'BULK_EMAIL_RATE', default=5
+        )
+    )
+    burst = int(
+        os.environ.get(
+            'BULK_EMAIL_BURST', default=10
+        )
+    )
+
+
+@dataclasses.dataclass
+class EmailOutboxConfig:
+    dispatch_in_app = os.environ.get(
+        'EMAIL_OUTBOX_DISPATCH_IN_APP', default='true'
+    ).lower() in ('1', 'true', 'yes')
+    poll_interval = float(
+        os.environ.get(
+            'EMAIL_OUTBOX_POLL_INTERVAL', default=1
+        )
+    )
+    batch_size = int(
+        os.environ.get(
+            'EMAIL_OUTBOX_BATCH_SIZE', default=50
+        )
+    )
+    concurrency = int(
+        os.environ.get(
+            'EMAIL_OUTBOX_CONCURRENCY', default=10
+        )
+    )
+    max_attempts = int(
+        os.environ.get(
+            'EMAIL_OUTBOX_MAX_ATTEMPTS', default=8
+        )
+    )
+    retry_base_delay = float(
+        os.environ.get(
+            'EMAIL_OUTBOX_RETRY_BASE_DELAY', default=5
+        )
+    )
+    retry_max_delay = float(
+        os.environ.get(
+            'EMAIL_OUTBOX_RETRY_MAX_DELAY', default=3600
+        )
+    )
+    lease_seconds = int(
+        os.environ.get(
+            'EMAIL_OUTBOX_LEASE_SECONDS', default=120
+        )
+    )
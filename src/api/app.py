@@ -0,0 +1,32 @@
+from fastapi import FastAPI
+
+from src.api.auth.views import router as auth_router
+from src.api.batch.views import router as batch_router
+from src.api.collection.views import router as collection_router
+from src.api.health.views import router as health_router
+from src.api.helpers.app import (
+    init_exc_handlers, init_middleware, lifespan
+)
+from src.api.link.views import router as link_router
+from src.api.password_recovery.views import password_recovery_router
+from src.api.registration.views import registration_router
+from src.api.well_known.views import router as well_known_router
+
+
+app = FastAPI(
+    title="Auth0",
+    lifespan=lifespan
+)
+
+init_middleware(app)
+
+app.include_router(auth_router)
+app.include_router(collection_router)
+app.include_router(link_router)
+app.include_router(batch_router)
+app.include_router(registration_router)
+app.include_router(password_recovery_router)
+app.include_router(health_router)
+app.include_router(well_known_router)
+
+init_exc_handlers(app)
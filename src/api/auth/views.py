@@ -14,18 +14,21 @@ from modules.auth.validators import (
     validate_refresh_token
 )
 
+from services.rate_limit import rate_limits
 from services.user import UserService
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.helpers.auth import get_login_handler
+from src.api.helpers.client import get_client_ip
 from src.api.schemes.auth import ChangePasswordScheme, JWTScheme, LoginResponse
 from src.api.schemes.response import (
     ExceptionScheme,
     Response200Scheme,
     Response400Scheme,
     Response403Scheme,
-    jwt_bearer_responses
+    jwt_bearer_responses,
+    rate_limit_responses
 )
 
 
@@ -50,6 +53,7 @@ router = APIRouter(
             'model': Response403Scheme,
             'description': 'Account deleted'
         },
+        **rate_limit_responses,
         422: {
             'model': ExceptionScheme,
             'description': 'Invalid request scheme'
@@ -66,6 +70,9 @@ async def login(
         request: Request,
         db_session: AsyncSession = Depends(get_session)
 ) -> Union[LoginResponse, Response200Scheme]:
+    rate_limits.check(
+        'login', ip=get_client_ip(request), email=login_info.email
+    )
     login_handler = get_login_handler(login_info)
     result = await login_handler(auth_class=AuthUser).login(
         credentials=login_info,
@@ -0,0 +1,71 @@
+from database import get_session
+
+from fastapi import APIRouter, Depends
+
+from modules.auth.classes import JWTBearer
+from modules.auth.schemes import UserInfo
+
+from services.batch import BatchManager
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.schemes.batch import (
+    BatchMode,
+    BatchResponseScheme,
+    BatchScheme
+)
+from src.api.schemes.response import (
+    ExceptionScheme,
+    jwt_bearer_responses
+)
+
+
+router = APIRouter(
+    prefix='/batch',
+    tags=['Batch'],
+)
+
+
+@router.post(
+    '/',
+    responses={
+        200: {
+            'model': BatchResponseScheme,
+            'description': 'Batch executed, with a result per operation',
+        },
+        **jwt_bearer_responses,
+        422: {
+            'model': ExceptionScheme,
+            'description': 'Invalid request scheme'
+        },
+        500: {
+            'model': ExceptionScheme,
+            'description': 'Internal server error'
+        }
+    },
+    summary='Executes operations on links and collections in one '
+            'transaction.'
+)
+async def run_batch(
+        batch: BatchScheme,
+        db_session: AsyncSession = Depends(get_session),
+        user_info: UserInfo = Depends(JWTBearer())
+) -> BatchResponseScheme:
+    committed, results = await BatchManager(
+        user_id=user_info.user_id,
+        db_session=db_session
+    ).run(batch.operations, batch.mode)
+
+    success = all(result.success for result in results)
+    if success:
+        message = 'Success'
+    elif batch.mode == BatchMode.atomic:
+        message = 'Batch rolled back'
+    else:
+        message = 'Some operations failed'
+    return BatchResponseScheme(
+        success=success,
+        message=message,
+        committed=committed,
+        data=results
+    )
@@ -1,10 +1,10 @@
 from uuid import UUID
 
-from database import get_session
+from database import get_read_session, get_session
 
 from fastapi import APIRouter, Depends, Query
 
-from modules.auth.classes import JWTBearer
+from modules.auth.classes import JWTBearer, ReplicaJWTBearer
 from modules.auth.schemes import UserInfo
 
 from services.collection import CollectionManager
@@ -52,8 +52,8 @@ router = APIRouter(
 )
 async def get_collection(
         collection_id: UUID = Query(...),
-        db_session: AsyncSession = Depends(get_session),
-        user_info: UserInfo = Depends(JWTBearer())
+        db_session: AsyncSession = Depends(get_read_session),
+        user_info: UserInfo = Depends(ReplicaJWTBearer())
 ) -> CollectionResponseScheme:
     collection = await CollectionManager().get(
         collection_id=collection_id,
@@ -205,8 +205,8 @@ async def delete_collection(
 )
 async def get_links_in_collection(
         collection_id: UUID = Query(...),
-        db_session: AsyncSession = Depends(get_session),
-        user_info: UserInfo = Depends(JWTBearer())
+        db_session: AsyncSession = Depends(get_read_session),
+        user_info: UserInfo = Depends(ReplicaJWTBearer())
 ) -> LinkListResponseScheme:
     links = await CollectionManager().get_links(
         collection_id=collection_id,
@@ -11,7 +11,10 @@ from src.api.schemes.response import (
     Response403Scheme,
     Response404Scheme,
     Response422Scheme,
-    Response500Scheme
+    Response429Scheme,
+    Response500Scheme,
+    Response503Scheme,
+    Response504Scheme
 )
 
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -71,15 +74,17 @@ async def sc_response_exception_handler(
         status.HTTP_403_FORBIDDEN: Response403Scheme,
         status.HTTP_404_NOT_FOUND: Response404Scheme,
         status.HTTP_422_UNPROCESSABLE_ENTITY: Response422Scheme,
+        status.HTTP_429_TOO_MANY_REQUESTS: Response429Scheme,
         status.HTTP_500_INTERNAL_SERVER_ERROR: Response500Scheme,
+        status.HTTP_503_SERVICE_UNAVAILABLE: Response503Scheme,
+        status.HTTP_504_GATEWAY_TIMEOUT: Response504Scheme,
     }
 
     status_code = exc.status_code
-    scheme = schemes_status_code_dict.get(
-        status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
-    )
+    scheme = schemes_status_code_dict.get(status_code, Response500Scheme)
 
     return JSONResponse(
         status_code=status_code,
-        content=scheme(message=exc.detail).model_dump()
+        content=scheme(message=exc.detail).model_dump(),
+        headers=exc.headers
     )
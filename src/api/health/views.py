@@ -0,0 +1,61 @@
+import http
+
+from fastapi import APIRouter, HTTPException, Request
+
+from modules.common.metrics import metrics
+
+from src.api.schemes.response import (
+    Response200Scheme,
+    Response503Scheme
+)
+
+
+router = APIRouter(
+    prefix='/health',
+    tags=['Health'],
+)
+
+
+@router.get(
+    '/live',
+    responses={
+        200: {
+            'model': Response200Scheme,
+            'description': 'Process is running'
+        }
+    },
+    summary='Liveness probe.'
+)
+async def live() -> Response200Scheme:
+    return Response200Scheme()
+
+
+@router.get(
+    '/ready',
+    responses={
+        200: {
+            'model': Response200Scheme,
+            'description': 'Application is ready to serve requests'
+        },
+        503: {
+            'model': Response503Scheme,
+            'description': 'Database warmup is not completed yet'
+        }
+    },
+    summary='Readiness probe, succeeds once database warmup has completed.'
+)
+async def ready(request: Request) -> Response200Scheme:
+    if not getattr(request.app.state, 'ready', False):
+        raise HTTPException(
+            status_code=http.HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Application is not ready'
+        )
+    return Response200Scheme()
+
+
+@router.get(
+    '/metrics',
+    summary='Counters, timings and gauges of the worker process.'
+)
+async def get_metrics() -> dict:
+    return metrics.snapshot()
@@ -1,13 +1,49 @@
-from fastapi import HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+
+import database
+from database.routing import (
+    READ_ONLY_METHODS, get_request_user_id, primary_pin
+)
+from database.warmup import warm_up_engine
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 
-from settings import AppConfig
+from logger import logger
+
+from modules.auth.jwt.keys import key_ring
+from modules.common.helpers import email_templates
+from modules.common.http import http_clients
+from modules.common.unisender import unisender_client
+from modules.email.helpers import email_transport
+from modules.invalidation.bus import invalidation_bus
+
+from services.email_outbox import email_outbox_dispatcher
+from services.rate_limit import rate_limits
+from services.revocation import revocation_filter
+from services.session import session_activity
+
+from settings import (
+    AppConfig,
+    Database,
+    DeadlineConfig,
+    EmailOutboxConfig,
+    IdempotencyConfig,
+    InvalidationConfig,
+    JWTConfig,
+    OverloadConfig,
+    RateLimitConfig
+)
 
 from src.api.handlers import (
     internal_exception_handler,
     sc_response_exception_handler,
     validation_exception_handler
 )
+from src.api.helpers.deadline import DeadlineMiddleware
+from src.api.helpers.idempotency import IdempotencyMiddleware
+from src.api.helpers.overload import shed_load
 
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -37,3 +73,108 @@ def init_middleware(app) -> None:
     )
 
     app.add_middleware(SessionMiddleware, secret_key=AppConfig.secret_key)
+
+    if Database.replica_url:
+        app.middleware('http')(pin_writes_to_primary)
+
+    if IdempotencyConfig.enabled:
+        app.add_middleware(IdempotencyMiddleware)
+
+    if DeadlineConfig.enabled:
+        app.add_middleware(DeadlineMiddleware)
+
+    # Added last to run first, so shed requests cost as little as possible
+    if OverloadConfig.enabled:
+        app.middleware('http')(shed_load)
+
+
+async def pin_writes_to_primary(request: Request, call_next):
+    """
+    Pins the user to the primary database after a successful write request
+    so that the following reads are not served by a lagging replica, on
+    any worker.
+    """
+    response = await call_next(request)
+    if (
+            request.method not in READ_ONLY_METHODS
+            and response.status_code < 400
+            and (user_id := get_request_user_id(request))
+    ):
+        response.set_cookie(
+            primary_pin.cookie,
+            primary_pin.create(user_id),
+            max_age=primary_pin.pin_seconds,
+            httponly=True,
+            samesite='lax'
+        )
+    return response
+
+
+WARMUP_RETRY_DELAY_SECONDS = 1
+WARMUP_MAX_RETRY_DELAY_SECONDS = 30
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Pre-opens pool connections of the primary and replica engines and
+    primes their statement caches, retrying until the database is
+    reachable. Marks the application as ready when done.
+    """
+    engines = [
+        engine for engine in (database.engine, database.replica_engine)
+        if engine is not None
+    ]
+    delay = WARMUP_RETRY_DELAY_SECONDS
+    while True:
+        try:
+            for engine in engines:
+                await warm_up_engine(engine, Database.warmup_connections)
+        except Exception as e:
+            logger.warning(
+                f'Database warmup failed, retrying in {delay}s: {e}'
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY_SECONDS)
+        else:
+            break
+    app.state.ready = True
+    logger.info('Application is ready')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the database engines and shared HTTP clients on startup and
+    closes them on shutdown. Warmup runs in background so liveness probes
+    are answered right away, while readiness waits for it.
+    """
+    app.state.ready = False
+    key_ring.check()
+    database.init_engines()
+    http_clients.start()
+    unisender_client.start()
+    email_transport.start()
+    email_templates.precompile_local()
+    warmup_task = asyncio.create_task(warm_up(app))
+    if EmailOutboxConfig.dispatch_in_app:
+        email_outbox_dispatcher.start()
+    if JWTConfig.stateless:
+        revocation_filter.start()
+    if InvalidationConfig.enabled:
+        invalidation_bus.start()
+    session_activity.start()
+    if RateLimitConfig.enabled:
+        rate_limits.start()
+    try:
+        yield
+    finally:
+        warmup_task.cancel()
+        await email_outbox_dispatcher.stop()
+        await revocation_filter.stop()
+        await session_activity.stop()
+        await rate_limits.stop()
+        await invalidation_bus.stop()
+        await http_clients.close()
+        await unisender_client.close()
+        await email_transport.close()
+        await database.dispose_engines()
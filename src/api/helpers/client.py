@@ -0,0 +1,39 @@
+import ipaddress
+
+from fastapi import Request
+
+from settings import ServerConfig
+
+
+TRUSTED_NETWORKS = [
+    ipaddress.ip_network(proxy, strict=False)
+    for proxy in ServerConfig.trusted_proxies
+]
+
+
+def is_trusted_proxy(address: str | None) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_NETWORKS)
+
+
+def get_client_ip(request: Request) -> str | None:
+    """
+    Returns the address of the client. Requests from trusted proxies are
+    attributed to the last address of X-Forwarded-For which is not a
+    trusted proxy, or to X-Real-IP without that header. Headers of other
+    peers are ignored, as any client can set them.
+    """
+    host = request.client.host if request.client else None
+    if not is_trusted_proxy(host):
+        return host
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        for address in reversed(addresses):
+            if not is_trusted_proxy(address):
+                return address
+        return addresses[0]
+    return request.headers.get('X-Real-IP', host)
@@ -0,0 +1,164 @@
+import asyncio
+import contextlib
+import http
+
+from fastapi.responses import JSONResponse
+
+from modules.common import deadline
+from modules.common.metrics import metrics
+
+from settings import DeadlineConfig
+
+from src.api.schemes.response import Response504Scheme
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Matched in order by method (None for any) and path prefix. Routes with
+# no timeout run without a deadline, the others default to DEADLINE_DEFAULT
+ROUTE_TIMEOUTS: tuple[tuple[str | None, str, float | None], ...] = (
+    (None, '/health/', None),
+    (None, '/.well-known/', None),
+    # Fetches the page of the link
+    ('POST', '/link/', 20),
+    # Fetches pages of its links
+    ('POST', '/batch/', 30),
+)
+
+
+def get_route_timeout(method: str, path: str) -> float | None:
+    for route_method, prefix, timeout in ROUTE_TIMEOUTS:
+        if route_method in (None, method) and path.startswith(prefix):
+            return timeout
+    return DeadlineConfig.default_timeout
+
+
+class DeadlineMiddleware:
+    """
+    Runs every request under a deadline: the seconds of the
+    DEADLINE_HEADER header, up to DEADLINE_MAX, or the timeout of the
+    route. Database transactions and outgoing HTTP calls of the request
+    are limited to the time left (see `modules.common.deadline`).
+
+    The request is cancelled when its client disconnects or the deadline
+    passes. A request past its deadline, or whose statement was cancelled
+    by the statement timeout, gets 504 unless its response has started.
+
+    The body is read before the request is handled, so a disconnect is
+    noticed while it is being handled.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            header: str = DeadlineConfig.header,
+            max_timeout: float = DeadlineConfig.max_timeout
+    ):
+        self.app = app
+        self.header = header.lower().encode()
+        self.max_timeout = max_timeout
+
+    def get_timeout(self, scope: Scope) -> float | None:
+        timeout = get_route_timeout(scope['method'], scope['path'])
+        if timeout is None:
+            return None
+        for name, value in scope['headers']:
+            if name != self.header:
+                continue
+            try:
+                requested = float(value)
+            except ValueError:
+                break
+            if requested > 0:
+                timeout = requested
+            break
+        return min(timeout, self.max_timeout)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        timeout = self.get_timeout(scope)
+        if timeout is None:
+            return await self.app(scope, receive, send)
+        token = deadline.set_deadline(timeout)
+        try:
+            await self.run(scope, receive, send)
+        finally:
+            deadline.reset_deadline(token)
+
+    async def run(self, scope: Scope, receive: Receive, send: Send) -> None:
+        messages: list[Message] = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                metrics.increment('deadline.disconnected')
+                return
+            messages.append(message)
+            if not message.get('more_body', False):
+                break
+
+        disconnected = asyncio.Event()
+        response = {'started': False, 'complete': False}
+
+        async def receive_request() -> Message:
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send_response(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                response['started'] = True
+            elif not message.get('more_body', False):
+                response['complete'] = True
+            await send(message)
+
+        async def wait_disconnect() -> None:
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        handler = asyncio.create_task(
+            self.app(scope, receive_request, send_response)
+        )
+        watcher = asyncio.create_task(wait_disconnect())
+        try:
+            await asyncio.wait(
+                (handler, watcher),
+                timeout=deadline.get_remaining(),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            handler.cancel()
+            raise
+        finally:
+            watcher.cancel()
+
+        # The server reports a disconnect once the response is sent
+        if not handler.done() and not response['complete']:
+            handler.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await handler
+            if disconnected.is_set():
+                metrics.increment('deadline.disconnected')
+                return
+            metrics.increment('deadline.exceeded')
+            if not response['started']:
+                await self.send_timeout(scope, send)
+            return
+
+        try:
+            await handler
+        except Exception as e:
+            if not deadline.is_deadline_error(e) or response['started']:
+                raise
+            metrics.increment('deadline.exceeded')
+            await self.send_timeout(scope, send)
+
+    @staticmethod
+    async def send_timeout(scope: Scope, send: Send) -> None:
+        timeout_response = JSONResponse(
+            status_code=http.HTTPStatus.GATEWAY_TIMEOUT,
+            content=Response504Scheme().model_dump()
+        )
+        await timeout_response(scope, None, send)
@@ -0,0 +1,336 @@
+import asyncio
+import datetime
+import hashlib
+import http
+
+import database
+
+from fastapi.responses import JSONResponse, Response
+
+from jose import JWTError
+
+from logger import logger
+
+from modules.auth.jwt.keys import key_ring
+from modules.common import deadline
+from modules.common.metrics import metrics
+from modules.time.helpers import get_utc_now
+
+from services.idempotency import IdempotencyService, StoredResponse
+
+from settings import IdempotencyConfig, JWTConfig
+
+from src.api.schemes.response import Response400Scheme, Response422Scheme
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Routes honoring the header by method and path, and whether their keys
+# belong to the authenticated user rather than to anonymous clients
+IDEMPOTENT_ROUTES: dict[tuple[str, str], bool] = {
+    ('POST', '/link/'): True,
+    ('POST', '/collection/'): True,
+    ('POST', '/batch/'): True,
+    ('POST', '/registration/'): False,
+}
+
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY_SIZE = 64 * 1024
+MAX_POLL_INTERVAL = 1
+# Retrying these gets another outcome, e.g. with a refreshed token, so
+# they are not replayed
+TRANSIENT_STATUS_CODES = frozenset({
+    http.HTTPStatus.UNAUTHORIZED,
+    http.HTTPStatus.FORBIDDEN,
+    http.HTTPStatus.REQUEST_TIMEOUT,
+    http.HTTPStatus.CONFLICT,
+    http.HTTPStatus.TOO_MANY_REQUESTS,
+})
+
+
+class FingerprintMismatch(Exception):
+    """Raised when a key is sent again with another request"""
+
+
+def get_user_id(scope: Scope) -> str | None:
+    """Returns user_id of a valid bearer token of the request"""
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            break
+    else:
+        return None
+    scheme, _, token = value.decode('latin-1').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    try:
+        claims = key_ring.decode(token)
+    except JWTError:
+        return None
+    user_info = claims.get(JWTConfig.user_property)
+    if not isinstance(user_info, dict):
+        return None
+    return user_info.get('user_id')
+
+
+def is_storable(status_code: int, body: bytes) -> bool:
+    return (
+        status_code < http.HTTPStatus.INTERNAL_SERVER_ERROR
+        and status_code not in TRANSIENT_STATUS_CODES
+        and len(body) <= MAX_STORED_BODY_SIZE
+    )
+
+
+class IdempotencyMiddleware:
+    """
+    Runs a request of IDEMPOTENT_ROUTES sent with an Idempotency-Key
+    header once, and answers retries with the same key with its stored
+    response, marked with an `Idempotent-Replayed` header.
+
+    Keys are scoped by route and user, and are kept for IDEMPOTENCY_TTL
+    along with the fingerprint of the request query and body; a key sent
+    again with another request gets 422. Responses of server errors and
+    transient failures are not stored, so their retries run again.
+
+    A retry arriving while the first request is in progress waits for it:
+    on the same worker for its completion, on other workers by polling the
+    key. If the first request is lost, a retry takes the key over after
+    IDEMPOTENCY_LOCK_SECONDS. A retry of a completed request costs one
+    primary key lookup.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            header: str = IdempotencyConfig.header,
+            ttl: int = IdempotencyConfig.ttl,
+            lock_seconds: int = IdempotencyConfig.lock_seconds,
+            poll_interval: float = IdempotencyConfig.poll_interval
+    ):
+        self.app = app
+        self.header = header.lower().encode()
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.poll_interval = poll_interval
+        # Requests in progress on this worker by key
+        self._pending: dict[str, tuple[str, asyncio.Future]] = {}
+
+    def get_key(self, scope: Scope) -> str | None:
+        for name, value in scope['headers']:
+            if name == self.header:
+                return value.decode('latin-1')
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        authenticated = IDEMPOTENT_ROUTES.get(
+            (scope['method'], scope['path'])
+        )
+        client_key = self.get_key(scope)
+        if authenticated is None or client_key is None:
+            return await self.app(scope, receive, send)
+        if not 0 < len(client_key) <= MAX_KEY_LENGTH:
+            return await self.send_error(
+                scope, send, http.HTTPStatus.BAD_REQUEST,
+                f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters'
+            )
+        owner = ''
+        if authenticated:
+            owner = get_user_id(scope)
+            if owner is None:
+                # Rejected by the route
+                return await self.app(scope, receive, send)
+
+        messages: list[Message] = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            messages.append(message)
+            if not message.get('more_body', False):
+                break
+        body = b''.join(message.get('body', b'') for message in messages)
+
+        key = hashlib.sha256(
+            f'{owner}\n{scope["method"]} {scope["path"]}\n{client_key}'
+            .encode()
+        ).hexdigest()
+        fingerprint = hashlib.sha256(
+            scope['query_string'] + b'\n' + body
+        ).hexdigest()
+
+        async def receive_request() -> Message:
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        try:
+            stored = await self.run(
+                key, fingerprint, scope, receive_request, send
+            )
+        except FingerprintMismatch:
+            metrics.increment('idempotency.mismatches')
+            return await self.send_error(
+                scope, send, http.HTTPStatus.UNPROCESSABLE_ENTITY,
+                'Idempotency-Key was used for another request'
+            )
+        if stored is not None:
+            metrics.increment('idempotency.replayed')
+            await Response(
+                content=stored.body,
+                status_code=stored.status_code,
+                media_type=stored.content_type,
+                headers={'Idempotent-Replayed': 'true'}
+            )(scope, receive, send)
+
+    async def run(
+            self,
+            key: str,
+            fingerprint: str,
+            scope: Scope,
+            receive: Receive,
+            send: Send
+    ) -> StoredResponse | None:
+        """
+        Runs the request or waits for the one in progress with the key.
+
+        Returns:
+            the stored response to replay, None if the request has run
+        """
+        while key in self._pending:
+            pending_fingerprint, future = self._pending[key]
+            if pending_fingerprint != fingerprint:
+                raise FingerprintMismatch()
+            metrics.increment('idempotency.waited')
+            stored = await asyncio.shield(future)
+            if stored is not None:
+                return stored
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = (fingerprint, future)
+        stored = None
+        try:
+            locked_until, stored = await self.acquire(key, fingerprint)
+            if stored is None:
+                stored = await self.execute(
+                    key, locked_until, scope, receive, send
+                )
+                return None
+            return stored
+        finally:
+            del self._pending[key]
+            future.set_result(stored)
+
+    async def acquire(
+            self,
+            key: str,
+            fingerprint: str
+    ) -> tuple[datetime.datetime | None, StoredResponse | None]:
+        """
+        Returns the lock of the claimed key, or the stored response of
+        the key once its request completes on another worker.
+        """
+        delay = self.poll_interval
+        while True:
+            async with database.Session() as db_session:
+                record = await IdempotencyService.get(db_session, key)
+            if record is not None and record.fingerprint != fingerprint:
+                raise FingerprintMismatch()
+            if record is not None and record.status_code is not None:
+                return None, StoredResponse(
+                    status_code=record.status_code,
+                    content_type=record.content_type,
+                    body=record.response_body
+                )
+            # Claimed unless another request holds the key
+            if record is None or record.locked_until < get_utc_now():
+                async with database.Session() as db_session:
+                    locked_until = await IdempotencyService.claim(
+                        db_session,
+                        key,
+                        fingerprint,
+                        self.lock_seconds,
+                        self.ttl
+                    )
+                if locked_until is not None:
+                    return locked_until, None
+            metrics.increment('idempotency.waited')
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+    async def execute(
+            self,
+            key: str,
+            locked_until: datetime.datetime,
+            scope: Scope,
+            receive: Receive,
+            send: Send
+    ) -> StoredResponse | None:
+        """Runs the request and stores its response if it may be replayed"""
+        response = {'status_code': None, 'content_type': None}
+        chunks: list[bytes] = []
+
+        async def send_response(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                response['status_code'] = message['status']
+                for name, value in message.get('headers', []):
+                    if name == b'content-type':
+                        response['content_type'] = value.decode('latin-1')
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, receive, send_response)
+            body = b''.join(chunks)
+            if response['status_code'] is not None and is_storable(
+                    response['status_code'], body
+            ):
+                stored = StoredResponse(
+                    status_code=response['status_code'],
+                    content_type=response['content_type'],
+                    body=body
+                )
+        finally:
+            try:
+                await self.complete(key, locked_until, stored)
+            except Exception as e:
+                # The key is taken over by a retry once its lock expires
+                metrics.increment('idempotency.store_failures')
+                logger.warning(f'Idempotency key was not stored: {e}')
+        return stored
+
+    async def complete(
+            self,
+            key: str,
+            locked_until: datetime.datetime,
+            stored: StoredResponse | None
+    ) -> None:
+        # Runs for a request which has run out of time as well
+        with deadline.suspended():
+            async with database.Session() as db_session:
+                if stored is None:
+                    await IdempotencyService.release(
+                        db_session, key, locked_until
+                    )
+                elif await IdempotencyService.store(
+                        db_session, key, locked_until, stored, self.ttl
+                ):
+                    metrics.increment('idempotency.stored')
+
+    @staticmethod
+    async def send_error(
+            scope: Scope,
+            send: Send,
+            status_code: int,
+            message: str
+    ) -> None:
+        scheme = {
+            http.HTTPStatus.BAD_REQUEST: Response400Scheme,
+            http.HTTPStatus.UNPROCESSABLE_ENTITY: Response422Scheme,
+        }[status_code]
+        await JSONResponse(
+            status_code=status_code,
+            content=scheme(message=message).model_dump()
+        )(scope, None, send)
@@ -0,0 +1,93 @@
+import http
+
+import database
+from database.pool import pool_monitor
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from modules.common.concurrency import AdaptiveConcurrencyLimiter, Priority
+from modules.common.metrics import metrics
+
+from settings import OverloadConfig
+
+from src.api.schemes.response import Response503Scheme
+
+
+# Matched in order by method (None for any) and path prefix. Routes with
+# no priority are never shed
+ROUTE_PRIORITIES: tuple[tuple[str | None, str, Priority | None], ...] = (
+    (None, '/health/', None),
+    (None, '/.well-known/', None),
+    ('POST', '/auth/refresh/', Priority.CRITICAL),
+    (None, '/registration/', Priority.LOW),
+    (None, '/password-recovery/', Priority.LOW),
+    # Fetches the page of the link
+    ('POST', '/link/', Priority.LOW),
+    # Fetches pages of its links and holds a transaction
+    ('POST', '/batch/', Priority.LOW),
+)
+
+concurrency_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=OverloadConfig.initial_limit,
+    min_limit=OverloadConfig.min_limit,
+    max_limit=OverloadConfig.max_limit,
+    target_wait=OverloadConfig.target_pool_wait,
+    adjust_interval=OverloadConfig.adjust_interval,
+    backoff=OverloadConfig.backoff
+)
+
+metrics.gauge('overload.limit', lambda: concurrency_limiter.limit)
+metrics.gauge('overload.in_flight', lambda: concurrency_limiter.in_flight)
+metrics.gauge(
+    'db.pool.checked_out',
+    lambda: database.engine.pool.checkedout() if database.engine else 0
+)
+
+
+def get_priority(method: str, path: str) -> Priority | None:
+    for route_method, prefix, priority in ROUTE_PRIORITIES:
+        if route_method in (None, method) and path.startswith(prefix):
+            return priority
+    return Priority.NORMAL
+
+
+def adjust_limit() -> None:
+    waits = pool_monitor.collect()
+    change = concurrency_limiter.adjust(
+        max(waits.average, pool_monitor.get_longest_wait()), waits.timeouts
+    )
+    if change < 0:
+        metrics.increment('overload.limit_decreased')
+    elif change > 0:
+        metrics.increment('overload.limit_increased')
+
+
+async def shed_load(request: Request, call_next):
+    """
+    Rejects requests with 503 and Retry-After once the adaptive
+    concurrency limit for their priority is in use, before they wait for
+    a database connection and slow down the admitted ones.
+    """
+    priority = get_priority(request.method, request.url.path)
+    if priority is None:
+        return await call_next(request)
+    name = priority.name.lower()
+    if not concurrency_limiter.try_acquire(priority):
+        metrics.increment(f'overload.shed.{name}')
+        if concurrency_limiter.is_due():
+            adjust_limit()
+        return JSONResponse(
+            status_code=http.HTTPStatus.SERVICE_UNAVAILABLE,
+            content=Response503Scheme(
+                message='Server is overloaded'
+            ).model_dump(),
+            headers={'Retry-After': str(OverloadConfig.retry_after)}
+        )
+    metrics.increment(f'overload.admitted.{name}')
+    try:
+        return await call_next(request)
+    finally:
+        concurrency_limiter.release()
+        if concurrency_limiter.is_due():
+            adjust_limit()
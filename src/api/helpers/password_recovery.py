@@ -1,8 +1,15 @@
+import http
 from datetime import datetime
 
-from database.models import ConfirmationCodeModel
+from database.models import ConfirmationCodeModel, UserModel
+
+from fastapi import HTTPException
 
 from modules.auth.helpers import get_password_hash
+from modules.invalidation.bus import Channel, invalidation_bus
+
+from services.confirmation_code import ConfirmationCodeService
+from services.session import SessionService
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -27,22 +34,40 @@ async def create_reset_code_scheme(
 
 
 async def process_password_recovery(
-        confirmation_code: ConfirmationCodeModel,
+        confirmation_code: str,
         password: str,
         db_session: AsyncSession = None
-):
+) -> int:
     """
-    Recovery password and set reset code status on 'used'.
+    Set reset code status on 'used', recovery password and close sessions
+    of the user in one transaction.
 
     Args:
-        confirmation_code (ConfirmationCodeModel): confirmation code model.
+        confirmation_code (str): reset code from email.
         password (str):, new password.
         db_session (AsyncSession): database session.
+
+    Returns:
+        number of closed sessions
     """
-    await db_session.refresh(confirmation_code)
-    confirmation_code.used = True
-    user = confirmation_code.user
+    user_id = await ConfirmationCodeService.use_confirmation_code(
+        confirmation_code,
+        db_session
+    )
+    if not user_id:
+        raise HTTPException(
+            status_code=http.HTTPStatus.BAD_REQUEST,
+            detail='Reset code not found, expired or already used'
+        )
+    user = await db_session.get(UserModel, user_id)
     user.updated_at = datetime.utcnow()
     user.password_hash = await get_password_hash(password)
-    db_session.add_all([user, confirmation_code])
+    db_session.add(user)
+    session_ids = await SessionService.close_sessions(
+        user_id=user_id,
+        db_session=db_session,
+        commit=False
+    )
     await db_session.commit()
+    invalidation_bus.publish(Channel.SESSIONS, *session_ids)
+    return len(session_ids)
@@ -1,6 +1,8 @@
 import http
 from datetime import datetime
 
+from database.models import UserModel
+
 from fastapi import HTTPException
 
 from services.confirmation_code import ConfirmationCodeService
@@ -27,18 +29,20 @@ async def abstract_confirmation(
         user_attribute (str): user attribute to check (email or phone).
         confirmation_scheme_class: scheme class to use for the response.
     """
-    confirmation = await ConfirmationCodeService.get_confirmation_code_by_code(
+    user_id = await ConfirmationCodeService.use_confirmation_code(
         confirmation_code,
         db_session
     )
 
-    if not confirmation:
+    if not user_id:
         raise HTTPException(
             status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='Confirmation code not found'
+            detail='Confirmation code not found, expired or already used'
         )
 
-    user = confirmation.user
+    # Usually taken from the identity map, the user is loaded together
+    # with the code by the view
+    user = await db_session.get(UserModel, user_id)
     if not user:
         raise HTTPException(
             status_code=http.HTTPStatus.NOT_FOUND,
@@ -52,21 +56,10 @@ async def abstract_confirmation(
             detail=f'No {user_attribute} to confirm'
         )
 
-    if confirmation.expired_at < datetime.utcnow():
-        raise HTTPException(
-            status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='Confirmation code expired'
-        )
-    if confirmation.used:
-        raise HTTPException(
-            status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='This confirmation code already used'
-        )
-    confirmation.used = True
     setattr(user, f'{user_attribute}_verified', True)
     user.updated_at = datetime.utcnow()
 
-    db_session.add_all([user, confirmation])
+    db_session.add(user)
     await db_session.flush()
 
     response_scheme = confirmation_scheme_class(
@@ -1,13 +1,14 @@
 from uuid import UUID
 
-from database import get_session
+from database import get_read_session, get_session
 
 from fastapi import APIRouter, Depends, Query
 
-from modules.auth.classes import JWTBearer
+from modules.auth.classes import JWTBearer, ReplicaJWTBearer
 from modules.auth.schemes import UserInfo
 
 from services.link import LinkManager
+from services.rate_limit import rate_limits
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -19,7 +20,8 @@ from src.api.schemes.link import (
 from src.api.schemes.response import (
     ExceptionScheme,
     Response200Scheme,
-    jwt_bearer_responses
+    jwt_bearer_responses,
+    rate_limit_responses
 )
 
 
@@ -50,8 +52,8 @@ router = APIRouter(
 )
 async def get_link(
         link_id: UUID = Query(...),
-        db_session: AsyncSession = Depends(get_session),
-        user_info: UserInfo = Depends(JWTBearer())
+        db_session: AsyncSession = Depends(get_read_session),
+        user_info: UserInfo = Depends(ReplicaJWTBearer())
 ) -> LinkResponseScheme:
     link = await LinkManager().get(
         link_id=link_id,
@@ -78,6 +80,7 @@ async def get_link(
             'description': 'Link successfully created',
         },
         **jwt_bearer_responses,
+        **rate_limit_responses,
         422: {
             'model': ExceptionScheme,
             'description': 'Invalid request scheme'
@@ -94,6 +97,7 @@ async def create_link(
         db_session: AsyncSession = Depends(get_session),
         user_info: UserInfo = Depends(JWTBearer())
 ) -> LinkResponseScheme:
+    rate_limits.check('link_create', user_id=user_info.user_id)
     link = await LinkManager().create(
         link=link,
         user_id=user_info.user_id,
@@ -1,18 +1,17 @@
-import datetime
 import http
 
 from database import get_session
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
-from services.confirmation_code import ConfirmationCodeService
 from services.password_recovery import (
     EmailPasswordRecovery
 )
-from services.session import SessionService
+from services.rate_limit import rate_limits
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.helpers.client import get_client_ip
 from src.api.helpers.password_recovery import (
     create_reset_code_scheme,
     process_password_recovery
@@ -22,7 +21,9 @@ from src.api.schemes.password_recovery import (
     EmailRecoveryScheme,
     PasswordScheme,
 )
-from src.api.schemes.response import ExceptionScheme, Response200Scheme
+from src.api.schemes.response import (
+    ExceptionScheme, Response200Scheme, rate_limit_responses
+)
 
 
 password_recovery_router = APIRouter(
@@ -42,6 +43,7 @@ password_recovery_router = APIRouter(
             'model': ExceptionScheme,
             'description': 'User with this credentials not exists.'
         },
+        **rate_limit_responses,
         500: {
             'model': ExceptionScheme,
             'description': 'Internal server error'
@@ -51,8 +53,14 @@ password_recovery_router = APIRouter(
 )
 async def password_recovery_request(
         credentials: EmailRecoveryScheme,
+        request: Request,
         db_session: AsyncSession = Depends(get_session)
 ):
+    rate_limits.check(
+        'password_recovery',
+        ip=get_client_ip(request),
+        email=credentials.email
+    )
     if isinstance(credentials, EmailRecoveryScheme):
         confirm_code_model = await EmailPasswordRecovery(
         ).password_recovery_request(
@@ -99,31 +107,8 @@ async def password_recovery(
         request: PasswordScheme,
         db_session: AsyncSession = Depends(get_session)
 ):
-    confirm = await ConfirmationCodeService.get_confirmation_code_by_code(
-        confirmation_code,
-        db_session
-    )
-    if not confirm:
-        raise HTTPException(
-            status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='Reset code not found'
-        )
-
-    if confirm.expired_at < datetime.datetime.utcnow():
-        raise HTTPException(
-            status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='Reset code code expired'
-        )
-    if confirm.used:
-        raise HTTPException(
-            status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='This reset code already used'
-        )
-    await process_password_recovery(confirm, request.password, db_session)
-    await db_session.refresh(confirm)
-    closed_sessions_count = await SessionService.close_sessions(
-        user_id=confirm.user_id,
-        db_session=db_session
+    closed_sessions_count = await process_password_recovery(
+        confirmation_code, request.password, db_session
     )
 
     return Response200Scheme(message=(
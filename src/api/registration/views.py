@@ -4,26 +4,32 @@ import http
 from database import get_session
 from database.models import ConfirmationCodeModel
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from modules.common.helpers import generate_random_string
 from modules.common.mixins import SendEmailMixin
+from modules.common.templates import EmailTemplate
 
 from services.confirmation_code import ConfirmationCodeService
+from services.email_outbox import email_outbox_dispatcher
+from services.rate_limit import rate_limits
 from services.registration import EmailRegistration
 from services.user import UserService
 
-from settings import TemplatesConfig, UnisenderConfig
+from settings import TemplatesConfig
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.helpers.client import get_client_ip
 from src.api.helpers.registration import (
     email_confirmation
 )
 from src.api.schemes.registration import (
     EmailConfirmationOutScheme, EmailRegisterScheme, EmailResendCodeScheme,
 )
-from src.api.schemes.response import ExceptionScheme, Response200Scheme
+from src.api.schemes.response import (
+    ExceptionScheme, Response200Scheme, rate_limit_responses
+)
 
 
 registration_router = APIRouter(
@@ -43,6 +49,7 @@ registration_router = APIRouter(
             'model': ExceptionScheme,
             'description': 'User already registered.'
         },
+        **rate_limit_responses,
         500: {
             'model': ExceptionScheme,
             'description': 'Internal server error'
@@ -52,8 +59,14 @@ registration_router = APIRouter(
 )
 async def registration(
         request: EmailRegisterScheme,
+        http_request: Request,
         db_session: AsyncSession = Depends(get_session)
 ) -> Response200Scheme:
+    rate_limits.check(
+        'registration',
+        ip=get_client_ip(http_request),
+        email=request.email
+    )
     if isinstance(request, EmailRegisterScheme):
         user = await EmailRegistration().register(
             request,
@@ -94,7 +107,7 @@ async def confirmation(
         confirmation_code: str,
         db_session: AsyncSession = Depends(get_session)
 ) -> EmailConfirmationOutScheme:
-    confirm = await ConfirmationCodeService.get_confirmation_code_by_code(
+    confirm = await ConfirmationCodeService.get_valid_confirmation_code(
         confirmation_code,
         db_session
     )
@@ -102,7 +115,7 @@ async def confirmation(
     if not confirm:
         raise HTTPException(
             status_code=http.HTTPStatus.BAD_REQUEST,
-            detail='Confirmation code not found'
+            detail='Confirmation code not found, expired or already used'
         )
 
     user = confirm.user
@@ -133,6 +146,7 @@ async def confirmation(
             'model': ExceptionScheme,
             'description': 'Problem with sending confirmation code.'
         },
+        **rate_limit_responses,
         500: {
             'model': ExceptionScheme,
             'description': 'Internal server error'
@@ -142,8 +156,14 @@ async def confirmation(
 )
 async def resend_code(
     request: EmailResendCodeScheme,
+    http_request: Request,
     db_session: AsyncSession = Depends(get_session)
 ) -> Response200Scheme:
+    rate_limits.check(
+        'resend_code',
+        ip=get_client_ip(http_request),
+        email=request.email
+    )
     user = await UserService.get_by_email(request.email, db_session)
 
     if not user:
@@ -164,7 +184,7 @@ async def resend_code(
 
     code = generate_random_string(10)
     confirm_code = ConfirmationCodeModel(
-        code=code,
+        code=ConfirmationCodeService.hash_code(code),
         user_id=user.id,
         expired_at=datetime.datetime.utcnow() + datetime.timedelta(
             minutes=60
@@ -173,14 +193,16 @@ async def resend_code(
     db_session.add(confirm_code)
 
     template_data = {'verification_link': code}
-    await SendEmailMixin.send_email_to_user_via_unisender(
+    SendEmailMixin.enqueue_email_to_user(
         message_subject=TemplatesConfig.subject_verification,
         template_data=template_data,
-        template_id=UnisenderConfig.registration_template_id,
-        email_address=request.email
+        template_id=EmailTemplate.verification,
+        email_address=request.email,
+        db_session=db_session
     )
 
     await db_session.commit()
+    email_outbox_dispatcher.wake_up()
 
     return Response200Scheme(
         message='New confirmation code successfully sent.'
@@ -1,3 +1,4 @@
+import datetime
 import http
 from typing import List
 from uuid import UUID
@@ -40,6 +41,9 @@ class SessionScheme(BaseModel):
     ])
     ip: str = Field(examples=['127.0.0.1', '192.168.0.1'])
     is_active: bool = Field(examples=[True, False], default=True)
+    last_seen_at: datetime.datetime = Field(
+        examples=[datetime.datetime(2024, 5, 20, 12, 30)]
+    )
 
 
 class SessionsListScheme(BaseModel):
@@ -0,0 +1,105 @@
+import enum
+from typing import Annotated, List, Literal, Optional, Union
+from uuid import UUID
+
+from pydantic import BaseModel, Field, StringConstraints
+
+from settings import BatchConfig
+
+from src.api.schemes.collection import (
+    CollectionDataScheme, CollectionOutScheme
+)
+from src.api.schemes.link import LinkOutScheme, PageDataScheme
+from src.api.schemes.response import DataResponseScheme
+
+
+# Id of an object, or "$<index>" referring to the object created or
+# updated by an earlier operation of the batch
+ObjectId = Union[
+    UUID, Annotated[str, StringConstraints(pattern=r'^\$\d+$')]
+]
+
+
+class BatchMode(enum.Enum):
+    # The first failed operation rolls back the whole batch
+    atomic = 'atomic'
+    # Failed operations are rolled back alone
+    best_effort = 'best_effort'
+
+
+class CreateLinkOperation(BaseModel):
+    op: Literal['create_link']
+    link: str
+
+
+class UpdateLinkOperation(BaseModel):
+    op: Literal['update_link']
+    link_id: ObjectId
+    data: PageDataScheme
+
+
+class DeleteLinkOperation(BaseModel):
+    op: Literal['delete_link']
+    link_id: ObjectId
+
+
+class CreateCollectionOperation(BaseModel):
+    op: Literal['create_collection']
+    data: CollectionDataScheme
+
+
+class UpdateCollectionOperation(BaseModel):
+    op: Literal['update_collection']
+    collection_id: ObjectId
+    data: CollectionDataScheme
+
+
+class DeleteCollectionOperation(BaseModel):
+    op: Literal['delete_collection']
+    collection_id: ObjectId
+
+
+class AddLinkOperation(BaseModel):
+    op: Literal['add_link']
+    link_id: ObjectId
+    collection_id: ObjectId
+
+
+class RemoveLinkOperation(BaseModel):
+    op: Literal['remove_link']
+    link_id: ObjectId
+    collection_id: ObjectId
+
+
+BatchOperation = Annotated[
+    Union[
+        CreateLinkOperation,
+        UpdateLinkOperation,
+        DeleteLinkOperation,
+        CreateCollectionOperation,
+        UpdateCollectionOperation,
+        DeleteCollectionOperation,
+        AddLinkOperation,
+        RemoveLinkOperation,
+    ],
+    Field(discriminator='op')
+]
+
+
+class BatchScheme(BaseModel):
+    mode: BatchMode = BatchMode.atomic
+    operations: List[BatchOperation] = Field(
+        min_length=1, max_length=BatchConfig.max_operations
+    )
+
+
+class BatchResultScheme(BaseModel):
+    success: bool
+    status_code: int
+    message: Optional[str] = None
+    data: Optional[Union[LinkOutScheme, CollectionOutScheme]] = None
+
+
+class BatchResponseScheme(DataResponseScheme):
+    committed: bool
+    data: List[BatchResultScheme]
@@ -36,11 +36,26 @@ class Response422Scheme(BaseModel):
     message: str = 'Unprocessable entity'
 
 
+class Response429Scheme(BaseModel):
+    success: bool = False
+    message: str = 'Too many requests'
+
+
 class Response500Scheme(BaseModel):
     success: bool = False
     message: str = 'Internal server error'
 
 
+class Response503Scheme(BaseModel):
+    success: bool = False
+    message: str = 'Service unavailable'
+
+
+class Response504Scheme(BaseModel):
+    success: bool = False
+    message: str = 'Request deadline exceeded'
+
+
 class ExceptionScheme(BaseModel):
     detail: Any = Field(examples=['Some error occurred.'])
 
@@ -49,6 +64,14 @@ class DataResponseScheme(Response200Scheme):
     data: Dict[str, Any]
 
 
+rate_limit_responses = {
+    429: {
+        'model': Response429Scheme,
+        'description': 'Too many requests, retry after Retry-After seconds'
+    },
+}
+
+
 jwt_bearer_responses = {
     400: {
         'model': ExceptionScheme,
@@ -0,0 +1,71 @@
+import gc
+import importlib
+
+from gunicorn.app.base import BaseApplication
+
+from uvicorn.workers import UvicornWorker
+
+
+APP_PATH = 'src.api.app:app'
+
+
+class AppWorker(UvicornWorker):
+    """
+    Uvicorn worker with uvloop and httptools selected explicitly, so a
+    missing extra fails on startup instead of silently falling back to the
+    pure Python implementations.
+
+    In-flight requests get the gunicorn graceful timeout to finish after
+    SIGTERM or after the worker reaches max requests.
+    """
+    CONFIG_KWARGS = {'loop': 'uvloop', 'http': 'httptools'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+
+def pre_fork(server, worker) -> None:
+    # Objects allocated by the master so far are moved to the permanent
+    # generation, so collections in workers do not touch (and copy) the
+    # memory pages shared after fork.
+    gc.freeze()
+
+
+class Server(BaseApplication):
+    """
+    Gunicorn application running the API in several uvicorn workers.
+
+    Args:
+        options (dict): gunicorn settings, see
+            https://docs.gunicorn.org/en/stable/settings.html
+        app_path (str): import path of the ASGI application
+    """
+
+    def __init__(self, options: dict, app_path: str = APP_PATH):
+        self.options = options
+        self.app_path = app_path
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set('worker_class', f'{__name__}.AppWorker')
+        if self.cfg.preload_app:
+            self.cfg.set('pre_fork', pre_fork)
+
+    def load(self):
+        module_name, _, attribute = self.app_path.partition(':')
+        if not self.cfg.preload_app:
+            return getattr(importlib.import_module(module_name), attribute)
+
+        # Garbage collection is paused while the application is imported,
+        # so objects that end up shared by all workers are not scattered
+        # over pages with freed garbage.
+        gc.disable()
+        try:
+            app = getattr(importlib.import_module(module_name), attribute)
+            gc.freeze()
+        finally:
+            gc.enable()
+        return app
@@ -2,14 +2,14 @@ import http
 
 from fastapi import HTTPException
 
-from jose import JWTError, jwt
+from jose import JWTError
 
-from settings import JWTConfig
+from modules.auth.jwt.keys import key_ring
 
 
 def validate_token(refresh_token: str) -> dict[str, str]:
     try:
-        return jwt.decode(refresh_token, JWTConfig.secret_key)
+        return key_ring.decode(refresh_token)
     except JWTError:
         raise HTTPException(
             status_code=http.HTTPStatus.BAD_REQUEST,
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from modules.auth.jwt.keys import key_ring
+
+from settings import JWTConfig
+
+
+router = APIRouter(
+    prefix='/.well-known',
+    tags=['Auth'],
+)
+
+
+@router.get(
+    '/jwks.json',
+    summary='Public keys verifying tokens signed with EdDSA or ES256.'
+)
+async def get_jwks() -> JSONResponse:
+    """
+    Lets proxies and other services verify tokens without the application.
+    Empty while tokens are signed with the shared secret (HS256).
+    """
+    return JSONResponse(
+        key_ring.get_public_jwks(),
+        headers={
+            'Cache-Control': f'public, max-age={JWTConfig.jwks_max_age}'
+        }
+    )
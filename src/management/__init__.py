@@ -1,6 +1,22 @@
 import click
 
+from src.management.benchmark.hot_paths import benchmark_hot_paths
+from src.management.benchmark.pooling import benchmark_pooling
+from src.management.benchmark.sessions import (
+    benchmark_refresh, benchmark_session_check
+)
+from src.management.benchmark.smtp import benchmark_smtp
+from src.management.benchmark.unisender import benchmark_unisender
+from src.management.benchmark.workers_memory import (
+    benchmark_workers_memory
+)
 from src.management.delete.conf_codes import delete_conf_codes
+from src.management.email.bulk import send_bulk_email
+from src.management.email.dispatch import dispatch_emails
+from src.management.jwt_keys.keys import generate_jwt_key, remove_jwt_key
+from src.management.maintenance.cleanup import cleanup
+from src.management.server.serve import serve
+from src.management.worker.worker import worker
 
 
 @click.group()
@@ -8,4 +24,18 @@ def cli():
     pass
 
 
+cli.add_command(benchmark_hot_paths)
+cli.add_command(benchmark_pooling)
+cli.add_command(benchmark_refresh)
+cli.add_command(benchmark_session_check)
+cli.add_command(benchmark_smtp)
+cli.add_command(benchmark_unisender)
+cli.add_command(benchmark_workers_memory)
+cli.add_command(cleanup)
 cli.add_command(delete_conf_codes)
+cli.add_command(dispatch_emails)
+cli.add_command(generate_jwt_key)
+cli.add_command(remove_jwt_key)
+cli.add_command(send_bulk_email)
+cli.add_command(serve)
+cli.add_command(worker)
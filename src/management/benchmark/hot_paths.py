@@ -0,0 +1,283 @@
+import asyncio
+import json
+import pathlib
+import sys
+import tempfile
+import uuid
+
+import click
+
+from database.models import LinkType
+
+from modules.auth.classes import JWTBearer
+from modules.auth.helpers import get_data_from_token, get_password_hash
+from modules.auth.jwt import JWTUser, jws
+from modules.auth.jwt.keys import KeyRing
+from modules.auth.validators import verify_password
+from modules.benchmark.dataclasses import BenchmarkCase
+from modules.benchmark.helpers import format_results, run_cases
+from modules.common.helpers import (
+    generate_random_string, get_rendered_html, remove_none_values
+)
+from modules.common.templates import EmailTemplateCache, TemplateSource
+
+from services.link import LinkManager
+from services.rate_limit import RateLimits
+
+from settings import JWTConfig, TemplatesConfig
+
+from src.api.schemes.collection import (
+    CollectionOutScheme,
+    LinkListResponseScheme
+)
+from src.api.schemes.link import LinkOutScheme
+
+
+DEFAULT_FIXTURES_DIR = 'contrib/benchmark/html'
+SERIALIZED_LIST_SIZE = 100
+PASSWORD_HASH_ITERATIONS = 20
+
+
+def get_jwt_payload() -> dict:
+    return {
+        JWTConfig.user_property: {
+            'session_id': str(uuid.uuid4()),
+            'user_id': str(uuid.uuid4()),
+            'email': 'user@auth0.com'
+        },
+        'scope': JWTConfig.scope_user
+    }
+
+
+async def build_jwt_cases() -> list[BenchmarkCase]:
+    jwt_generator = JWTUser(None, old_payload=get_jwt_payload())
+    auth_token, _ = await jwt_generator.generate_auth_token()
+    bearer = JWTBearer()
+
+    def bearer_validate_and_get_payload():
+        bearer.validate_token_via_secret(auth_token)
+        bearer.get_payload(auth_token)
+
+    return [
+        BenchmarkCase('jwt_encode_auth_token',
+                      jwt_generator.generate_auth_token),
+        BenchmarkCase('jwt_decode', lambda: get_data_from_token(auth_token)),
+        BenchmarkCase('jwt_bearer_get_payload',
+                      lambda: bearer.get_payload(auth_token)),
+        BenchmarkCase('jwt_bearer_validate_and_get_payload',
+                      bearer_validate_and_get_payload),
+    ]
+
+
+def build_signing_cases(keys_dir: pathlib.Path) -> list[BenchmarkCase]:
+    """
+    Compares signing and verification of every algorithm. Asymmetric
+    tokens are verified with the per-kid cache turned off and on, the
+    latter being the cost for a token seen before.
+    """
+    payload = {**get_jwt_payload(), 'token_uuid': str(uuid.uuid4())}
+    keys_file = keys_dir / 'jwks.json'
+    keys_file.write_text(json.dumps({
+        'keys': [jws.generate_jwk(algorithm) for algorithm in jws.ALGORITHMS]
+    }))
+    cases = []
+    for algorithm in ('HS256', *jws.ALGORITHMS):
+        key_rings = {
+            'jwt_verify': KeyRing(
+                algorithm, JWTConfig.secret_key, str(keys_file), None, 0
+            ),
+        }
+        if algorithm in jws.ALGORITHMS:
+            key_rings['jwt_verify_cached'] = KeyRing(
+                algorithm, JWTConfig.secret_key, str(keys_file), None,
+                JWTConfig.verification_cache_size
+            )
+        token = key_rings['jwt_verify'].encode(payload)
+        cases.append(BenchmarkCase(
+            f'jwt_sign[{algorithm}]',
+            lambda key_ring=key_rings['jwt_verify']: key_ring.encode(payload)
+        ))
+        cases.extend(
+            BenchmarkCase(
+                f'{name}[{algorithm}]',
+                lambda key_ring=key_ring, token=token: key_ring.decode(token)
+            )
+            for name, key_ring in key_rings.items()
+        )
+    return cases
+
+
+async def build_password_cases() -> list[BenchmarkCase]:
+    password = generate_random_string(16)
+    password_hash = await get_password_hash(password)
+    return [
+        BenchmarkCase(
+            'bcrypt_hash',
+            lambda: get_password_hash(password),
+            iterations=PASSWORD_HASH_ITERATIONS,
+            warmup=1
+        ),
+        BenchmarkCase(
+            'bcrypt_verify',
+            lambda: verify_password(password, password_hash),
+            iterations=PASSWORD_HASH_ITERATIONS,
+            warmup=1
+        ),
+    ]
+
+
+def build_parse_cases(fixtures_dir: pathlib.Path) -> list[BenchmarkCase]:
+    link_manager = LinkManager()
+    cases = []
+    for path in sorted(fixtures_dir.glob('*.html')):
+        html = path.read_text(encoding='utf-8')
+        cases.append(BenchmarkCase(
+            f'parse_page_data[{path.stem}]',
+            lambda html=html: link_manager.parse_page_data(html)
+        ))
+    return cases
+
+
+def build_helper_cases() -> list[BenchmarkCase]:
+    data = {
+        'fields': {'email': 'user@auth0.com', 'phone': None},
+        'list_ids': [1, None, 3],
+        'options': [{'name': 'a', 'value': None}, None, {'name': 'b'}],
+        'body': None,
+        'subject': 'Email verification'
+    }
+    return [
+        BenchmarkCase('remove_none_values', lambda: remove_none_values(data)),
+        BenchmarkCase('generate_random_string[10]',
+                      lambda: generate_random_string(10)),
+    ]
+
+
+def build_rate_limit_cases() -> list[BenchmarkCase]:
+    # Limits high enough for every call to be allowed
+    limits = RateLimits(
+        rules={
+            'sliding_window': 'sliding_window:1000000000/60:ip,email',
+            'token_bucket': 'token_bucket:1000000000/1:user',
+        },
+        enabled=True,
+        shared=False,
+        sync_interval=1,
+        max_keys=100000
+    )
+    return [
+        BenchmarkCase(
+            'rate_limit_sliding_window[ip,email]',
+            lambda: limits.check(
+                'sliding_window', ip='127.0.0.1', email='user@auth0.com'
+            )
+        ),
+        BenchmarkCase(
+            'rate_limit_token_bucket[user]',
+            lambda: limits.check('token_bucket', user_id=uuid.UUID(int=1))
+        ),
+    ]
+
+
+def build_email_template_cases() -> list[BenchmarkCase]:
+    raw_html = pathlib.Path(
+        TemplatesConfig.directory, TemplatesConfig.verification.lstrip('/')
+    ).read_text()
+    params = {'verification_link': generate_random_string(10)}
+
+    async def fetch_body(template_id: str) -> str:
+        return raw_html
+
+    cache = EmailTemplateCache(
+        fetch_body=fetch_body, source=TemplateSource.unisender
+    )
+
+    async def render_cached():
+        (await cache.get('verification')).render(params)
+
+    return [
+        BenchmarkCase('email_render_compile_per_message',
+                      lambda: get_rendered_html(raw_html, params)),
+        BenchmarkCase('email_render_cached_template', render_cached),
+    ]
+
+
+def build_serialization_cases() -> list[BenchmarkCase]:
+    links = [
+        {
+            'id': uuid.uuid4(),
+            'page_title': f'Page {i}',
+            'description': 'Description of the page',
+            'image_url': f'https://example.com/{i}.png',
+            'link_type': LinkType.website
+        } for i in range(SERIALIZED_LIST_SIZE)
+    ]
+    collections = [
+        {
+            'id': uuid.uuid4(),
+            'title': f'Collection {i}',
+            'description': None
+        } for i in range(SERIALIZED_LIST_SIZE)
+    ]
+
+    def serialize_links():
+        LinkListResponseScheme(
+            data=[LinkOutScheme(**link) for link in links]
+        ).model_dump_json()
+
+    def serialize_collections():
+        for collection in collections:
+            CollectionOutScheme(**collection).model_dump_json()
+
+    return [
+        BenchmarkCase(f'serialize_links[{SERIALIZED_LIST_SIZE}]',
+                      serialize_links),
+        BenchmarkCase(f'serialize_collections[{SERIALIZED_LIST_SIZE}]',
+                      serialize_collections),
+    ]
+
+
+async def process_benchmark_hot_paths(
+        iterations: int,
+        warmup: int,
+        fixtures_dir: pathlib.Path,
+        only: str | None
+):
+    with tempfile.TemporaryDirectory() as keys_dir:
+        cases = [
+            *await build_jwt_cases(),
+            *build_signing_cases(pathlib.Path(keys_dir)),
+            *await build_password_cases(),
+            *build_parse_cases(fixtures_dir),
+            *build_helper_cases(),
+            *build_rate_limit_cases(),
+            *build_email_template_cases(),
+            *build_serialization_cases(),
+        ]
+        if only:
+            cases = [case for case in cases if only in case.name]
+
+        results = await run_cases(
+            cases, iterations=iterations, warmup=warmup
+        )
+    click.echo(format_results(results))
+
+
+@click.command('benchmark_hot_paths')
+@click.option('--iterations', default=1000, show_default=True,
+              help='Number of timed calls per case')
+@click.option('--warmup', default=100, show_default=True,
+              help='Number of untimed calls before measuring')
+@click.option('--fixtures-dir', default=DEFAULT_FIXTURES_DIR,
+              show_default=True, type=click.Path(exists=True, file_okay=False),
+              help='Directory with HTML pages for the parse benchmark')
+@click.option('--only', default=None,
+              help='Run only cases whose name contains this substring')
+def benchmark_hot_paths(iterations, warmup, fixtures_dir, only):
+    asyncio.run(process_benchmark_hot_paths(
+        iterations=iterations,
+        warmup=warmup,
+        fixtures_dir=pathlib.Path(fixtures_dir),
+        only=only
+    ))
+    sys.exit()
@@ -0,0 +1,102 @@
+import asyncio
+import sys
+
+import click
+
+from database.engine import PoolingMode, get_engine_options
+from database.warmup import get_auth_queries
+
+from modules.benchmark.helpers import format_load_results, run_load
+
+from settings import Database
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+
+SMALL_POOL_SIZE = 5
+
+
+def get_setups(
+        direct_url: str,
+        pooler_url: str
+) -> list[tuple[str, str, dict]]:
+    """Returns (name, url, engine options) for every compared setup"""
+    direct = get_engine_options(PoolingMode.direct)
+    direct_without_cache = {
+        **direct,
+        'connect_args': {
+            **direct['connect_args'],
+            'statement_cache_size': 0,
+            'prepared_statement_cache_size': 0,
+        }
+    }
+    return [
+        ('direct', direct_url, direct),
+        ('direct-no-statement-cache', direct_url, direct_without_cache),
+        ('pgbouncer-null-pool', pooler_url,
+         get_engine_options(PoolingMode.pgbouncer, external_pool_size=0)),
+        (f'pgbouncer-pool-{SMALL_POOL_SIZE}', pooler_url,
+         get_engine_options(
+             PoolingMode.pgbouncer, external_pool_size=SMALL_POOL_SIZE
+         )),
+    ]
+
+
+async def process_benchmark_pooling(
+        direct_url: str,
+        pooler_url: str,
+        concurrency: int,
+        duration: float,
+        only: str | None
+):
+    results = []
+    for name, url, options in get_setups(direct_url, pooler_url):
+        if only and only not in name:
+            continue
+        engine = create_async_engine(url, **options)
+        session_maker = async_sessionmaker(engine)
+
+        async def request():
+            async with session_maker() as session:
+                for query in get_auth_queries():
+                    await session.execute(query)
+
+        try:
+            results.append(await run_load(
+                name, request, concurrency=concurrency, duration=duration
+            ))
+        finally:
+            await engine.dispose()
+        await asyncio.sleep(1)
+
+    click.echo(format_load_results(results))
+
+
+@click.command('benchmark_pooling')
+@click.option('--direct-url', default=None,
+              help='Database URL of PostgreSQL itself '
+                   '[default: DATABASE_URL]')
+@click.option('--pooler-url', default=None,
+              help='Database URL of PgBouncer in transaction mode '
+                   '[default: same as --direct-url]')
+@click.option('--concurrency', default=50, show_default=True,
+              help='Number of concurrent simulated requests')
+@click.option('--duration', default=10.0, show_default=True,
+              help='Measuring time per setup in seconds')
+@click.option('--only', default=None,
+              help='Run only setups whose name contains this substring')
+def benchmark_pooling(direct_url, pooler_url, concurrency, duration, only):
+    """
+    Compares request throughput of the direct and pgbouncer pooling modes
+    with and without statement caching. Every simulated request opens a
+    session and runs the two authentication queries.
+    """
+    direct_url = direct_url or Database.url
+    asyncio.run(process_benchmark_pooling(
+        direct_url=direct_url,
+        pooler_url=pooler_url or direct_url,
+        concurrency=concurrency,
+        duration=duration,
+        only=only
+    ))
+    sys.exit()
@@ -0,0 +1,204 @@
+import asyncio
+import sys
+import uuid
+
+import click
+
+from database import Session, dispose_engines, init_engines
+from database.models import SessionModel, UserModel
+
+from modules.auth.classes import AuthUser, JWTBearer
+from modules.auth.helpers import get_data_from_token
+from modules.benchmark.helpers import format_load_results, run_load
+from modules.invalidation.bus import invalidation_bus
+
+from services.session import SessionService
+
+from sqlalchemy import delete, func, select
+
+
+BENCHMARK_IP = '127.0.0.1'
+
+
+async def create_sessions(
+        count: int
+) -> tuple[str, list[str], list[str]]:
+    """
+    Creates a temporary user with `count` logged in sessions.
+
+    Returns:
+        the user's identifier, an auth token and a refresh token of every
+        session
+    """
+    async with Session(expire_on_commit=False) as db_session:
+        user = UserModel(
+            email=f'benchmark-{uuid.uuid4().hex[:16]}@example.com',
+            password_hash='-',
+            email_verified=True
+        )
+        db_session.add(user)
+        await db_session.commit()
+        await db_session.refresh(user)
+        user_id = user.id
+        auth_tokens, refresh_tokens = [], []
+        for _ in range(count):
+            tokens = await AuthUser.login_process(
+                user, BENCHMARK_IP, db_session
+            )
+            auth_tokens.append(tokens['auth_token'])
+            refresh_tokens.append(tokens['refresh_token'])
+    return user_id, auth_tokens, refresh_tokens
+
+
+async def delete_user(user_id: str) -> None:
+    async with Session() as db_session:
+        await SessionService.delete(user_id, db_session)
+        await db_session.execute(
+            delete(UserModel).where(UserModel.id == user_id)
+        )
+        await db_session.commit()
+
+
+async def refresh(refresh_token: str) -> str:
+    payload = await get_data_from_token(refresh_token)
+    async with Session() as db_session:
+        _, new_refresh_token = await AuthUser.update_tokens(
+            payload, db_session
+        )
+    return new_refresh_token
+
+
+async def check_single_use(refresh_token: str, attempts: int) -> int:
+    """Refreshes with the same token concurrently, returns the successes"""
+    results = await asyncio.gather(
+        *(refresh(refresh_token) for _ in range(attempts)),
+        return_exceptions=True
+    )
+    return sum(not isinstance(result, Exception) for result in results)
+
+
+async def process_benchmark_refresh(
+        concurrency: int,
+        duration: float,
+        attempts: int
+):
+    init_engines()
+    invalidation_bus.start_publishing()
+    user_id, _, refresh_tokens = await create_sessions(concurrency)
+    try:
+        # Every caller rotates the tokens of its own session, as a refresh
+        # token cannot be used twice
+        tokens = asyncio.Queue()
+        for refresh_token in refresh_tokens:
+            tokens.put_nowait(refresh_token)
+
+        async def request():
+            refresh_token = await tokens.get()
+            try:
+                refresh_token = await refresh(refresh_token)
+            finally:
+                tokens.put_nowait(refresh_token)
+
+        result = await run_load(
+            'refresh', request, concurrency=concurrency, duration=duration
+        )
+        click.echo(format_load_results([result]))
+
+        successes = await check_single_use(await tokens.get(), attempts)
+        click.echo(
+            f'{successes} of {attempts} concurrent refreshes with the same '
+            f'token succeeded'
+        )
+    finally:
+        await delete_user(user_id)
+        await invalidation_bus.flush()
+        await dispose_engines()
+
+
+@click.command('benchmark_refresh')
+@click.option('--concurrency', default=50, show_default=True,
+              help='Number of concurrent refreshing clients')
+@click.option('--duration', default=10.0, show_default=True,
+              help='Measuring time in seconds')
+@click.option('--attempts', default=20, show_default=True,
+              help='Number of concurrent refreshes with the same token '
+                   'made to check that it is used once')
+def benchmark_refresh(concurrency, duration, attempts):
+    """
+    Measures refreshes per second of POST /auth/refresh/ against the
+    database in DATABASE_URL and checks that a refresh token cannot be used
+    by concurrent requests twice. Creates a temporary user and deletes it
+    afterwards.
+    """
+    asyncio.run(process_benchmark_refresh(
+        concurrency=concurrency,
+        duration=duration,
+        attempts=attempts
+    ))
+    sys.exit()
+
+
+async def get_session_row_size(user_id: str) -> float:
+    """Returns the average size in bytes of the user's session rows"""
+    async with Session() as db_session:
+        query = (
+            select(func.avg(func.pg_column_size(
+                SessionModel.__table__.table_valued()
+            )))
+            .where(SessionModel.user_id == user_id)
+        )
+        return float(await db_session.scalar(query))
+
+
+async def process_benchmark_session_check(
+        sessions: int,
+        concurrency: int,
+        duration: float
+):
+    init_engines()
+    invalidation_bus.start_publishing()
+    user_id, auth_tokens, _ = await create_sessions(sessions)
+    try:
+        bearer = JWTBearer()
+        payloads = [bearer.get_payload(token) for token in auth_tokens]
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            payload = payloads[calls % len(payloads)]
+            calls += 1
+            async with Session() as db_session:
+                await bearer.verify_user_session(payload, db_session)
+
+        result = await run_load(
+            'session_check', request,
+            concurrency=concurrency, duration=duration
+        )
+        click.echo(format_load_results([result]))
+        row_size = await get_session_row_size(user_id)
+        click.echo(f'Average session row size: {row_size:.0f} bytes')
+    finally:
+        await delete_user(user_id)
+        await invalidation_bus.flush()
+        await dispose_engines()
+
+
+@click.command('benchmark_session_check')
+@click.option('--sessions', default=100, show_default=True,
+              help='Number of sessions checked in turn')
+@click.option('--concurrency', default=10, show_default=True,
+              help='Number of concurrent checking clients')
+@click.option('--duration', default=10.0, show_default=True,
+              help='Measuring time in seconds')
+def benchmark_session_check(sessions, concurrency, duration):
+    """
+    Measures the latency of the session check done by JWTBearer on every
+    authenticated request and reports the average size of a session row.
+    Creates a temporary user and deletes it afterwards.
+    """
+    asyncio.run(process_benchmark_session_check(
+        sessions=sessions,
+        concurrency=concurrency,
+        duration=duration
+    ))
+    sys.exit()
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import aiosmtplib
+
+import click
+
+from modules.benchmark.helpers import format_load_results, run_load
+from modules.email.smtp import SMTPConnectionPool, SMTPTransport
+from modules.email.transport import OutgoingEmail
+
+from settings import TemplatesConfig
+
+
+STARTUP_TIMEOUT_SECONDS = 30
+HOST = '127.0.0.1'
+RECEIVER_EMAIL = 'user@auth0.com'
+SENDER_EMAIL = 'benchmark@auth0.com'
+BODY = '<p>Your verification link: https://auth0.com/verify/ABCDEFGHIJ</p>'
+
+
+def start_sink(port: int, latency_ms: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'aiosmtpd',
+            '--nosetuid',
+            '--listen', f'{HOST}:{port}',
+            '--class', 'modules.benchmark.smtp_sink.SinkHandler',
+        ],
+        env={**os.environ, 'SMTP_SINK_LATENCY_MS': str(latency_ms)}
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise click.ClickException('SMTP sink did not start in time')
+
+
+def get_email() -> OutgoingEmail:
+    return OutgoingEmail(
+        receiver_email=RECEIVER_EMAIL,
+        subject=TemplatesConfig.subject_verification,
+        body=BODY
+    )
+
+
+def build_connection_per_email_send(port: int, transport: SMTPTransport):
+    """Connects, sends one message and quits for every email"""
+
+    async def send():
+        await aiosmtplib.send(
+            transport.build_message(get_email()), hostname=HOST, port=port
+        )
+
+    return send
+
+
+def build_pooled_send(transport: SMTPTransport):
+    async def send():
+        await transport.send(get_email())
+
+    return send
+
+
+def build_pooled_batch_send(transport: SMTPTransport, batch_size: int):
+    emails = [get_email() for _ in range(batch_size)]
+
+    async def send():
+        errors = await transport.send_many(emails)
+        if any(errors):
+            raise next(error for error in errors if error)
+
+    return send
+
+
+async def process_benchmark_smtp(
+        port: int,
+        concurrency: int,
+        duration: float
+):
+    transport = SMTPTransport(
+        pool=SMTPConnectionPool(size=concurrency, hostname=HOST, port=port),
+        sender_name='Benchmark',
+        sender_email=SENDER_EMAIL
+    )
+    results = []
+    try:
+        for name, send in [
+            ('connection-per-email',
+             build_connection_per_email_send(port, transport)),
+            ('pooled', build_pooled_send(transport)),
+        ]:
+            results.append(await run_load(
+                name, send, concurrency=concurrency, duration=duration
+            ))
+        # One caller sends batches spread over `concurrency` connections,
+        # throughput is reported in emails
+        batch_size = concurrency * 10
+        result = await run_load(
+            f'pooled-send-many (batch of {batch_size})',
+            build_pooled_batch_send(transport, batch_size),
+            concurrency=1,
+            duration=duration
+        )
+        result.concurrency = concurrency
+        result.requests *= batch_size
+        result.ops_per_sec *= batch_size
+        results.append(result)
+    finally:
+        await transport.close()
+    click.echo(format_load_results(results))
+
+
+@click.command('benchmark_smtp')
+@click.option('--port', default=8025, show_default=True,
+              help='Port of the local SMTP sink')
+@click.option('--latency-ms', default=5, show_default=True,
+              help='Latency added by the sink to every SMTP reply')
+@click.option('--concurrency', default=10, show_default=True,
+              help='Number of emails (and pooled connections) in flight')
+@click.option('--duration', default=10.0, show_default=True,
+              help='Measuring time per setup in seconds')
+def benchmark_smtp(port, latency_ms, concurrency, duration):
+    """
+    Measures email throughput of the SMTP transport against a local sink
+    server (modules/benchmark/smtp_sink.py), comparing a new connection per
+    email with pooled connections and batches sent with send_many.
+    """
+    process = start_sink(port, latency_ms)
+    try:
+        asyncio.run(process_benchmark_smtp(
+            port=port, concurrency=concurrency, duration=duration
+        ))
+    finally:
+        process.terminate()
+        process.wait()
+    sys.exit()
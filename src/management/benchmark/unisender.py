@@ -0,0 +1,159 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import click
+
+import httpx
+
+from jinja2 import Template
+
+from modules.benchmark.helpers import format_load_results, run_load
+from modules.common.templates import EmailTemplateCache, TemplateSource
+from modules.common.unisender import UnisenderClient
+
+from settings import TemplatesConfig
+
+
+STARTUP_TIMEOUT_SECONDS = 30
+TEMPLATE_ID = 'verification'
+RECEIVER_EMAIL = 'user@auth0.com'
+
+
+def start_stand_in(port: int, latency_ms: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'uvicorn',
+            'modules.benchmark.unisender_stub:app',
+            '--port', str(port),
+            '--loop', 'uvloop',
+            '--http', 'httptools',
+            '--log-level', 'warning',
+        ],
+        env={**os.environ, 'UNISENDER_STUB_LATENCY_MS': str(latency_ms)}
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            httpx.post(f'http://127.0.0.1:{port}/getTemplate')
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise click.ClickException('Unisender stand-in did not start in time')
+
+
+def get_send_data(body: str) -> dict:
+    return {
+        'api_key': 'benchmark',
+        'format': 'json',
+        'email': RECEIVER_EMAIL,
+        'sender_name': 'Benchmark',
+        'sender_email': 'benchmark@auth0.com',
+        'subject': TemplatesConfig.subject_verification,
+        'body': body,
+        'list_id': '1',
+    }
+
+
+def build_per_call_client_send(base_url: str):
+    """Previous implementation: new client per call, no template cache"""
+
+    async def post(method_name: str, data: dict) -> dict:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                url=f'{base_url}/{method_name}', data=data
+            )
+            # The response was parsed up to three times
+            if 'error' in response.json():
+                response.json().get('error')
+            return response.json().get('result')
+
+    async def send():
+        body = (await post('getTemplate', {
+            'api_key': 'benchmark', 'format': 'json',
+            'template_id': TEMPLATE_ID
+        })).get('body')
+        html = Template(body).render(verification_link='ABCDEFGHIJ')
+        await post('sendEmail', get_send_data(html))
+
+    return send
+
+
+def build_shared_client_send(client: UnisenderClient, cache_templates: bool):
+    async def fetch_body(template_id: str) -> str:
+        return (await client.call(
+            'getTemplate',
+            data={
+                'api_key': 'benchmark', 'format': 'json',
+                'template_id': template_id
+            },
+            idempotent=True
+        )).get('body')
+
+    cache = EmailTemplateCache(
+        fetch_body=fetch_body, source=TemplateSource.unisender
+    )
+
+    async def send():
+        if cache_templates:
+            template = await cache.get(TEMPLATE_ID)
+        else:
+            template = Template(await fetch_body(TEMPLATE_ID))
+        html = template.render(verification_link='ABCDEFGHIJ')
+        await client.call('sendEmail', data=get_send_data(html))
+
+    return send
+
+
+async def process_benchmark_unisender(
+        port: int,
+        concurrency: int,
+        duration: float
+):
+    base_url = f'http://127.0.0.1:{port}'
+    client = UnisenderClient(base_url=base_url, retries=0)
+    setups = [
+        ('per-call-client', build_per_call_client_send(base_url)),
+        ('shared-client', build_shared_client_send(client, False)),
+        ('shared-client+template-cache',
+         build_shared_client_send(client, True)),
+    ]
+    results = []
+    try:
+        for name, send in setups:
+            results.append(await run_load(
+                name, send, concurrency=concurrency, duration=duration
+            ))
+    finally:
+        await client.close()
+    click.echo(format_load_results(results))
+
+
+@click.command('benchmark_unisender')
+@click.option('--port', default=8097, show_default=True,
+              help='Port of the local Unisender stand-in')
+@click.option('--latency-ms', default=20, show_default=True,
+              help='Latency added by the stand-in to every API call')
+@click.option('--concurrency', default=20, show_default=True,
+              help='Number of emails sent at the same time')
+@click.option('--duration', default=10.0, show_default=True,
+              help='Measuring time per setup in seconds')
+def benchmark_unisender(port, latency_ms, concurrency, duration):
+    """
+    Measures email sending throughput against a local stand-in for the
+    Unisender API (modules/benchmark/unisender_stub.py), comparing a new
+    HTTP client per call with the shared client with and without the
+    template cache.
+    """
+    process = start_stand_in(port, latency_ms)
+    try:
+        asyncio.run(process_benchmark_unisender(
+            port=port, concurrency=concurrency, duration=duration
+        ))
+    finally:
+        process.terminate()
+        process.wait()
+    sys.exit()
@@ -0,0 +1,73 @@
+import subprocess
+import sys
+import time
+
+import click
+
+import httpx
+
+from modules.benchmark.helpers import (
+    format_memory_results, measure_workers_memory
+)
+
+
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def wait_for_workers(url: str, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise click.ClickException('Server exited during startup')
+        try:
+            if httpx.get(url).is_success:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise click.ClickException('Server did not start in time')
+
+
+@click.command('benchmark_workers_memory')
+@click.option('--workers', default=4, show_default=True,
+              help='Number of workers to start')
+@click.option('--port', default=8099, show_default=True,
+              help='Port of the measured server')
+@click.option('--requests', 'requests_count', default=200,
+              show_default=True,
+              help='Requests sent before measuring, so workers touch '
+                   'their memory as under load')
+@click.option('--settle', default=3.0, show_default=True,
+              help='Seconds to wait after the requests before measuring')
+def benchmark_workers_memory(workers, port, requests_count, settle):
+    """
+    Starts `manage.py serve` with and without --preload and reports RSS,
+    USS and PSS of the workers. DATABASE_URL must point to a reachable
+    database, since workers connect on startup.
+    """
+    results = []
+    url = f'http://127.0.0.1:{port}/health/live'
+    for preload in (False, True):
+        name = 'preload+gc.freeze' if preload else 'no-preload'
+        process = subprocess.Popen([
+            sys.executable, 'manage.py', 'serve',
+            '--host', '127.0.0.1',
+            '--port', str(port),
+            '--workers', str(workers),
+            '--max-requests', '0',
+            '--preload' if preload else '--no-preload',
+        ])
+        try:
+            wait_for_workers(url, process)
+            # A new connection per request, so requests are spread over
+            # the workers
+            for _ in range(requests_count):
+                httpx.get(url)
+            time.sleep(settle)
+            results.append(measure_workers_memory(name, process.pid))
+        finally:
+            process.terminate()
+            process.wait()
+
+    click.echo(format_memory_results(results))
+    sys.exit()
@@ -1,34 +1,24 @@
 import asyncio
-import datetime
 import sys
 
 import click
 
-from database import Session
-from database.models import ConfirmationCodeModel
+from settings import MaintenanceConfig
 
-from logger import logger
-
-from sqlalchemy import delete
-
-
-async def process_delete_conf_codes():
-    logger.info('Start deleting')
-    delete_datetime = datetime.datetime.utcnow()
-    async with Session() as session:
-        query = delete(
-            ConfirmationCodeModel
-        ).where(
-            ConfirmationCodeModel.expired_at < delete_datetime
-        )
-        await session.execute(query)
-        await session.commit()
-    logger.info('Finish deleting')
+from src.management.maintenance.cleanup import process_cleanup
+from src.management.maintenance.jobs import expired_codes
 
 
 @click.command('delete_conf_codes')
 def delete_conf_codes():
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(process_delete_conf_codes())
-    loop.close()
+    """
+    Deletes expired confirmation codes in batches. Kept for existing
+    schedules, same as cleanup --job expired_codes.
+    """
+    asyncio.run(process_cleanup(
+        job_names=[expired_codes.name],
+        batch_size=MaintenanceConfig.batch_size,
+        sleep=MaintenanceConfig.batch_sleep,
+        dry_run=False
+    ))
     sys.exit()
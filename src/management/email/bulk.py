@@ -0,0 +1,83 @@
+import asyncio
+import sys
+
+import click
+
+from database import dispose_engines, init_engines
+
+from logger import logger
+
+from modules.common.helpers import email_templates
+from modules.common.templates import UnknownEmailTemplate
+from modules.common.unisender import unisender_client
+from modules.email.bulk import (
+    BulkEmailProvider, TransportBulkProvider, UnisenderBulkProvider
+)
+from modules.email.helpers import email_transport
+from modules.email.transport import EmailTransportName
+
+from services.bulk_email import COHORTS, send_bulk_email as send_campaign
+
+from settings import BulkEmailConfig, EmailConfig
+
+
+def get_provider() -> BulkEmailProvider:
+    if EmailConfig.transport == EmailTransportName.unisender:
+        return UnisenderBulkProvider()
+    return TransportBulkProvider(email_transport)
+
+
+async def process_send_bulk_email(
+        name: str,
+        cohort: str,
+        subject: str,
+        template_id: str,
+        batch_size: int
+):
+    init_engines()
+    try:
+        processed = await send_campaign(
+            name=name,
+            cohort=cohort,
+            subject=subject,
+            template_id=template_id,
+            provider=get_provider(),
+            batch_size=batch_size
+        )
+        logger.info(f'Campaign {name} completed, {processed} recipients '
+                    f'processed by this run')
+    finally:
+        await unisender_client.close()
+        await email_transport.close()
+        await dispose_engines()
+
+
+@click.command('send_bulk_email')
+@click.option('--name', required=True,
+              help='Unique name of the campaign, used to resume it')
+@click.option('--cohort', type=click.Choice(list(COHORTS)), default='all',
+              show_default=True, help='Group of users receiving the email')
+@click.option('--subject', required=True, help='Subject of the email')
+@click.option('--template-id', required=True,
+              help='Identifier of the email template')
+@click.option('--batch-size', default=BulkEmailConfig.batch_size,
+              show_default=True,
+              help='Number of recipients sent to the provider at once')
+def send_bulk_email(name, cohort, subject, template_id, batch_size):
+    """
+    Sends an email to every user of the cohort. Progress is saved after
+    every batch, so an interrupted campaign is resumed by running the
+    command again with the same name.
+    """
+    try:
+        email_templates.check(template_id)
+    except UnknownEmailTemplate as e:
+        raise click.BadParameter(str(e), param_hint='--template-id')
+    asyncio.run(process_send_bulk_email(
+        name=name,
+        cohort=cohort,
+        subject=subject,
+        template_id=template_id,
+        batch_size=batch_size
+    ))
+    sys.exit()
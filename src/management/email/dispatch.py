@@ -0,0 +1,40 @@
+import asyncio
+import sys
+
+import click
+
+from database import dispose_engines, init_engines
+
+from logger import logger
+
+from modules.common.unisender import unisender_client
+from modules.email.helpers import email_transport
+
+from services.email_outbox import EmailOutboxDispatcher
+
+
+async def process_dispatch_emails(once: bool):
+    init_engines()
+    dispatcher = EmailOutboxDispatcher()
+    try:
+        if once:
+            sent = await dispatcher.dispatch_pending()
+            logger.info(f'Processed {sent} emails from the outbox')
+        else:
+            await dispatcher.run()
+    finally:
+        await unisender_client.close()
+        await email_transport.close()
+        await dispose_engines()
+
+
+@click.command('dispatch_emails')
+@click.option('--once', is_flag=True, default=False,
+              help='Send due emails and exit instead of polling forever')
+def dispatch_emails(once):
+    """
+    Sends emails from the outbox. Use it when EMAIL_OUTBOX_DISPATCH_IN_APP
+    is disabled and emails are sent by a separate process.
+    """
+    asyncio.run(process_dispatch_emails(once))
+    sys.exit()
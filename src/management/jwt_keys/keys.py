@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+
+import click
+
+from logger import logger
+
+from modules.auth.jwt import jws
+
+from settings import JWTConfig
+
+
+def read_jwks(keys_file: str) -> dict:
+    if not os.path.exists(keys_file):
+        return {'keys': []}
+    with open(keys_file) as file:
+        return json.load(file)
+
+
+def write_jwks(keys_file: str, jwks: dict) -> None:
+    """Replaces the file at once, readable by its owner only"""
+    temp_file = f'{keys_file}.tmp'
+    descriptor = os.open(
+        temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+    )
+    with os.fdopen(descriptor, 'w') as file:
+        json.dump(jwks, file, indent=2)
+    os.replace(temp_file, keys_file)
+
+
+@click.command('generate_jwt_key')
+@click.option('--algorithm', type=click.Choice(jws.ALGORITHMS),
+              default='EdDSA', show_default=True,
+              help='Signing algorithm of the key')
+@click.option('--keys-file', default=JWTConfig.keys_file, required=True,
+              help='JWKS file with private keys, JWT_KEYS_FILE by default')
+def generate_jwt_key(algorithm, keys_file):
+    """
+    Adds a new signing key to the keys file and prints its kid. Restarted
+    workers publish it in the JWKS right away, and sign with it once
+    JWT_SIGNING_KID is set to the kid (or unset, for the last key).
+    """
+    jwks = read_jwks(keys_file)
+    jwk = jws.generate_jwk(algorithm)
+    jwks['keys'].append(jwk)
+    write_jwks(keys_file, jwks)
+    logger.info(f'Added {algorithm} key {jwk["kid"]} to {keys_file}')
+    click.echo(jwk['kid'])
+    sys.exit()
+
+
+@click.command('remove_jwt_key')
+@click.argument('kid')
+@click.option('--keys-file', default=JWTConfig.keys_file, required=True,
+              help='JWKS file with private keys, JWT_KEYS_FILE by default')
+def remove_jwt_key(kid, keys_file):
+    """
+    Removes a retired key from the keys file. Tokens signed by it stop
+    being accepted, so it should be removed once refresh tokens issued
+    before the rotation have expired.
+    """
+    if kid == JWTConfig.signing_kid:
+        raise click.ClickException(f'Key {kid} is JWT_SIGNING_KID')
+    jwks = read_jwks(keys_file)
+    keys = [jwk for jwk in jwks['keys'] if jwk['kid'] != kid]
+    if len(keys) == len(jwks['keys']):
+        raise click.ClickException(f'Key {kid} is not in {keys_file}')
+    write_jwks(keys_file, {**jwks, 'keys': keys})
+    logger.info(f'Removed key {kid} from {keys_file}')
+    sys.exit()
@@ -0,0 +1,134 @@
+import asyncio
+import dataclasses
+import datetime
+import time
+from typing import Callable
+
+from database import Session
+
+from logger import logger
+
+from modules.time.helpers import get_utc_now
+
+from sqlalchemy import Select, delete, select, text, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+@dataclasses.dataclass
+class BatchDeleteJob:
+    """
+    Rows deleted by a maintenance job.
+
+    Attributes:
+        name (str): name of the job used in the command line and logs
+        model: database model of the deleted rows
+        key (InstrumentedAttribute): indexed column the rows are walked by,
+            together with the primary key
+        get_criteria (Callable): returns the WHERE criteria of deleted rows
+            for the time the run has started at
+    """
+    name: str
+    model: type
+    key: InstrumentedAttribute
+    get_criteria: Callable[[datetime.datetime], tuple]
+
+
+@dataclasses.dataclass
+class BatchDeleteResult:
+    name: str
+    deleted: int
+    batches: int
+    seconds: float
+
+
+class BatchDeleter:
+    """
+    Deletes rows of a job in small batches, each in its own transaction.
+
+    Every batch selects up to `batch_size` rows in (key, id) order after the
+    last deleted one and deletes them, so no statement holds locks or
+    produces WAL for long, and index scans never revisit dead tuples left
+    by previous batches. Rows locked by the application are skipped until
+    the next run. The criteria are evaluated for the time the run started,
+    so rows becoming stale during the run are left for the next one.
+
+    Attributes:
+        batch_size (int): maximum number of rows deleted by one statement
+        sleep (float): seconds to wait between batches, giving replicas and
+            autovacuum time to catch up
+    """
+
+    def __init__(self, batch_size: int, sleep: float):
+        self.batch_size = batch_size
+        self.sleep = sleep
+
+    @staticmethod
+    def get_query(job: BatchDeleteJob, now: datetime.datetime) -> Select:
+        return select(job.model.id).where(*job.get_criteria(now))
+
+    async def estimate(self, job: BatchDeleteJob) -> int:
+        """
+        Returns the planner's estimate of rows to be deleted. It is read
+        from EXPLAIN, so it costs no scan of the table.
+        """
+        query = self.get_query(job, get_utc_now())
+        async with Session() as session:
+            compiled = query.compile(
+                session.get_bind(), compile_kwargs={'literal_binds': True}
+            )
+            plan = await session.scalar(
+                text(f'EXPLAIN (FORMAT JSON) {compiled}')
+            )
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    async def delete_batch(
+            self,
+            job: BatchDeleteJob,
+            now: datetime.datetime,
+            last: tuple | None
+    ) -> list[tuple]:
+        batch = self.get_query(job, now).order_by(
+            job.key, job.model.id
+        ).limit(self.batch_size).with_for_update(skip_locked=True)
+        if last is not None:
+            batch = batch.where(tuple_(job.key, job.model.id) > last)
+        query = delete(job.model).where(
+            job.model.id.in_(batch.scalar_subquery())
+        ).returning(job.key, job.model.id)
+        async with Session() as session:
+            result = await session.execute(query)
+            rows = [tuple(row) for row in result.all()]
+            await session.commit()
+        return rows
+
+    async def run(
+            self,
+            job: BatchDeleteJob,
+            estimate: int | None = None
+    ) -> BatchDeleteResult:
+        now = get_utc_now()
+        started = time.monotonic()
+        deleted = batches = 0
+        last = None
+        while True:
+            rows = await self.delete_batch(job, now, last)
+            if not rows:
+                break
+            deleted += len(rows)
+            batches += 1
+            last = max(rows)
+            elapsed = time.monotonic() - started
+            progress = f' of about {estimate}' if estimate else ''
+            logger.info(
+                f'{job.name}: deleted {deleted}{progress} rows in {batches} '
+                f'batches, {deleted / elapsed:.0f} rows/s'
+            )
+            if len(rows) < self.batch_size:
+                break
+            await asyncio.sleep(self.sleep)
+        return BatchDeleteResult(
+            name=job.name,
+            deleted=deleted,
+            batches=batches,
+            seconds=time.monotonic() - started
+        )
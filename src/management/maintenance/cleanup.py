@@ -0,0 +1,62 @@
+import asyncio
+import sys
+
+import click
+
+from database import dispose_engines, init_engines
+
+from logger import logger
+
+from settings import MaintenanceConfig
+
+from src.management.maintenance.batch import BatchDeleter
+from src.management.maintenance.jobs import JOBS
+
+
+async def process_cleanup(
+        job_names: list[str],
+        batch_size: int,
+        sleep: float,
+        dry_run: bool
+):
+    init_engines()
+    deleter = BatchDeleter(batch_size=batch_size, sleep=sleep)
+    try:
+        for name in job_names:
+            job = JOBS[name]
+            estimate = await deleter.estimate(job)
+            if dry_run:
+                logger.info(f'{name}: about {estimate} rows to delete')
+                continue
+            result = await deleter.run(job, estimate=estimate)
+            logger.info(
+                f'{name}: finished, deleted {result.deleted} rows in '
+                f'{result.batches} batches, {result.seconds:.1f}s'
+            )
+    finally:
+        await dispose_engines()
+
+
+@click.command('cleanup')
+@click.option('--job', 'job_names', multiple=True,
+              type=click.Choice(list(JOBS)),
+              help='Job to run, may be repeated. All jobs by default')
+@click.option('--batch-size', default=MaintenanceConfig.batch_size,
+              show_default=True,
+              help='Maximum number of rows deleted by one statement')
+@click.option('--sleep', default=MaintenanceConfig.batch_sleep,
+              show_default=True, help='Seconds to wait between batches')
+@click.option('--dry-run', is_flag=True, default=False,
+              help='Only report the estimated number of rows to delete')
+def cleanup(job_names, batch_size, sleep, dry_run):
+    """
+    Deletes expired and used confirmation codes and closed sessions in
+    small batches.
+    """
+    asyncio.run(process_cleanup(
+        job_names=list(job_names or JOBS),
+        batch_size=batch_size,
+        sleep=sleep,
+        dry_run=dry_run
+    ))
+    sys.exit()
@@ -0,0 +1,38 @@
+import asyncio
+import datetime
+
+from database import Session
+
+from logger import logger
+
+from modules.time.helpers import get_utc_now
+
+from services.session import SessionService
+
+from settings import MaintenanceConfig
+
+
+async def close_idle_sessions(batch_size: int, sleep: float) -> int:
+    """
+    Closes sessions not used for MAINTENANCE_SESSIONS_IDLE_DAYS in batches,
+    each in its own transaction. Closed sessions are deleted later by the
+    stale_sessions job.
+
+    Returns:
+        number of closed sessions
+    """
+    idle_since = get_utc_now() - datetime.timedelta(
+        days=MaintenanceConfig.sessions_idle_days
+    )
+    closed = 0
+    while True:
+        async with Session() as db_session:
+            session_ids = await SessionService.close_idle_sessions(
+                db_session, idle_since=idle_since, limit=batch_size
+            )
+        closed += len(session_ids)
+        if len(session_ids) < batch_size:
+            break
+        await asyncio.sleep(sleep)
+    logger.info(f'idle_sessions: closed {closed} sessions')
+    return closed
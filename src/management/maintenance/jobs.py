@@ -0,0 +1,86 @@
+import datetime
+
+from database.models import (
+    ConfirmationCodeModel, IdempotencyKeyModel, RevocationModel, SessionModel
+)
+
+from settings import JWTConfig, MaintenanceConfig
+
+from sqlalchemy import or_
+
+from src.management.maintenance.batch import BatchDeleteJob
+
+
+expired_codes = BatchDeleteJob(
+    name='expired_codes',
+    model=ConfirmationCodeModel,
+    key=ConfirmationCodeModel.expired_at,
+    get_criteria=lambda now: (ConfirmationCodeModel.expired_at < now,)
+)
+
+used_codes = BatchDeleteJob(
+    name='used_codes',
+    model=ConfirmationCodeModel,
+    key=ConfirmationCodeModel.created_at,
+    get_criteria=lambda now: (
+        ConfirmationCodeModel.used,
+        ConfirmationCodeModel.created_at < now - datetime.timedelta(
+            hours=MaintenanceConfig.used_codes_retention_hours
+        )
+    )
+)
+
+# Matches the predicate of ix_sessions_finished_created_at
+stale_sessions = BatchDeleteJob(
+    name='stale_sessions',
+    model=SessionModel,
+    key=SessionModel.created_at,
+    get_criteria=lambda now: (
+        or_(SessionModel.is_closed, ~SessionModel.is_active),
+        SessionModel.created_at < now - datetime.timedelta(
+            days=MaintenanceConfig.sessions_retention_days
+        )
+    )
+)
+
+# Sessions still open but expired, as their refresh token could be used
+# last at last_seen_at, which every refresh sets. Matches the predicate of
+# ix_sessions_active_last_seen_at
+expired_sessions = BatchDeleteJob(
+    name='expired_sessions',
+    model=SessionModel,
+    key=SessionModel.last_seen_at,
+    get_criteria=lambda now: (
+        SessionModel.is_active,
+        ~SessionModel.is_closed,
+        SessionModel.last_seen_at < now - datetime.timedelta(
+            minutes=JWTConfig.refresh_token_time_expiration_minutes,
+            days=MaintenanceConfig.sessions_retention_days
+        )
+    )
+)
+
+expired_revocations = BatchDeleteJob(
+    name='expired_revocations',
+    model=RevocationModel,
+    key=RevocationModel.expires_at,
+    get_criteria=lambda now: (RevocationModel.expires_at < now,)
+)
+
+expired_idempotency_keys = BatchDeleteJob(
+    name='expired_idempotency_keys',
+    model=IdempotencyKeyModel,
+    key=IdempotencyKeyModel.expires_at,
+    get_criteria=lambda now: (IdempotencyKeyModel.expires_at < now,)
+)
+
+JOBS = {
+    job.name: job for job in (
+        expired_codes,
+        used_codes,
+        stale_sessions,
+        expired_sessions,
+        expired_revocations,
+        expired_idempotency_keys
+    )
+}
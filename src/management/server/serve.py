@@ -0,0 +1,61 @@
+import sys
+
+import click
+
+from settings import ServerConfig
+
+from src.api.server import APP_PATH, Server
+
+
+@click.command('serve')
+@click.option('--host', default=ServerConfig.host, show_default=True)
+@click.option('--port', default=ServerConfig.port, show_default=True)
+@click.option('--workers', default=ServerConfig.workers, show_default=True,
+              help='Number of worker processes')
+@click.option('--backlog', default=ServerConfig.backlog, show_default=True,
+              help='Maximum number of pending connections')
+@click.option('--keepalive', default=ServerConfig.keepalive,
+              show_default=True,
+              help='Seconds to wait for requests on a keep-alive connection')
+@click.option('--max-requests', default=ServerConfig.max_requests,
+              show_default=True,
+              help='Requests after which a worker is restarted, 0 disables '
+                   'recycling')
+@click.option('--max-requests-jitter',
+              default=ServerConfig.max_requests_jitter, show_default=True,
+              help='Random addition to --max-requests, so workers do not '
+                   'restart at the same time')
+@click.option('--graceful-timeout', default=ServerConfig.graceful_timeout,
+              show_default=True,
+              help='Seconds given to in-flight requests on shutdown')
+@click.option('--preload/--no-preload', default=ServerConfig.preload,
+              show_default=True,
+              help='Import the application before forking workers')
+def serve(
+        host,
+        port,
+        workers,
+        backlog,
+        keepalive,
+        max_requests,
+        max_requests_jitter,
+        graceful_timeout,
+        preload
+):
+    """
+    Runs the API in several uvicorn workers managed by gunicorn. With
+    --preload the application is imported once in the master and gc.freeze()
+    is called before fork, so workers share its memory pages. Workers are
+    recycled after --max-requests and drain in-flight requests on SIGTERM.
+    """
+    Server({
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'backlog': backlog,
+        'keepalive': keepalive,
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests_jitter,
+        'graceful_timeout': graceful_timeout,
+        'preload_app': preload,
+    }, app_path=APP_PATH).run()
+    sys.exit()
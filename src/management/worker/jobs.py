@@ -0,0 +1,92 @@
+from database import Session
+
+from modules.scheduler.cron import CronSchedule
+from modules.scheduler.scheduler import ScheduledJob
+
+from services.rate_limit import RateLimitService
+
+from settings import MaintenanceConfig, SchedulerConfig
+
+from src.management.maintenance.batch import BatchDeleteJob, BatchDeleter
+from src.management.maintenance.idle import close_idle_sessions
+from src.management.maintenance.jobs import (
+    expired_codes,
+    expired_idempotency_keys,
+    expired_revocations,
+    expired_sessions,
+    stale_sessions,
+    used_codes
+)
+
+
+def get_cleanup_job(job: BatchDeleteJob, schedule: str) -> ScheduledJob:
+    async def run():
+        deleter = BatchDeleter(
+            batch_size=MaintenanceConfig.batch_size,
+            sleep=MaintenanceConfig.batch_sleep
+        )
+        await deleter.run(job)
+
+    return ScheduledJob(
+        name=job.name,
+        schedule=CronSchedule(schedule),
+        func=run,
+        jitter=SchedulerConfig.jitter
+    )
+
+
+def get_idle_sessions_job(schedule: str) -> ScheduledJob:
+    async def run():
+        await close_idle_sessions(
+            batch_size=MaintenanceConfig.batch_size,
+            sleep=MaintenanceConfig.batch_sleep
+        )
+
+    return ScheduledJob(
+        name='idle_sessions',
+        schedule=CronSchedule(schedule),
+        func=run,
+        jitter=SchedulerConfig.jitter
+    )
+
+
+def get_expired_rate_limits_job(schedule: str) -> ScheduledJob:
+    async def run():
+        # The table is UNLOGGED and its rows are tiny, so one statement
+        # deletes them without a burst of WAL
+        async with Session() as db_session:
+            await RateLimitService.delete_expired(db_session)
+
+    return ScheduledJob(
+        name='expired_rate_limits',
+        schedule=CronSchedule(schedule),
+        func=run,
+        jitter=SchedulerConfig.jitter
+    )
+
+
+def get_scheduled_jobs() -> list[ScheduledJob]:
+    return [
+        get_cleanup_job(
+            expired_codes, SchedulerConfig.expired_codes_schedule
+        ),
+        get_cleanup_job(used_codes, SchedulerConfig.used_codes_schedule),
+        get_cleanup_job(
+            stale_sessions, SchedulerConfig.stale_sessions_schedule
+        ),
+        get_cleanup_job(
+            expired_sessions, SchedulerConfig.stale_sessions_schedule
+        ),
+        get_cleanup_job(
+            expired_revocations,
+            SchedulerConfig.expired_revocations_schedule
+        ),
+        get_idle_sessions_job(SchedulerConfig.idle_sessions_schedule),
+        get_expired_rate_limits_job(
+            SchedulerConfig.expired_rate_limits_schedule
+        ),
+        get_cleanup_job(
+            expired_idempotency_keys,
+            SchedulerConfig.expired_idempotency_keys_schedule
+        ),
+    ]
@@ -0,0 +1,57 @@
+import asyncio
+import signal
+import sys
+
+import click
+
+from database import dispose_engines, init_engines
+
+from logger import logger
+
+from modules.common.metrics import metrics
+from modules.invalidation.bus import invalidation_bus
+from modules.scheduler.scheduler import Scheduler
+
+from settings import SchedulerConfig
+
+from src.management.worker.jobs import get_scheduled_jobs
+
+
+async def process_worker(job_names: list[str]):
+    init_engines()
+    invalidation_bus.start_publishing()
+    jobs = [
+        job for job in get_scheduled_jobs()
+        if not job_names or job.name in job_names
+    ]
+    scheduler = Scheduler(jobs)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+    scheduler.start()
+    try:
+        await stopped.wait()
+        logger.info('Stopping the worker')
+        await scheduler.stop(SchedulerConfig.stop_timeout)
+    finally:
+        await invalidation_bus.flush()
+        await dispose_engines()
+    timings = {
+        name: timing
+        for name, timing in metrics.snapshot()['timings'].items()
+        if name.startswith('scheduler.')
+    }
+    logger.info(f'Scheduled job timings: {timings}')
+
+
+@click.command('worker')
+@click.option('--job', 'job_names', multiple=True,
+              help='Scheduled job to run, may be repeated. All by default')
+def worker(job_names):
+    """
+    Runs scheduled maintenance jobs until SIGTERM. Any number of workers
+    may be started, every job run is taken by one of them only.
+    """
+    asyncio.run(process_worker(list(job_names)))
+    sys.exit()